@@ -0,0 +1,175 @@
+import os
+import time
+import asyncio
+import pandas as pd
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError
+from fetch_engine import backoff_delay
+from send_prompt import PRIOR_SIGNAL_TYPES, load_prompt, prior_signal_dates, save_response, get_temperature, MODEL, BASE_URL
+from response_cache import ResponseCache
+from metrics import METRICS
+from trading_calendar import is_trading_day, is_week_close
+
+
+def make_client(base_url: str = BASE_URL, api_key: str = None) -> AsyncOpenAI:
+    """Async client for the OpenAI-compatible endpoint; retries are handled by submit_prompts."""
+    return AsyncOpenAI(api_key=api_key or os.getenv('API_KEY'), base_url=base_url, max_retries=0)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits (429), server errors (5xx), timeouts and dropped connections are worth retrying."""
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (APITimeoutError, APIConnectionError, asyncio.TimeoutError))
+
+
+def save_job_response(job, response) -> None:
+    """Default sink: saves the response where send_prompt would, filed by prompt type rather than today's weekday."""
+    prompt_type, date_input = job
+    save_response(response, prompt_type, date_input, "Weekends" if prompt_type == 't' else "Weekdays")
+
+
+async def _complete(client, semaphore, job, prompt: str, temperature: float, model: str,
+                    timeout: float, retries: int, backoff: float, max_backoff: float) -> tuple:
+    """Returns (job, response, None) on success or (job, None, error) once retries are exhausted."""
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await asyncio.wait_for(
+                    client.chat.completions.create(model=model, messages=[{"role": "user", "content": prompt}],
+                                                   temperature=temperature),
+                    timeout)
+            METRICS.record_llm(response, time.perf_counter() - start, model=model)
+            return job, response, None
+        except Exception as e:
+            METRICS.count('llm_errors_total', model=model, error=type(e).__name__)
+            if attempt == retries or not is_retryable(e):
+                return job, None, e
+        await asyncio.sleep(backoff_delay(attempt, backoff, max_backoff))
+
+
+async def submit_prompts(jobs, client: AsyncOpenAI = None, concurrency: int = 4, timeout: float = 600.0,
+                         retries: int = 3, backoff: float = 2.0, max_backoff: float = 60.0,
+                         model: str = MODEL, sink=save_job_response, cache: ResponseCache = None) -> tuple:
+    """Renders and submits several (prompt_type, date) jobs concurrently.
+
+    At most `concurrency` requests are in flight. Each attempt is cut off after
+    `timeout` seconds, and 429/5xx/timeout failures are retried with jittered
+    exponential backoff. `sink(job, response)` runs as each call finishes, so
+    completed responses are saved even if later jobs fail.
+
+    A prompt is rendered only once every job in the batch whose reply it includes
+    (see send_prompt.prior_signal_dates) has been saved, e.g. a week's 't' waits
+    for that week's 'd'/'n' jobs and each 'd' for the earlier 'd' jobs it reports.
+    A job whose dependency failed fails too, without a request. Dependents read
+    replies through the signal index, so they need a sink that saves them.
+
+    Args:
+        jobs (list): (prompt_type, date) pairs, e.g. [('d', '2025-11-17'), ('t', '2025-11-21')].
+        client (AsyncOpenAI): Client to use (default: make_client()).
+        concurrency (int): Maximum simultaneous requests.
+        timeout (float): Seconds allowed per attempt.
+        retries (int): Retries per job after the first attempt.
+        backoff (float): Base backoff delay in seconds.
+        max_backoff (float): Upper bound on one backoff delay.
+        model (str): Model name.
+        sink: Callable(job, response); None to only collect responses.
+        cache (ResponseCache): Serve and store completions through this cache, per its mode.
+
+    Returns:
+        tuple: ({job: response}, {job: error message}) for the jobs that succeeded and failed.
+    """
+    client = client or make_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    results, failures = {}, {}
+    jobs = list(dict.fromkeys(jobs))
+    finished = {job: asyncio.Event() for job in jobs}
+
+    async def run_job(job) -> None:
+        prompt_type, date_input = job
+        try:
+            prior_dates = prior_signal_dates(prompt_type, date_input)
+        except ValueError as e:
+            failures[job] = str(e)
+            return
+        needs = [other for other in jobs if other != job and other[1] in prior_dates
+                 and other[0] in PRIOR_SIGNAL_TYPES.get(prompt_type, [])]
+        for other in needs:
+            await finished[other].wait()
+        failed = [f"{other[0]}_{other[1]}" for other in needs if other in failures]
+        if failed:
+            failures[job] = f"Needs the {', '.join(failed)} reply, which failed."
+            return
+
+        try:
+            prompt = load_prompt(prompt_type, date_input)
+        except (ValueError, FileNotFoundError) as e:
+            failures[job] = str(e)
+            return
+        temperature = get_temperature(prompt_type)
+        if cache is not None:
+            try:
+                key, cached = cache.lookup(model, prompt, temperature)
+            except KeyError as e:
+                failures[job] = e.args[0]
+                return
+            if cached is not None:
+                results[job] = cached
+                if sink is not None:
+                    sink(job, cached)
+                return
+
+        _, response, error = await _complete(client, semaphore, job, prompt, temperature, model,
+                                             timeout, retries, backoff, max_backoff)
+        if error is not None:
+            failures[job] = str(error) or type(error).__name__
+            return
+        results[job] = response
+        if cache is not None:
+            cache.store(key, response)
+        if sink is not None:
+            sink(job, response)
+
+    async def run(job) -> None:
+        try:
+            await run_job(job)
+        except Exception as e:
+            failures[job] = str(e) or type(e).__name__
+        finally:
+            finished[job].set()
+
+    await asyncio.gather(*(run(job) for job in jobs))
+    return results, failures
+
+
+def date_jobs(prompt_types, start_date: str, end_date: str) -> list:
+    """Builds (prompt_type, date) jobs for every weekday in the range.
+
+    'd' becomes 'n' on NSE holidays, and 't' jobs only fall on each week's last
+    trading day (normally Friday).
+    """
+    jobs = []
+    for day in pd.bdate_range(start_date, end_date):
+        date_str = day.strftime('%Y-%m-%d')
+        for prompt_type in prompt_types:
+            if prompt_type == 't' and not is_week_close(date_str):
+                continue
+            if prompt_type == 'd' and not is_trading_day(date_str):
+                prompt_type = 'n'
+            if (prompt_type, date_str) not in jobs:
+                jobs.append((prompt_type, date_str))
+    return jobs
+
+
+if __name__ == "__main__":
+    prompt_types = [t.strip() for t in input("Enter prompt types, comma separated (e.g. d,t): ").strip().lower().split(',') if t.strip()]
+    start_date = input("Enter start date (YYYY-MM-DD): ").strip()
+    end_date = input("Enter end date (YYYY-MM-DD): ").strip()
+    concurrency = int(input("Enter number of concurrent requests (default 4): ").strip() or 4)
+
+    cache = ResponseCache()
+    results, failures = asyncio.run(submit_prompts(date_jobs(prompt_types, start_date, end_date),
+                                                   concurrency=concurrency, cache=cache))
+    print(f"\nSaved {len(results)} responses ({cache.hits} from the response cache)")
+    for (prompt_type, date_input), error in sorted(failures.items()):
+        print(f"Failed {prompt_type}_{date_input}: {error}")
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from universe import UNIVERSE
+from signal_index import SignalIndex
+from update_portfolio import load_close_matrix
+from trading_calendar import next_trading_day
+
+HORIZONS = [1, 3, 5, 10]
+NOTIONAL = 1000.00
+
+# Position each signal type implies: long for buy/hold, short for sell, none for watch.
+DIRECTIONS = {'buy': 1, 'hold': 1, 'sell': -1, 'watch': 0}
+
+
+def classify_signal(text) -> str:
+    """Maps free-text signals to buy / sell / hold / watch by their leading part.
+
+    "Hold/Buy More" is a hold, "Watch/Sell" a watch, "Potential Sell/Watch" a sell.
+    """
+    head = str(text).split('/')[0].lower()
+    if 'sell' in head or 'avoid' in head:
+        return 'sell'
+    if 'buy' in head:
+        return 'buy'
+    if 'hold' in head:
+        return 'hold'
+    return 'watch'
+
+
+def load_signals(index: SignalIndex = None) -> pd.DataFrame:
+    """Loads every daily top signal, emergency trade and weekend trade from the signal index.
+
+    Returns:
+        pd.DataFrame: date, source ('signal', 'emergency' or 'trade'), symbol, signal (raw text), type.
+    """
+    index = index or SignalIndex()
+    frames = []
+
+    signals = index.signals()
+    frames.append(pd.DataFrame({'date': signals['date'], 'source': 'signal',
+                                'symbol': signals['symbol'], 'signal': signals['signal']}))
+    for key, source in [('emergency_trades', 'emergency'), ('trades', 'trade')]:
+        items = index.items(key)
+        if 'action' in items.columns and 'symbol' in items.columns:
+            items = items[items['action'].isin(['buy', 'sell'])]
+            frames.append(pd.DataFrame({'date': items['date'], 'source': source,
+                                        'symbol': items['symbol'], 'signal': items['action']}))
+
+    df = pd.concat(frames, ignore_index=True)
+    df['type'] = df['signal'].map(classify_signal)
+    return df.sort_values(['date', 'source'], kind='stable').reset_index(drop=True)
+
+
+def forward_returns(closes: np.ndarray, horizons=HORIZONS) -> np.ndarray:
+    """Close-to-close returns h sessions ahead for every (date, symbol).
+
+    Returns:
+        np.ndarray: Shape (len(horizons), days, symbols); NaN where either close is missing or
+        the horizon runs past the last date.
+    """
+    n_days = closes.shape[0]
+    out = np.full((len(horizons),) + closes.shape, np.nan)
+    for k, h in enumerate(horizons):
+        if h < n_days:
+            out[k, :n_days - h] = closes[h:] / closes[:n_days - h] - 1
+    return out
+
+
+def backtest(signals: pd.DataFrame = None, horizons=HORIZONS, closes=None, notional: float = NOTIONAL) -> tuple:
+    """Scores signals by the forward returns of their symbols.
+
+    Each signal enters at the close of its date (a signal dated on a non-trading
+    day uses the previous session) and is held `h` sessions. P&L is direction x
+    return x notional, so sells profit from falls and watch signals carry no P&L.
+
+    Args:
+        signals (pd.DataFrame): From load_signals() (default: load them).
+        horizons (list): Holding periods in trading sessions.
+        closes (tuple): (dates, matrix) from load_close_matrix(..., trading_only=True), to reuse a load.
+        notional (float): Rupees assumed per signal.
+
+    Returns:
+        tuple: (per-signal DataFrame with ret_<h>/pnl_<h> columns,
+                summary DataFrame by source, type and horizon: signals, scored, mean_return, hit_rate, pnl).
+    """
+    signals = load_signals() if signals is None else signals
+    if closes is None:
+        closes = load_close_matrix(signals['date'].min(), next_trading_day(signals['date'].max(), max(horizons)),
+                                   trading_only=True)
+    days, matrix = closes
+
+    rows = np.searchsorted(np.array(days), signals['date'].to_numpy(dtype=str), side='right') - 1
+    ids = UNIVERSE.ids(signals['symbol'])
+    valid = (rows >= 0) & (ids >= 0)
+
+    returns = forward_returns(matrix, horizons)[:, np.where(valid, rows, 0), np.where(valid, ids, 0)]
+    returns[:, ~valid] = np.nan
+    direction = signals['type'].map(DIRECTIONS).to_numpy(dtype=float)
+    pnl = returns * direction * notional
+
+    events = signals.copy()
+    for k, h in enumerate(horizons):
+        events[f'ret_{h}'] = returns[k]
+        events[f'pnl_{h}'] = pnl[k]
+
+    long_form = pd.DataFrame({
+        'source': np.tile(signals['source'].to_numpy(), len(horizons)),
+        'type': np.tile(signals['type'].to_numpy(), len(horizons)),
+        'horizon': np.repeat(horizons, len(signals)),
+        'ret': returns.ravel(),
+        'pnl': pnl.ravel(),
+        'hit': np.where(np.isnan(returns) | (direction == 0), np.nan, (returns * direction > 0)).ravel(),
+    })
+    summary = long_form.groupby(['source', 'type', 'horizon']).agg(
+        signals=('ret', 'size'), scored=('ret', 'count'), mean_return=('ret', 'mean'),
+        hit_rate=('hit', 'mean'), pnl=('pnl', 'sum')).reset_index()
+    return events, summary
+
+
+if __name__ == "__main__":
+    events, summary = backtest()
+    print(f"Backtested {len(events)} signals from {events['date'].min()} to {events['date'].max()}\n")
+    summary['mean_return'] = (summary['mean_return'] * 100).round(2)
+    summary['hit_rate'] = (summary['hit_rate'] * 100).round(1)
+    summary['pnl'] = summary['pnl'].round(2)
+    print(summary.rename(columns={'mean_return': 'mean_return_%', 'hit_rate': 'hit_rate_%',
+                                  'pnl': f'pnl_₹ ({NOTIONAL:,.0f}/signal)'}).to_string(index=False))
@@ -0,0 +1,144 @@
+import time
+import asyncio
+import contextlib
+from types import SimpleNamespace
+import pandas as pd
+from openai.types.chat import ChatCompletion
+from synthetic import SyntheticMarket, completion_payload
+
+# Reply the fake clients return when no reply function is given: a small valid daily reply.
+DEFAULT_REPLY = '{"daily_summary": "Synthetic reply.", "top_signals": [], "watchlist": []}'
+
+
+class FakeEquityHistory:
+    """Stand-in for nsepython.equity_history(symbol, series, start, end) serving a SyntheticMarket.
+
+    Each call sleeps `latency` seconds first, like one NSE round trip, and
+    returns the CH_* columns extract_data reads.
+    """
+
+    def __init__(self, market: SyntheticMarket, latency: float = 0.0):
+        self.market = market
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, symbol, series, start_date, end_date) -> pd.DataFrame:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        start = pd.to_datetime(start_date, format='%d-%m-%Y').strftime('%Y-%m-%d')
+        end = pd.to_datetime(end_date, format='%d-%m-%Y').strftime('%Y-%m-%d')
+        df = self.market.history(symbol, start, end)
+        return pd.DataFrame({
+            'CH_TIMESTAMP': df['Date'], 'CH_SYMBOL': symbol, 'CH_SERIES': series,
+            'CH_OPENING_PRICE': df['Open'], 'CH_TRADE_HIGH_PRICE': df['High'], 'CH_TRADE_LOW_PRICE': df['Low'],
+            'CH_CLOSING_PRICE': df['Close'], 'CH_TOT_TRADED_QTY': df['Volume'],
+        })
+
+
+class FakeDownload:
+    """Stand-in for yfinance.download serving a SyntheticMarket (end date exclusive, like Yahoo).
+
+    A single ticker gives (Price, Ticker) columns as recent yfinance does; a
+    list with group_by='ticker' gives (Ticker, Price) columns. Each call sleeps
+    `latency` seconds.
+    """
+
+    def __init__(self, market: SyntheticMarket, latency: float = 0.0):
+        self.market = market
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, tickers, start=None, end=None, group_by='column', **kwargs) -> pd.DataFrame:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        last = (pd.Timestamp(end) - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {}
+        for ticker in tickers:
+            df = self.market.history(ticker, start, last)
+            if not df.empty:
+                frames[ticker] = df.set_index(pd.DatetimeIndex(df['Date'], name='Date')).drop(columns='Date')
+        if not frames:
+            return pd.DataFrame()
+        wide = pd.concat(frames, axis=1, names=['Ticker', 'Price'])
+        return wide if group_by == 'ticker' else wide.swaplevel(axis=1)
+
+
+class FakeCompletions:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model, messages, temperature=None, **kwargs) -> ChatCompletion:
+        if self.owner.latency:
+            time.sleep(self.owner.latency)
+        return self.owner.respond(model, messages)
+
+
+class FakeOpenAI:
+    """Stand-in for the OpenAI client: client.chat.completions.create(...) returns a ChatCompletion.
+
+    Args:
+        latency (float): Seconds each completion takes.
+        reply (callable): messages -> reply content (default: DEFAULT_REPLY).
+        prompt_tokens (int), completion_tokens (int): Usage reported with every reply.
+    """
+
+    def __init__(self, latency: float = 0.0, reply=None, prompt_tokens: int = 9000, completion_tokens: int = 800):
+        self.latency = latency
+        self.reply = reply
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=FakeCompletions(self))
+
+    def respond(self, model, messages) -> ChatCompletion:
+        self.calls += 1
+        content = self.reply(messages) if self.reply is not None else DEFAULT_REPLY
+        return ChatCompletion.model_validate(completion_payload(
+            content, model, self.prompt_tokens, self.completion_tokens, created=1700000000 + self.calls))
+
+
+class FakeAsyncCompletions(FakeCompletions):
+    async def create(self, model, messages, temperature=None, **kwargs) -> ChatCompletion:
+        if self.owner.latency:
+            await asyncio.sleep(self.owner.latency)
+        return self.owner.respond(model, messages)
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """Stand-in for AsyncOpenAI (as used by async_submit); completions await `latency` seconds."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chat = SimpleNamespace(completions=FakeAsyncCompletions(self))
+
+
+@contextlib.contextmanager
+def offline_sources(market: SyntheticMarket, latency: float = 0.0, llm_latency: float = 0.0):
+    """Routes NSE, Yahoo and Grok calls of the project modules to the fakes for the duration of the block.
+
+    Yields:
+        SimpleNamespace: equity_history, download and client (the fakes, for call counts).
+    """
+    import extract_data
+    import extract_data_yfinance
+    import send_prompt
+    import pipeline
+
+    fakes = SimpleNamespace(equity_history=FakeEquityHistory(market, latency), download=FakeDownload(market, latency),
+                            client=FakeOpenAI(llm_latency))
+    saved = [(extract_data, 'equity_history', extract_data.equity_history),
+             (extract_data_yfinance, 'yf', extract_data_yfinance.yf),
+             (send_prompt, 'client', send_prompt.client),
+             (pipeline, 'client', pipeline.client)]
+    extract_data.equity_history = fakes.equity_history
+    extract_data_yfinance.yf = SimpleNamespace(download=fakes.download)
+    send_prompt.client = fakes.client
+    pipeline.client = fakes.client
+    try:
+        yield fakes
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
@@ -0,0 +1,48 @@
+import os
+import sys
+import glob
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from read_stocks import STOCK_STYLES, get_stock_data_strings
+from prompt_size import measure
+
+
+def benchmark_styles(stock_dir: str = "Stock Files", window: int = 5) -> list:
+    """Measures every stock data style on the archived Stock Files.
+
+    Reports the average size of one day's stock data and of a weekend prompt's
+    `window` consecutive days, with the saving relative to 'verbose'.
+
+    Returns:
+        list: One dict per style (style, chars/day, tokens/day, chars/week, tokens/week, saved %).
+    """
+    dates = sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(stock_dir, "*.csv")))
+    weeks = [dates[i:i + window] for i in range(0, len(dates) - window + 1, window)]
+
+    rows = []
+    for style in STOCK_STYLES:
+        rendered = get_stock_data_strings(dates, style)
+        sizes = [measure(rendered[date_str]) for date_str in dates]
+        week_sizes = [measure("\n".join(rendered[date_str] for date_str in week) + "\n") for week in weeks]
+        rows.append({
+            'style': style,
+            'chars_per_day': sum(size['chars'] for size in sizes) / len(sizes),
+            'tokens_per_day': sum(size['tokens'] for size in sizes) / len(sizes),
+            'chars_per_week': sum(size['chars'] for size in week_sizes) / len(week_sizes),
+            'tokens_per_week': sum(size['tokens'] for size in week_sizes) / len(week_sizes),
+        })
+
+    verbose = rows[0]
+    for row in rows:
+        row['chars_saved'] = (1 - row['chars_per_day'] / verbose['chars_per_day']) * 100
+        row['tokens_saved'] = (1 - row['tokens_per_day'] / verbose['tokens_per_day']) * 100
+    return rows
+
+
+if __name__ == "__main__":
+    rows = benchmark_styles()
+    print(f"{'Style':<8} {'Chars/day':>10} {'Tokens/day':>11} {'Chars/week':>11} {'Tokens/week':>12} {'Chars saved':>12} {'Tokens saved':>13}")
+    for row in rows:
+        print(f"{row['style']:<8} {row['chars_per_day']:>10,.0f} {row['tokens_per_day']:>11,.0f} {row['chars_per_week']:>11,.0f} "
+              f"{row['tokens_per_week']:>12,.0f} {row['chars_saved']:>11.1f}% {row['tokens_saved']:>12.1f}%")
@@ -0,0 +1,307 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+import subprocess
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('API_KEY', 'benchmark')  # send_prompt builds its client at import; the fakes replace it
+
+import pandas as pd
+from synthetic import SyntheticMarket, write_workspace, REPO_DIR
+from fakes import FakeAsyncOpenAI, offline_sources
+import universe
+import read_stocks
+import update_portfolio
+import make_portfolio
+import send_prompt
+import friday_summary
+import extract_data
+import extract_data_yfinance
+import hedged_fetch
+import async_submit
+from render_cache import STOCK_RENDERS, PORTFOLIO_RENDERS
+from signal_index import SignalIndex, INDEX_FILE
+
+RESULTS_DIR = os.path.join(REPO_DIR, 'benchmarks', 'results')
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """Registers fn(ctx) as the benchmark `name`; the whole call is timed."""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+class Context:
+    """What every benchmark gets: the synthetic market, its workspace, the fakes and the run parameters."""
+
+    def __init__(self, market: SyntheticMarket, fakes, params: dict):
+        self.market = market
+        self.fakes = fakes
+        self.params = params
+        self.last_day = market.dates[-1]
+        fridays = [d for d in market.dates if pd.Timestamp(d).weekday() == 4 and d < self.last_day]
+        self.friday = fridays[-1]
+        self.next_day = market.dates[market.dates.index(self.friday) + 1]
+        self.week = market.dates[market.dates.index(self.friday) - 4:market.dates.index(self.friday) + 1]
+
+
+@benchmark('read_stocks.day')
+def bench_read_day(ctx):
+    STOCK_RENDERS.clear()
+    read_stocks.get_stock_data_string(ctx.last_day)
+
+
+@benchmark('read_stocks.day_cached')
+def bench_read_day_cached(ctx):
+    read_stocks.get_stock_data_string(ctx.last_day)
+
+
+@benchmark('read_stocks.week_table')
+def bench_read_week(ctx):
+    STOCK_RENDERS.clear()
+    read_stocks.get_stock_data_strings(ctx.week, 'table')
+
+
+@benchmark('update_portfolio.day')
+def bench_mark_day(ctx):
+    update_portfolio.update_portfolio(ctx.last_day)
+
+
+@benchmark('update_portfolio.history')
+def bench_mark_history(ctx):
+    df = pd.read_csv(os.path.join('Portfolio Files', f"{ctx.market.dates[0]}.csv"))
+    update_portfolio.mark_to_market_range(df, ctx.market.dates[0], ctx.last_day)
+
+
+@benchmark('make_portfolio.weekend')
+def bench_weekend_trades(ctx):
+    make_portfolio.update_portfolio(ctx.friday, ctx.next_day)
+
+
+@benchmark('load_prompt.daily')
+def bench_prompt_daily(ctx):
+    STOCK_RENDERS.clear()
+    PORTFOLIO_RENDERS.clear()
+    send_prompt.load_prompt('d', ctx.last_day)
+
+
+@benchmark('load_prompt.weekend')
+def bench_prompt_weekend(ctx):
+    STOCK_RENDERS.clear()
+    PORTFOLIO_RENDERS.clear()
+    send_prompt.load_prompt('t', ctx.friday)
+
+
+@benchmark('friday_summary.week')
+def bench_friday_summary(ctx):
+    friday_summary.generate_weekly_string(ctx.friday)
+
+
+@benchmark('signal_index.rebuild')
+def bench_index_rebuild(ctx):
+    os.remove(os.path.join('Grok Daily Reviews', INDEX_FILE))
+    SignalIndex().close()
+
+
+@benchmark('fetch.nse')
+def bench_fetch_nse(ctx):
+    symbols = [f"{symbol}.NS" for symbol in ctx.market.symbols[:ctx.params['fetch_symbols']]]
+    extract_data.fetch_ohlcv(symbols, datetime.strptime(ctx.last_day, '%Y-%m-%d'),
+                             workers=ctx.params['workers'], rate=1000.0)
+
+
+@benchmark('fetch.yfinance_batched')
+def bench_fetch_yfinance(ctx):
+    symbols = [f"{symbol}.NS" for symbol in ctx.market.symbols[:ctx.params['fetch_symbols']]]
+    day = datetime.strptime(ctx.last_day, '%Y-%m-%d')
+    extract_data_yfinance.fetch_ohlcv_batched(symbols, day, day)
+
+
+@benchmark('fetch.hedged')
+def bench_fetch_hedged(ctx):
+    symbols = [f"{symbol}.NS" for symbol in ctx.market.symbols[:ctx.params['fetch_symbols']]]
+    day = datetime.strptime(ctx.last_day, '%Y-%m-%d')
+    backends = [hedged_fetch.Backend('nse', lambda symbol: extract_data._fetch_symbol(symbol, day), rate=1000.0),
+                hedged_fetch.Backend('yfinance', lambda symbol: extract_data_yfinance._fetch_symbol(symbol, day),
+                                     rate=1000.0)]
+    hedged_fetch.fetch_hedged(symbols, ctx.last_day, backends, workers=ctx.params['workers'])
+
+
+@benchmark('llm.sequential')
+def bench_llm_sequential(ctx):
+    for date_str in ctx.week:
+        prompt = send_prompt.load_prompt('d', date_str)
+        send_prompt.client.chat.completions.create(model=send_prompt.MODEL, messages=[{"role": "user", "content": prompt}],
+                                                   temperature=send_prompt.get_temperature('d'))
+
+
+@benchmark('llm.async')
+def bench_llm_async(ctx):
+    client = FakeAsyncOpenAI(ctx.params['llm_latency'])
+    jobs = [('d', date_str) for date_str in ctx.week]
+    asyncio.run(async_submit.submit_prompts(jobs, client=client, concurrency=ctx.params['workers'], sink=None))
+
+
+def use_universe(table: pd.DataFrame) -> None:
+    """Re-initialises the shared UNIVERSE in place, so modules that imported it see the synthetic symbols."""
+    universe.UNIVERSE.__init__(table, 0)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_benchmark(fn, ctx: Context, repeat: int) -> list:
+    """Runs fn(ctx) once to warm up, then `repeat` timed times with module output suppressed."""
+    timings = []
+    for i in range(repeat + 1):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            fn(ctx)
+            elapsed = time.perf_counter() - start
+        if i:
+            timings.append(elapsed)
+    return timings
+
+
+def run_benchmarks(names, params: dict, repeat: int = 5, workspace: str = None) -> list:
+    """Builds (or reuses) a synthetic workspace and times the named benchmarks in it.
+
+    Args:
+        names (list): Benchmark names (keys of BENCHMARKS).
+        params (dict): symbols, days, positions, signals, seed, latency, llm_latency, workers, fetch_symbols.
+        repeat (int): Timed runs per benchmark.
+        workspace (str): Directory to build the workspace in and keep; default: a temporary one.
+
+    Returns:
+        list: One result dict per benchmark (name, params, timings and summary statistics).
+    """
+    market = SyntheticMarket(params['symbols'], params['days'], seed=params['seed'])
+    root = workspace or tempfile.mkdtemp(prefix='smsp-bench-')
+    cwd = os.getcwd()
+    results = []
+    try:
+        if not os.path.exists(os.path.join(root, 'Stock Files', f"{market.dates[-1]}.csv")):
+            print(f"Writing synthetic workspace to {root} ...")
+            start = time.perf_counter()
+            write_workspace(market, root, params['positions'], params['signals'], seed=params['seed'])
+            print(f"  {params['days']} days x {params['symbols']} symbols in {time.perf_counter() - start:.1f}s")
+        use_universe(market.universe_table())
+        os.chdir(root)
+        with offline_sources(market, params['latency'], params['llm_latency']) as fakes:
+            ctx = Context(market, fakes, params)
+            for name in names:
+                timings = time_benchmark(BENCHMARKS[name], ctx, repeat)
+                result = {'benchmark': name, 'params': params, 'repeat': repeat,
+                          'min_s': min(timings), 'median_s': statistics.median(timings),
+                          'mean_s': statistics.fmean(timings), 'max_s': max(timings), 'timings_s': timings}
+                results.append(result)
+                print(f"  {name:<28} median {result['median_s'] * 1000:10.2f} ms   min {result['min_s'] * 1000:10.2f} ms")
+    finally:
+        os.chdir(cwd)
+        if workspace is None:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def write_results(results: list, output: str = None) -> str:
+    """Writes one JSON line per benchmark, tagged with the commit, time, Python version and platform."""
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    output = output or os.path.join(RESULTS_DIR, f"{stamp}.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    meta = {'commit': git_commit(), 'timestamp': stamp, 'python': platform.python_version(),
+            'platform': platform.platform()}
+    with open(output, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps({**meta, **result}) + "\n")
+    return output
+
+
+def compare(results: list, baseline_path: str, threshold: float = 0.2) -> list:
+    """Prints each benchmark's median against a previous results file.
+
+    Returns:
+        list: Names of benchmarks whose median grew by more than `threshold` (e.g. 0.2 = 20%).
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {row['benchmark']: row for row in (json.loads(line) for line in f if line.strip())}
+
+    regressions = []
+    print(f"\nAgainst {baseline_path}:")
+    for result in results:
+        old = baseline.get(result['benchmark'])
+        if old is None:
+            print(f"  {result['benchmark']:<28} (new)")
+            continue
+        ratio = result['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        flag = ""
+        if old.get('params') != result['params']:
+            flag = "  (different params)"
+        elif ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(result['benchmark'])
+        print(f"  {result['benchmark']:<28} {old['median_s'] * 1000:10.2f} ms -> {result['median_s'] * 1000:10.2f} ms"
+              f"  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the project on a synthetic universe with offline data sources.")
+    parser.add_argument('--symbols', type=int, default=2000, help="Synthetic symbols per day")
+    parser.add_argument('--days', type=int, default=250, help="Weekdays of history")
+    parser.add_argument('--positions', type=int, default=200, help="Holdings in the synthetic portfolio")
+    parser.add_argument('--signals', type=int, default=50, help="Top signals per daily reply")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds per fake NSE/Yahoo call")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Seconds per fake completion")
+    parser.add_argument('--workers', type=int, default=8, help="Fetch workers / concurrent completions")
+    parser.add_argument('--fetch-symbols', type=int, default=200, help="Symbols fetched by the fetch benchmarks")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument('--only', help="Comma-separated benchmark names or prefixes (e.g. read_stocks,fetch.nse)")
+    parser.add_argument('--workspace', help="Build the synthetic workspace here and keep it (reused if present)")
+    parser.add_argument('--output', help="Results JSONL file (default: benchmarks/results/<timestamp>.jsonl)")
+    parser.add_argument('--compare', help="Previous results JSONL to compare medians against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Slowdown that counts as a regression")
+    parser.add_argument('--list', action='store_true', help="List the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+    names = list(BENCHMARKS)
+    if args.only:
+        prefixes = [p.strip() for p in args.only.split(',') if p.strip()]
+        names = [name for name in names if any(name.startswith(prefix) for prefix in prefixes)]
+        if not names:
+            parser.error(f"No benchmarks match {args.only}. Use --list to see them.")
+
+    params = {'symbols': args.symbols, 'days': args.days, 'positions': args.positions, 'signals': args.signals,
+              'seed': args.seed, 'latency': args.latency, 'llm_latency': args.llm_latency,
+              'workers': args.workers, 'fetch_symbols': args.fetch_symbols}
+    results = run_benchmarks(names, params, args.repeat, args.workspace)
+    output = write_results(results, args.output)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
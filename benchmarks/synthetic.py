@@ -0,0 +1,154 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATEGORIES = ['Mid Cap', 'Small Cap']
+CSV_COLUMNS = ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Category']
+PORTFOLIO_COLUMNS = ['Holding Name', 'Buying Price', 'Current Price', 'Number of Units', 'Total Amount', 'Perct Change']
+SIGNALS = ['Buy', 'Hold', 'Sell', 'Watch', 'Hold/Buy More', 'Watch/Sell']
+
+
+class SyntheticMarket:
+    """Reproducible random-walk OHLCV for `symbols` made-up stocks over `days` weekdays.
+
+    Prices are dense (day x symbol) arrays, so any day, symbol history or whole
+    workspace can be produced without a network connection. The same seed
+    always gives the same market.
+    """
+
+    def __init__(self, symbols: int = 2000, days: int = 500, start_date: str = '2023-01-02', seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.dates = [day.strftime('%Y-%m-%d') for day in pd.bdate_range(start_date, periods=days)]
+        self.symbols = np.array([f"SYN{i:05d}" for i in range(symbols)], dtype=object)
+        self.categories = np.array([CATEGORIES[i % 2] for i in range(symbols)], dtype=object)
+
+        shape = (days, symbols)
+        base = rng.uniform(20, 3000, symbols)
+        close = base * np.exp(np.cumsum(rng.normal(0.0003, 0.02, shape), axis=0))
+        previous = np.vstack([base, close[:-1]])
+        open_ = previous * (1 + rng.normal(0, 0.005, shape))
+        self.close = np.round(close, 2)
+        self.open = np.round(open_, 2)
+        self.high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, shape))), 2)
+        self.low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, shape))), 2)
+        self.volume = rng.lognormal(13, 1.2, shape).astype(np.int64)
+
+        self._rows = {date_str: i for i, date_str in enumerate(self.dates)}
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def universe_table(self) -> pd.DataFrame:
+        """Universe rows (Id, Symbol, Category, Active, YFinance) for every synthetic symbol."""
+        return pd.DataFrame({'Id': np.arange(len(self.symbols)), 'Symbol': self.symbols, 'Category': self.categories,
+                             'Active': 1, 'YFinance': 1})
+
+    def day(self, date_str: str) -> pd.DataFrame:
+        """One day's rows in the Stock Files layout."""
+        i = self._rows[date_str]
+        return pd.DataFrame({'Symbol': self.symbols, 'Date': date_str, 'Open': self.open[i], 'High': self.high[i],
+                             'Low': self.low[i], 'Close': self.close[i], 'Volume': self.volume[i],
+                             'Category': self.categories}, columns=CSV_COLUMNS)
+
+    def history(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Date, Open, High, Low, Close, Volume of one symbol between two dates (inclusive).
+
+        Unknown symbols and dates outside the market give an empty frame.
+        """
+        column = self._columns.get(symbol.replace('.NS', ''))
+        rows = [i for i, date_str in enumerate(self.dates) if start_date <= date_str <= end_date]
+        if column is None or not rows:
+            return pd.DataFrame(columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        return pd.DataFrame({'Date': [self.dates[i] for i in rows], 'Open': self.open[rows, column],
+                             'High': self.high[rows, column], 'Low': self.low[rows, column],
+                             'Close': self.close[rows, column], 'Volume': self.volume[rows, column]})
+
+
+def completion_payload(content: str, model: str = 'grok-4', prompt_tokens: int = 9000,
+                       completion_tokens: int = 800, created: int = 1700000000) -> dict:
+    """A chat completion in the shape save_response writes (model_dump of the API response)."""
+    return {
+        'id': f"synthetic-{created}",
+        'choices': [{'finish_reason': 'stop', 'index': 0, 'logprobs': None,
+                     'message': {'content': content, 'role': 'assistant'}}],
+        'created': created,
+        'model': model,
+        'object': 'chat.completion',
+        'system_fingerprint': None,
+        'usage': {'completion_tokens': completion_tokens, 'prompt_tokens': prompt_tokens,
+                  'total_tokens': prompt_tokens + completion_tokens},
+    }
+
+
+def daily_reply(symbols, prices, rng) -> str:
+    """A daily (d) reply with one top signal per symbol."""
+    signals = [{'symbol': str(symbol), 'signal': SIGNALS[rng.integers(len(SIGNALS))],
+                'reason': f"Synthetic momentum signal for {symbol}", 'price': float(price)}
+               for symbol, price in zip(symbols, prices)]
+    return json.dumps({'daily_summary': "Synthetic session with mixed moves across midcaps and smallcaps.",
+                       'top_signals': signals,
+                       'watchlist': [f"Synthetic theme {i}" for i in range(3)]}, indent=2)
+
+
+def weekend_reply(sells, buys) -> str:
+    """A weekend (t) reply with the given [(symbol, shares, price)] sells and buys."""
+    trades = ([{'action': 'sell', 'symbol': str(symbol), 'shares': int(shares), 'amount': round(float(shares * price), 2),
+                'reason': "Synthetic exit"} for symbol, shares, price in sells]
+              + [{'action': 'buy', 'symbol': str(symbol), 'shares': int(shares), 'amount': round(float(shares * price), 2),
+                  'reason': "Synthetic entry"} for symbol, shares, price in buys])
+    return json.dumps({'weekly_summary': "Synthetic week.", 'trades': trades}, indent=2)
+
+
+def write_workspace(market: SyntheticMarket, root: str, positions: int = 50, signals_per_day: int = 10,
+                    trades_per_week: int = 10, seed: int = 0) -> dict:
+    """Writes a complete project tree for `market` under root.
+
+    Creates Stock Files and Portfolio Files for every day, a daily reply with
+    `signals_per_day` signals for every day, and a weekend reply on Fridays
+    selling and buying trades_per_week / 2 one-share lots each. The portfolio
+    holds `positions` stocks bought at the first close and keeps enough cash
+    for every weekend's buys. The repo's Prompts are copied in.
+
+    Returns:
+        dict: Counts of what was written (days, symbols, positions, signal files, trade files).
+    """
+    rng = np.random.default_rng(seed)
+    for name in ['Stock Files', 'Portfolio Files', os.path.join('Grok Daily Reviews', 'Weekdays'),
+                 os.path.join('Grok Daily Reviews', 'Weekends')]:
+        os.makedirs(os.path.join(root, name), exist_ok=True)
+    shutil.copytree(os.path.join(REPO_DIR, 'Prompts'), os.path.join(root, 'Prompts'), dirs_exist_ok=True)
+
+    held = rng.choice(len(market.symbols), size=min(positions, len(market.symbols)), replace=False)
+    units = rng.integers(1, 50, len(held)).astype(float)
+    buying = market.close[0, held]
+    cash = round(float(market.close[:, held].max()) * trades_per_week * len(market.dates), 2)
+
+    weekend_files = 0
+    for i, date_str in enumerate(market.dates):
+        market.day(date_str).to_csv(os.path.join(root, 'Stock Files', f"{date_str}.csv"), index=False)
+
+        current = market.close[i, held]
+        portfolio = pd.DataFrame({'Holding Name': market.symbols[held], 'Buying Price': buying, 'Current Price': current,
+                                  'Number of Units': units, 'Total Amount': np.round(current * units, 2),
+                                  'Perct Change': np.round((current - buying) / buying * 100, 2)},
+                                 columns=PORTFOLIO_COLUMNS)
+        portfolio.loc[len(portfolio)] = ['Cash', cash, cash, 1.0, cash, 0.0]
+        portfolio.to_csv(os.path.join(root, 'Portfolio Files', f"{date_str}.csv"), index=False)
+
+        picked = rng.choice(len(market.symbols), size=min(signals_per_day, len(market.symbols)), replace=False)
+        reply = completion_payload(daily_reply(market.symbols[picked], market.close[i, picked], rng))
+        with open(os.path.join(root, 'Grok Daily Reviews', 'Weekdays', f"d_{date_str}.json"), 'w', encoding='utf-8') as f:
+            json.dump(reply, f, indent=2)
+
+        if pd.Timestamp(date_str).weekday() == 4:
+            half = trades_per_week // 2
+            sells = [(market.symbols[s], 1, market.close[i, s]) for s in held[:half]]
+            buys = [(market.symbols[s], 1, market.close[i, s]) for s in rng.choice(len(market.symbols), size=half)]
+            reply = completion_payload(weekend_reply(sells, buys))
+            with open(os.path.join(root, 'Grok Daily Reviews', 'Weekends', f"t_{date_str}.json"), 'w', encoding='utf-8') as f:
+                json.dump(reply, f, indent=2)
+            weekend_files += 1
+
+    return {'days': len(market.dates), 'symbols': len(market.symbols), 'positions': len(held),
+            'signal_files': len(market.dates), 'trade_files': weekend_files}
@@ -0,0 +1,119 @@
+import pandas as pd
+import datetime
+import os
+import requests
+from universe import UNIVERSE
+from stock_files import combine_categories, skip_non_trading_day, write_stock_file
+
+BHAVCOPY_URL = "https://nsearchives.nseindia.com/content/cm/BhavCopy_NSE_CM_0_0_0_{date}_F_0000.csv.zip"
+BHAVCOPY_DIR = "Bhavcopy Files"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': '*/*',
+    'Referer': 'https://www.nseindia.com/'
+}
+
+# Column names for the UDiFF bhavcopy (2024 onwards) and the legacy cmDDMMMYYYYbhav.csv layout.
+COLUMN_MAPS = [
+    {'TckrSymb': 'Symbol', 'SctySrs': 'Series', 'TradDt': 'Date', 'OpnPric': 'Open', 'HghPric': 'High',
+     'LwPric': 'Low', 'ClsPric': 'Close', 'TtlTradgVol': 'Volume'},
+    {'SYMBOL': 'Symbol', 'SERIES': 'Series', 'TIMESTAMP': 'Date', 'OPEN': 'Open', 'HIGH': 'High',
+     'LOW': 'Low', 'CLOSE': 'Close', 'TOTTRDQTY': 'Volume'},
+]
+
+
+def download_bhavcopy(target_date, output_dir: str = BHAVCOPY_DIR) -> str:
+    """Downloads the NSE cash-market bhavcopy for the target date, reusing a local copy if present.
+
+    Returns:
+        str: Path of the zipped bhavcopy.
+
+    Raises:
+        FileNotFoundError: If NSE has not published the bhavcopy (yet) for the date.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    date_str = target_date.strftime('%Y%m%d')
+    path = os.path.join(output_dir, f"BhavCopy_NSE_CM_{date_str}.csv.zip")
+    if os.path.exists(path):
+        return path
+
+    response = requests.get(BHAVCOPY_URL.format(date=date_str), headers=HEADERS, timeout=30)
+    if response.status_code == 404:
+        raise FileNotFoundError(f"NSE has not published the bhavcopy for {target_date.strftime('%Y-%m-%d')} yet; "
+                                f"it is uploaded after the close, so try again later.")
+    response.raise_for_status()
+
+    with open(path, 'wb') as f:
+        f.write(response.content)
+    return path
+
+
+def read_bhavcopy(path: str) -> pd.DataFrame:
+    """Reads a bhavcopy (plain or zipped CSV) into Symbol, Series, Date, Open, High, Low, Close, Volume columns.
+
+    Raises:
+        ValueError: If the file is not a recognised bhavcopy layout.
+    """
+    raw = pd.read_csv(path, skipinitialspace=True)
+    raw.columns = raw.columns.str.strip()
+    for column_map in COLUMN_MAPS:
+        if all(col in raw.columns for col in column_map):
+            df = raw[list(column_map)].rename(columns=column_map)
+            df['Symbol'] = df['Symbol'].str.strip()
+            df['Series'] = df['Series'].str.strip()
+            df['Date'] = pd.to_datetime(df['Date'], format='mixed').dt.strftime('%Y-%m-%d')
+            return df
+    raise ValueError(f"Unrecognised bhavcopy layout in {path}.")
+
+
+def fetch_stock_data_bhavcopy(date_input: str, path: str = None) -> pd.DataFrame:
+    """
+    Builds the Stock Files/<date>.csv for the given date from NSE's single end-of-day bhavcopy
+    instead of one request per symbol. Reads `path` if given, otherwise downloads the file.
+    Output matches fetch_stock_data: top 75 mid-cap and small-cap stocks by volume.
+    Closed days get an empty file; a trading day whose bhavcopy is not out yet raises
+    FileNotFoundError and writes nothing, so a later run fetches it.
+    """
+    output_dir = "Stock Files"
+
+    try:
+        target_date = datetime.datetime.strptime(date_input, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-17).")
+
+    if skip_non_trading_day(target_date, output_dir):
+        return pd.DataFrame()
+
+    print(f"\nLoading bhavcopy for {target_date.strftime('%Y-%m-%d')}...")
+
+    if path is None:
+        path = download_bhavcopy(target_date)
+
+    bhav = read_bhavcopy(path)
+    bhav = bhav[bhav['Series'] == 'EQ']
+    if not bhav.empty and (bhav['Date'] != target_date.strftime('%Y-%m-%d')).any():
+        raise ValueError(f"Bhavcopy {path} is not for {target_date.strftime('%Y-%m-%d')}.")
+    bhav = bhav.drop(columns='Series')
+    bhav['Open'] = bhav['Open'].astype(float)
+    bhav['High'] = bhav['High'].astype(float)
+    bhav['Low'] = bhav['Low'].astype(float)
+    bhav['Close'] = bhav['Close'].astype(float)
+    bhav['Volume'] = bhav['Volume'].astype('int64')
+
+    category_frames = []
+    for category, symbols in UNIVERSE.category_lists():
+        wanted = [symbol.replace('.NS', '') for symbol in symbols]
+        df = bhav[bhav['Symbol'].isin(wanted)]
+        print(f"Matched {len(df)} of {len(wanted)} {category} symbols")
+        category_frames.append((category, df.copy()))
+    combined_df = combine_categories(category_frames)
+
+    write_stock_file(combined_df, target_date, output_dir)
+
+    return combined_df
+
+
+if __name__ == "__main__":
+    date_input = input("Enter the date (YYYY-MM-DD): ").strip()
+    path = input("Enter local bhavcopy path (leave blank to download): ").strip()
+    df = fetch_stock_data_bhavcopy(date_input, path or None)
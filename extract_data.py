@@ -1,125 +1,196 @@
 import pandas as pd
 import datetime
 from datetime import timedelta
-from tqdm import tqdm
-import time
 import os
 import warnings
 from nsepython import *
 from dateutil.parser import parse
+from fetch_engine import fetch_concurrent
+from fetch_cache import FetchCheckpoint, outstanding_report
+from universe import UNIVERSE
+from stock_files import combine_categories, missing_stock_days, skip_non_trading_day, write_stock_days, write_stock_file
 
 warnings.filterwarnings('ignore')
 
 
-def fetch_ohlcv(symbols, target_date):
-    """Fetch OHLCV data for symbols on the target date using nsepython only."""
+MID_SYMBOLS = UNIVERSE.tickers('Mid Cap')
+SMALL_SYMBOLS = UNIVERSE.tickers('Small Cap')
+
+
+def _fetch_symbol(symbol, target_date):
+    """Fetch one symbol's OHLCV row for the target date, or None if NSE has no data."""
     start = target_date.strftime('%d-%m-%Y')
     end = start  # same day
-    data_list = []
-
-    for symbol in tqdm(symbols, desc="Fetching OHLCV"):
-        try:
-            symbol_clean = symbol.replace('.NS', '')
-
-            df = equity_history(symbol_clean, "EQ", start, end)
-
-            if df.empty:
-                print(f"No data for {symbol_clean} on {target_date.strftime('%Y-%m-%d')}")
-                continue
-
-            row = df.iloc[0]
-            data_list.append({
-                'Symbol': symbol_clean,
-                'Date': target_date.strftime('%Y-%m-%d'),
-                'Open': float(row['CH_OPENING_PRICE']),
-                'High': float(row['CH_TRADE_HIGH_PRICE']),
-                'Low': float(row['CH_TRADE_LOW_PRICE']),
-                'Close': float(row['CH_CLOSING_PRICE']),
-                'Volume': int(row['CH_TOT_TRADED_QTY'])
-            })
-
-            time.sleep(0.5)  # avoid hitting API limits
-        except Exception as e:
-            print(f"nsepython failed for {symbol}: {e}")
-            continue
+    symbol_clean = symbol.replace('.NS', '')
+
+    df = equity_history(symbol_clean, "EQ", start, end)
+
+    if df.empty:
+        print(f"No data for {symbol_clean} on {target_date.strftime('%Y-%m-%d')}")
+        return None
+
+    row = df.iloc[0]
+    return {
+        'Symbol': symbol_clean,
+        'Date': target_date.strftime('%Y-%m-%d'),
+        'Open': float(row['CH_OPENING_PRICE']),
+        'High': float(row['CH_TRADE_HIGH_PRICE']),
+        'Low': float(row['CH_TRADE_LOW_PRICE']),
+        'Close': float(row['CH_CLOSING_PRICE']),
+        'Volume': int(row['CH_TOT_TRADED_QTY'])
+    }
+
+
+def fetch_ohlcv(symbols, target_date, workers=1, rate=2.0, retries=3, checkpoint=None):
+    """Fetch OHLCV data for symbols on the target date using nsepython only.
+
+    Symbols are fetched by `workers` threads (one by default) behind a shared token
+    bucket of `rate` requests per second, retrying each symbol up to `retries`
+    times with jittered backoff. Rows keep the order of `symbols`.
+    With a FetchCheckpoint, symbols it already holds are not fetched again and
+    each new result is checkpointed as soon as it arrives.
+    """
+    pending = symbols if checkpoint is None else checkpoint.outstanding(symbols)
+    results, failures = fetch_concurrent(
+        pending, lambda symbol: _fetch_symbol(symbol, target_date),
+        workers=workers, rate=rate, retries=retries,
+        on_result=checkpoint.record if checkpoint is not None else None, source='nse'
+    )
+    for symbol, e in failures.items():
+        print(f"nsepython failed for {symbol}: {e}")
+
+    if checkpoint is not None:
+        return pd.DataFrame(checkpoint.rows(symbols))
+    return pd.DataFrame([row for row in results if row is not None])
+
+
+def _fetch_symbol_range(symbol, start_date, end_date):
+    """Fetch all of one symbol's daily OHLCV rows between two dates in a single request."""
+    symbol_clean = symbol.replace('.NS', '')
+
+    df = equity_history(symbol_clean, "EQ", start_date.strftime('%d-%m-%Y'), end_date.strftime('%d-%m-%Y'))
+
+    if df.empty:
+        print(f"No data for {symbol_clean} between {start_date.strftime('%Y-%m-%d')} and {end_date.strftime('%Y-%m-%d')}")
+        return None
+
+    return pd.DataFrame({
+        'Symbol': symbol_clean,
+        'Date': pd.to_datetime(df['CH_TIMESTAMP']).dt.strftime('%Y-%m-%d'),
+        'Open': df['CH_OPENING_PRICE'].astype(float),
+        'High': df['CH_TRADE_HIGH_PRICE'].astype(float),
+        'Low': df['CH_TRADE_LOW_PRICE'].astype(float),
+        'Close': df['CH_CLOSING_PRICE'].astype(float),
+        'Volume': df['CH_TOT_TRADED_QTY'].astype('int64')
+    })
+
+
+def fetch_ohlcv_range(symbols, start_date, end_date, workers=1, rate=2.0, retries=3):
+    """Fetch OHLCV rows for every trading day in [start_date, end_date], one request per symbol.
+
+    Returns:
+        tuple: (DataFrame of rows, dict mapping each symbol that failed after retries to its exception).
+    """
+    results, failures = fetch_concurrent(
+        symbols, lambda symbol: _fetch_symbol_range(symbol, start_date, end_date),
+        workers=workers, rate=rate, retries=retries, source='nse'
+    )
+    for symbol, e in failures.items():
+        print(f"nsepython failed for {symbol}: {e}")
 
-    return pd.DataFrame(data_list)
+    frames = [df for df in results if df is not None]
+    if not frames:
+        return pd.DataFrame(), failures
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset=['Symbol', 'Date']), failures
 
 
-def fetch_stock_data(date_input: str) -> pd.DataFrame:
+def fetch_stock_data(date_input: str, workers: int = 1, resume: bool = True) -> pd.DataFrame:
     """
     Fetches end-of-day OHLCV data for top 75 mid-cap and small-cap NSE stocks on the given date,
     sorts by volume, saves to CSV in "Stock Files" folder, and returns the combined DataFrame.
+    Per-symbol results are checkpointed under Fetch Cache, so with resume=True an
+    interrupted run only fetches the symbols still outstanding.
+    Pass workers > 1 to fetch symbols concurrently under the shared rate limiter.
+    Weekends and NSE holidays (see trading_calendar) get an empty file without any requests.
     """
     output_dir = "Stock Files"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
 
     try:
         target_date = datetime.datetime.strptime(date_input, '%Y-%m-%d')
     except ValueError:
         raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-17).")
 
-    print(f"\nFetching data for {target_date.strftime('%Y-%m-%d')}...")
+    if skip_non_trading_day(target_date, output_dir):
+        return pd.DataFrame()
 
-    mid_symbols = [
-        'ADANIENT.NS', 'APOLLOHOSP.NS', 'VBL.NS', 'PAGEIND.NS', 'PERSISTENT.NS', 'ABB.NS', 'AUBANK.NS', 'GODREJCP.NS',
-        'POLICYBZR.NS', 'INDUSINDBK.NS', 'CUMMINSIND.NS', 'DIXON.NS', 'HAVELLS.NS', 'AMBUJACEM.NS', 'PIDILITIND.NS', 'TORNTPOWER.NS',
-        'LUPIN.NS', 'BHEL.NS', 'ABBOTINDIA.NS', 'TATACHEM.NS', 'ESCORTS.NS', 'MUTHOOTFIN.NS', 'DABUR.NS', 
-        'CHOLAFIN.NS', 'COLPAL.NS', 'MPHASIS.NS', 'TATAELXSI.NS', 'BIOCON.NS', 'SUNDARMFIN.NS', 'KPIL.NS',
-        'TRENT.NS', 'LICI.NS', 'TATACOMM.NS', 'GAIL.NS', 'JINDALSTEL.NS', 'NAUKRI.NS', 'LTF.NS', 'KPITTECH.NS',
-        'OFSS.NS', 'JUBLFOOD.NS', 'SYNGENE.NS', 'ZYDUSLIFE.NS', 'ALKEM.NS', 'HDFCAMC.NS', 'MAZDOCK.NS', 'MAXHEALTH.NS', 'POLYCAB.NS',
-        'MANKIND.NS', 'WAAREEENER.NS', 'UNIONBANK.NS', 'GMRAIRPORT.NS', 'INDUSTOWER.NS', 'MARICO.NS', 'INDIANB.NS', 'BSE.NS',
-        'NHPC.NS', 'NTPCGREEN.NS', 'SRF.NS', 'BHARTIHEXA.NS', 'SBICARD.NS', 'ASHOKLEY.NS', 'PAYTM.NS', 'UNOMINDA.NS',
-        'ABCAPITAL.NS', 'RVNL.NS', 'FORTIS.NS', 'VOLTAS.NS', 'PRESTIGE.NS', 'NYKAA.NS', 'LLOYDSME.NS'
-    ]
-
-    small_symbols = [
-        'IDBI.NS', 'IOB.NS', 'FACT.NS', 'GODFRYPHLP.NS', 'AIIL.NS', 'KAYNES.NS', 'MCX.NS', 'RADICO.NS', 'UCOBANK.NS',
-        'SUVEN.NS', 'CHOLAHLDNG.NS', 'NH.NS', 'POONAWALLA.NS', 'DELHIVERY.NS', 'CENTRALBK.NS', 'CDSL.NS', 'GODIGIT.NS', 'GILLETTE.NS',
-        'ASTERDM.NS', 'ITI.NS', 'AFFLE.NS', 'GRSE.NS', 'KIMS.NS', 'NBCC.NS', 'SUMICHEM.NS', 'AEGISLOG.NS', 'AMBER.NS', 'HINDCOPPER.NS',
-        'LALPATHLAB.NS', 'PPLPHARMA.NS', 'JBCHEPHARM.NS', 'FSL.NS', 'INOXWIND.NS', 'ZFCVINDIA.NS', 'EMCURE.NS', 'TATACHEM.NS',
-        'SHYAMMETL.NS', 'NAVINFLUOR.NS', 'ANANDRATHI.NS', 'EIHOTEL.NS', 'WOCKPHARMA.NS', 'RAMCOCEM.NS', 'MANAPPURAM.NS', 
-        'VSTIND.NS', 'RAJESHEXPO.NS', 'IRCON.NS', 'BEML.NS', 'IRCTC.NS', 'HUDCO.NS', 'HAL.NS', 'SAIL.NS', 'BEL.NS',
-        'COFORGE.NS', 'KPIGREEN.NS', 'CROMPTON.NS', 'THERMAX.NS', 'ASTRAL.NS', 'METROPOLIS.NS', 'SJVN.NS', 'IRB.NS', 'RBLBANK.NS',
-        'INDIAMART.NS', 'DEEPAKNTR.NS', 'LMW.NS', 'CREDITACC.NS', 'NAVA.NS', 'KEI.NS', 'OBEROIRLTY.NS', 'RATNAMANI.NS'
-    ]
+    print(f"\nFetching data for {target_date.strftime('%Y-%m-%d')}...")
 
     all_categories = [
-        ('Mid Cap', mid_symbols),
-        ('Small Cap', small_symbols)
+        ('Mid Cap', MID_SYMBOLS),
+        ('Small Cap', SMALL_SYMBOLS)
     ]
 
-    combined_df = pd.DataFrame()
+    checkpoint = FetchCheckpoint(target_date.strftime('%Y-%m-%d'), 'nse') if resume else None
+    category_frames = []
 
     for category, symbols in all_categories:
         print(f"\nProcessing {category} ({len(symbols)} symbols)...")
-        df = fetch_ohlcv(symbols, target_date)
+        df = fetch_ohlcv(symbols, target_date, workers=workers, checkpoint=checkpoint)
         if df.empty:
             print(f"No data available for {category} on {target_date.strftime('%Y-%m-%d')}.")
             continue
-        df = df.sort_values('Volume', ascending=False).head(75)
-        df['Category'] = category
-        combined_df = pd.concat([combined_df, df], ignore_index=True)
+        category_frames.append((category, df))
 
-        print(f"Fetched {len(df)} stocks for {category}")
+        print(f"Fetched {min(len(df), 75)} stocks for {category}")
 
-    combined_df = combined_df.drop_duplicates(subset=['Symbol', 'Date'])
+    if checkpoint is not None:
+        print(outstanding_report(checkpoint, list(dict.fromkeys(MID_SYMBOLS + SMALL_SYMBOLS))))
 
-    output_file = os.path.join(output_dir, f"{target_date.strftime('%Y-%m-%d')}.csv")
-    if not combined_df.empty:
-        combined_df.to_csv(output_file, index=False)
-        print(f"\nSaved {len(combined_df)} rows to {output_file}")
-        print("\nSample data:")
-        print(combined_df.head())
-    else:
-        empty_df = pd.DataFrame(columns=['Symbol', 'Category', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-        empty_df.to_csv(output_file, index=False)
-        print(f"No data for {target_date.strftime('%Y-%m-%d')} (non-trading day?). Created empty {output_file}.")
+    combined_df = combine_categories(category_frames)
+    write_stock_file(combined_df, target_date, output_dir)
 
     return combined_df
 
 
+def backfill_stock_data(start_input: str, end_input: str, workers: int = 1) -> list:
+    """
+    Rebuilds Stock Files for every weekday between start_input and end_input (inclusive)
+    that has no CSV yet. Each symbol's history is fetched once for the whole missing span
+    and split into per-day files in one pass. Trading days left incomplete by failed
+    symbols get no file, so a re-run retries them.
+
+    Returns:
+        list: Dates (YYYY-MM-DD) whose files were written.
+    """
+    output_dir = "Stock Files"
+
+    try:
+        start_date = datetime.datetime.strptime(start_input, '%Y-%m-%d')
+        end_date = datetime.datetime.strptime(end_input, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-17).")
+    if start_date > end_date:
+        raise ValueError("Start date must not be after end date.")
+
+    days = missing_stock_days(start_date, end_date, output_dir)
+    if not days:
+        print(f"Stock Files already exist for every weekday from {start_input} to {end_input}.")
+        return []
+
+    print(f"\nBackfilling {len(days)} days from {days[0].strftime('%Y-%m-%d')} to {days[-1].strftime('%Y-%m-%d')}...")
+
+    symbols = list(dict.fromkeys(MID_SYMBOLS + SMALL_SYMBOLS))
+    history, failures = fetch_ohlcv_range(symbols, days[0], days[-1], workers=workers)
+
+    category_frames = []
+    if not history.empty:
+        for category, category_symbols in [('Mid Cap', MID_SYMBOLS), ('Small Cap', SMALL_SYMBOLS)]:
+            wanted = [symbol.replace('.NS', '') for symbol in category_symbols]
+            category_frames.append((category, history[history['Symbol'].isin(wanted)]))
+
+    return write_stock_days(combine_categories(category_frames), days, output_dir, failed=list(failures))
+
+
 if __name__ == "__main__":
     date_input = input("Enter the date (YYYY-MM-DD): ").strip()
     df = fetch_stock_data(date_input)
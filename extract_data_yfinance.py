@@ -1,123 +1,268 @@
 import pandas as pd
 import datetime
 from datetime import timedelta
-from tqdm import tqdm
-import time
 import os
 import warnings
 import yfinance as yf
+from fetch_engine import fetch_concurrent
+from fetch_cache import FetchCheckpoint, outstanding_report
+from universe import UNIVERSE
+from stock_files import combine_categories, missing_stock_days, skip_non_trading_day, write_stock_days, write_stock_file
 
 warnings.filterwarnings('ignore')
 
+BATCH_SIZE = 50  # tickers per yf.download call in batched mode
 
-def fetch_ohlcv(symbols, target_date):
-    """Fetch OHLCV data for symbols on the target date using yfinance."""
+
+MID_SYMBOLS = UNIVERSE.tickers('Mid Cap', source='yfinance')
+SMALL_SYMBOLS = UNIVERSE.tickers('Small Cap', source='yfinance')
+
+
+def _fetch_symbol(symbol, target_date):
+    """Fetch one symbol's OHLCV row for the target date, or None if yfinance has no data."""
     start = target_date.strftime('%Y-%m-%d')
     end = (target_date + timedelta(days=1)).strftime('%Y-%m-%d')  # yfinance needs next day for daily data
 
-    data_list = []
-
-    for symbol in tqdm(symbols, desc="Fetching OHLCV"):
-        try:
-            df = yf.download(symbol, start=start, end=end, progress=False, interval="1d")
-
-            if df.empty:
-                print(f"No data for {symbol} on {target_date.strftime('%Y-%m-%d')}")
-                continue
-
-            row = df.iloc[0]
-            data_list.append({
-                'Symbol': symbol.replace('.NS', ''),
-                'Date': target_date.strftime('%Y-%m-%d'),
-                'Open': float(row['Open']),
-                'High': float(row['High']),
-                'Low': float(row['Low']),
-                'Close': float(row['Close']),
-                'Volume': int(row['Volume'])
-            })
-
-            time.sleep(0.2)  # polite delay
-        except Exception as e:
-            print(f"yfinance failed for {symbol}: {e}")
-            continue
+    df = yf.download(symbol, start=start, end=end, progress=False, interval="1d")
+
+    if df.empty:
+        print(f"No data for {symbol} on {target_date.strftime('%Y-%m-%d')}")
+        return None
+
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    row = df.iloc[0]
+    return {
+        'Symbol': symbol.replace('.NS', ''),
+        'Date': target_date.strftime('%Y-%m-%d'),
+        'Open': float(row['Open']),
+        'High': float(row['High']),
+        'Low': float(row['Low']),
+        'Close': float(row['Close']),
+        'Volume': int(row['Volume'])
+    }
+
+
+def fetch_ohlcv(symbols, target_date, workers=1, rate=5.0, retries=3, checkpoint=None):
+    """Fetch OHLCV data for symbols on the target date using yfinance.
+
+    Symbols are fetched by `workers` threads (one by default) behind a shared token
+    bucket of `rate` requests per second, retrying each symbol up to `retries`
+    times with jittered backoff. Rows keep the order of `symbols`.
+    With a FetchCheckpoint, symbols it already holds are not fetched again and
+    each new result is checkpointed as soon as it arrives.
+    """
+    pending = symbols if checkpoint is None else checkpoint.outstanding(symbols)
+    results, failures = fetch_concurrent(
+        pending, lambda symbol: _fetch_symbol(symbol, target_date),
+        workers=workers, rate=rate, retries=retries,
+        on_result=checkpoint.record if checkpoint is not None else None, source='yfinance'
+    )
+    for symbol, e in failures.items():
+        print(f"yfinance failed for {symbol}: {e}")
+
+    if checkpoint is not None:
+        return pd.DataFrame(checkpoint.rows(symbols))
+    return pd.DataFrame([row for row in results if row is not None])
+
+
+def _fetch_symbol_range(symbol, start_date, end_date):
+    """Fetch all of one symbol's daily OHLCV rows between two dates in a single download."""
+    start = start_date.strftime('%Y-%m-%d')
+    end = (end_date + timedelta(days=1)).strftime('%Y-%m-%d')  # end is exclusive in yfinance
+
+    df = yf.download(symbol, start=start, end=end, progress=False, interval="1d")
 
-    return pd.DataFrame(data_list)
+    if df.empty:
+        print(f"No data for {symbol} between {start} and {end_date.strftime('%Y-%m-%d')}")
+        return None
 
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return pd.DataFrame({
+        'Symbol': symbol.replace('.NS', ''),
+        'Date': df.index.strftime('%Y-%m-%d'),
+        'Open': df['Open'].astype(float).values,
+        'High': df['High'].astype(float).values,
+        'Low': df['Low'].astype(float).values,
+        'Close': df['Close'].astype(float).values,
+        'Volume': df['Volume'].astype('int64').values
+    })
 
-def fetch_stock_data(date_input: str) -> pd.DataFrame:
+
+def fetch_ohlcv_range(symbols, start_date, end_date, workers=1, rate=5.0, retries=3):
+    """Fetch OHLCV rows for every trading day in [start_date, end_date], one request per symbol.
+
+    Returns:
+        tuple: (DataFrame of rows, dict mapping each symbol that failed after retries to its exception).
+    """
+    results, failures = fetch_concurrent(
+        symbols, lambda symbol: _fetch_symbol_range(symbol, start_date, end_date),
+        workers=workers, rate=rate, retries=retries, source='yfinance'
+    )
+    for symbol, e in failures.items():
+        print(f"yfinance failed for {symbol}: {e}")
+
+    frames = [df for df in results if df is not None]
+    if not frames:
+        return pd.DataFrame(), failures
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset=['Symbol', 'Date']), failures
+
+
+def _download_batch(tickers, start, end):
+    """Downloads one chunk of tickers in a single threaded request and returns long OHLCV rows."""
+    df = yf.download(list(tickers), start=start, end=end, progress=False, interval="1d",
+                     group_by='ticker', threads=True)
+    if df.empty:
+        return pd.DataFrame()
+
+    long_df = df.stack(level=0).reset_index()
+    long_df.columns = ['Date', 'Ticker'] + list(long_df.columns[2:])
+    return long_df.dropna(subset=['Close'])
+
+
+def fetch_ohlcv_batched(symbols, start_date, end_date=None, chunk_size=BATCH_SIZE, retries=3):
+    """Fetch OHLCV rows for symbols between two dates with one yf.download call per chunk.
+
+    Returns long rows (Symbol, Date, Open, High, Low, Close, Volume) ordered by date and
+    then by the position of the symbol in `symbols`, matching the per-ticker path.
+
+    Returns:
+        tuple: (DataFrame of rows, dict mapping each symbol of a chunk that failed after retries to its exception).
+    """
+    end_date = end_date or start_date
+    start = start_date.strftime('%Y-%m-%d')
+    end = (end_date + timedelta(days=1)).strftime('%Y-%m-%d')  # end is exclusive in yfinance
+
+    symbols = list(dict.fromkeys(symbols))
+    chunks = [tuple(symbols[i:i + chunk_size]) for i in range(0, len(symbols), chunk_size)]
+    results, failures = fetch_concurrent(
+        chunks, lambda tickers: _download_batch(tickers, start, end),
+        workers=1, rate=1.0, retries=retries, desc="Fetching OHLCV batches", source='yfinance_batch'
+    )
+    for tickers, e in failures.items():
+        print(f"yfinance failed for {', '.join(tickers)}: {e}")
+    failures = {symbol: e for tickers, e in failures.items() for symbol in tickers}
+
+    frames = [df for df in results if df is not None and not df.empty]
+    if not frames:
+        return pd.DataFrame(), failures
+    long_df = pd.concat(frames, ignore_index=True)
+
+    for symbol in sorted(set(symbols) - set(long_df['Ticker']) - set(failures)):
+        print(f"No data for {symbol} between {start} and {end_date.strftime('%Y-%m-%d')}")
+
+    order = pd.Categorical(long_df['Ticker'], categories=symbols, ordered=True)
+    long_df = long_df.assign(_order=order.codes).sort_values(['Date', '_order'], kind='stable')
+    return pd.DataFrame({
+        'Symbol': long_df['Ticker'].str.replace('.NS', '', regex=False).values,
+        'Date': pd.to_datetime(long_df['Date']).dt.strftime('%Y-%m-%d').values,
+        'Open': long_df['Open'].astype(float).values,
+        'High': long_df['High'].astype(float).values,
+        'Low': long_df['Low'].astype(float).values,
+        'Close': long_df['Close'].astype(float).values,
+        'Volume': long_df['Volume'].astype('int64').values
+    }), failures
+
+
+def fetch_stock_data(date_input: str, workers: int = 1, batched: bool = False, resume: bool = True) -> pd.DataFrame:
     """
     Fetches end-of-day OHLCV data for top 75 mid-cap and small-cap NSE stocks on the given date,
     sorts by volume, saves to CSV in "Stock Files" folder, and returns the combined DataFrame.
+    Per-symbol results are checkpointed under Fetch Cache, so with resume=True an
+    interrupted run only fetches the symbols still outstanding.
+    Pass workers > 1 to fetch symbols concurrently under the shared rate limiter, or
+    batched=True to download the whole list in a few multi-ticker calls.
     """
     output_dir = "Stock Files"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
 
     try:
         target_date = datetime.datetime.strptime(date_input, '%Y-%m-%d')
     except ValueError:
         raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-17).")
 
-    print(f"\nFetching data for {target_date.strftime('%Y-%m-%d')}...")
-
-    mid_symbols = [
-        'ADANIENT.NS', 'APOLLOHOSP.NS', 'VBL.NS', 'PERSISTENT.NS', 'ABB.NS', 'AUBANK.NS', 'GODREJCP.NS',
-        'POLICYBZR.NS', 'INDUSINDBK.NS', 'CUMMINSIND.NS', 'HAVELLS.NS', 'AMBUJACEM.NS', 'PIDILITIND.NS', 'TORNTPOWER.NS',
-        'LUPIN.NS', 'BHEL.NS', 'TATACHEM.NS', 'ESCORTS.NS', 'MUTHOOTFIN.NS', 'DABUR.NS',
-        'CHOLAFIN.NS', 'COLPAL.NS', 'MPHASIS.NS', 'TATAELXSI.NS', 'BIOCON.NS', 'SUNDARMFIN.NS', 'KPIL.NS',
-        'TRENT.NS', 'LICI.NS', 'TATACOMM.NS', 'GAIL.NS', 'JINDALSTEL.NS', 'NAUKRI.NS', 'LTF.NS', 'KPITTECH.NS',
-        'OFSS.NS', 'JUBLFOOD.NS', 'SYNGENE.NS', 'ZYDUSLIFE.NS', 'ALKEM.NS', 'HDFCAMC.NS', 'MAZDOCK.NS', 'MAXHEALTH.NS', 'POLYCAB.NS',
-        'MANKIND.NS', 'WAAREEENER.NS', 'UNIONBANK.NS', 'GMRAIRPORT.NS', 'INDUSTOWER.NS', 'MARICO.NS', 'INDIANB.NS', 'BSE.NS',
-        'NHPC.NS', 'NTPCGREEN.NS', 'SRF.NS', 'BHARTIHEXA.NS', 'SBICARD.NS', 'ASHOKLEY.NS', 'PAYTM.NS', 'UNOMINDA.NS',
-        'ABCAPITAL.NS', 'RVNL.NS', 'FORTIS.NS', 'VOLTAS.NS', 'PRESTIGE.NS', 'NYKAA.NS', 'LLOYDSME.NS'
-    ]
+    if skip_non_trading_day(target_date, output_dir):
+        return pd.DataFrame()
 
-    small_symbols = [
-        'IDBI.NS', 'IOB.NS', 'FACT.NS', 'GODFRYPHLP.NS', 'KAYNES.NS', 'MCX.NS', 'RADICO.NS', 'UCOBANK.NS',
-        'SUVEN.NS', 'CHOLAHLDNG.NS', 'NH.NS', 'POONAWALLA.NS', 'DELHIVERY.NS', 'CENTRALBK.NS', 'CDSL.NS', 'GODIGIT.NS',
-        'ASTERDM.NS', 'ITI.NS', 'AFFLE.NS', 'GRSE.NS', 'KIMS.NS', 'NBCC.NS', 'SUMICHEM.NS', 'AEGISLOG.NS', 'AMBER.NS', 'HINDCOPPER.NS',
-        'LALPATHLAB.NS', 'PPLPHARMA.NS', 'JBCHEPHARM.NS', 'FSL.NS', 'INOXWIND.NS',  'EMCURE.NS', 'TATACHEM.NS',
-        'SHYAMMETL.NS', 'NAVINFLUOR.NS', 'ANANDRATHI.NS', 'EIHOTEL.NS', 'WOCKPHARMA.NS', 'RAMCOCEM.NS', 'MANAPPURAM.NS',
-        'VSTIND.NS', 'RAJESHEXPO.NS', 'IRCON.NS', 'BEML.NS', 'IRCTC.NS', 'HUDCO.NS', 'HAL.NS', 'SAIL.NS', 'BEL.NS',
-        'COFORGE.NS', 'KPIGREEN.NS', 'CROMPTON.NS', 'THERMAX.NS', 'ASTRAL.NS', 'METROPOLIS.NS', 'SJVN.NS', 'IRB.NS', 'RBLBANK.NS',
-        'INDIAMART.NS', 'DEEPAKNTR.NS', 'CREDITACC.NS', 'NAVA.NS', 'KEI.NS', 'OBEROIRLTY.NS', 'RATNAMANI.NS'
-    ]
+    print(f"\nFetching data for {target_date.strftime('%Y-%m-%d')}...")
 
     all_categories = [
-        ('Mid Cap', mid_symbols),
-        ('Small Cap', small_symbols)
+        ('Mid Cap', MID_SYMBOLS),
+        ('Small Cap', SMALL_SYMBOLS)
     ]
 
-    combined_df = pd.DataFrame()
+    checkpoint = FetchCheckpoint(target_date.strftime('%Y-%m-%d'), 'yfinance') if resume and not batched else None
+    category_frames = []
+
+    if batched:
+        print(f"\nDownloading {len(set(MID_SYMBOLS + SMALL_SYMBOLS))} symbols in batches of {BATCH_SIZE}...")
+        batch_df, _ = fetch_ohlcv_batched(MID_SYMBOLS + SMALL_SYMBOLS, target_date)
 
     for category, symbols in all_categories:
         print(f"\nProcessing {category} ({len(symbols)} symbols)...")
-        df = fetch_ohlcv(symbols, target_date)
+        if batched:
+            wanted = [symbol.replace('.NS', '') for symbol in symbols]
+            df = batch_df[batch_df['Symbol'].isin(wanted)] if not batch_df.empty else batch_df
+        else:
+            df = fetch_ohlcv(symbols, target_date, workers=workers, checkpoint=checkpoint)
         if df.empty:
             print(f"No data available for {category} on {target_date.strftime('%Y-%m-%d')}.")
             continue
-        df = df.sort_values('Volume', ascending=False).head(75)
-        df['Category'] = category
-        combined_df = pd.concat([combined_df, df], ignore_index=True)
+        category_frames.append((category, df))
 
-        print(f"Fetched {len(df)} stocks for {category}")
+        print(f"Fetched {min(len(df), 75)} stocks for {category}")
 
-    combined_df = combined_df.drop_duplicates(subset=['Symbol', 'Date'])
+    if checkpoint is not None:
+        print(outstanding_report(checkpoint, list(dict.fromkeys(MID_SYMBOLS + SMALL_SYMBOLS))))
 
-    output_file = os.path.join(output_dir, f"{target_date.strftime('%Y-%m-%d')}.csv")
-    if not combined_df.empty:
-        combined_df.to_csv(output_file, index=False)
-        print(f"\nSaved {len(combined_df)} rows to {output_file}")
-        print("\nSample data:")
-        print(combined_df.head())
-    else:
-        empty_df = pd.DataFrame(columns=['Symbol', 'Category', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-        empty_df.to_csv(output_file, index=False)
-        print(f"No data for {target_date.strftime('%Y-%m-%d')} (non-trading day?). Created empty {output_file}.")
+    combined_df = combine_categories(category_frames)
+    write_stock_file(combined_df, target_date, output_dir)
 
     return combined_df
 
 
+def backfill_stock_data(start_input: str, end_input: str, workers: int = 1, batched: bool = False) -> list:
+    """
+    Rebuilds Stock Files for every weekday between start_input and end_input (inclusive)
+    that has no CSV yet. Each symbol's history is fetched once for the whole missing span
+    (or in multi-ticker chunks with batched=True) and split into per-day files in one pass.
+    Trading days left incomplete by failed symbols get no file, so a re-run retries them.
+
+    Returns:
+        list: Dates (YYYY-MM-DD) whose files were written.
+    """
+    output_dir = "Stock Files"
+
+    try:
+        start_date = datetime.datetime.strptime(start_input, '%Y-%m-%d')
+        end_date = datetime.datetime.strptime(end_input, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-17).")
+    if start_date > end_date:
+        raise ValueError("Start date must not be after end date.")
+
+    days = missing_stock_days(start_date, end_date, output_dir)
+    if not days:
+        print(f"Stock Files already exist for every weekday from {start_input} to {end_input}.")
+        return []
+
+    print(f"\nBackfilling {len(days)} days from {days[0].strftime('%Y-%m-%d')} to {days[-1].strftime('%Y-%m-%d')}...")
+
+    symbols = list(dict.fromkeys(MID_SYMBOLS + SMALL_SYMBOLS))
+    if batched:
+        history, failures = fetch_ohlcv_batched(symbols, days[0], days[-1])
+    else:
+        history, failures = fetch_ohlcv_range(symbols, days[0], days[-1], workers=workers)
+
+    category_frames = []
+    if not history.empty:
+        for category, category_symbols in [('Mid Cap', MID_SYMBOLS), ('Small Cap', SMALL_SYMBOLS)]:
+            wanted = [symbol.replace('.NS', '') for symbol in category_symbols]
+            category_frames.append((category, history[history['Symbol'].isin(wanted)]))
+
+    return write_stock_days(combine_categories(category_frames), days, output_dir, failed=list(failures))
+
+
 if __name__ == "__main__":
     date_input = input("Enter the date (YYYY-MM-DD): ").strip()
     df = fetch_stock_data(date_input)
@@ -0,0 +1,224 @@
+import os
+import json
+import warnings
+import numpy as np
+import pandas as pd
+from universe import UNIVERSE
+from market_store import load_stock_days, stock_day_exists
+
+FEATURE_DIR = "Features"
+WINDOW = 252                      # sessions kept per symbol (52 weeks)
+ATR_PERIOD = 14
+FEATURE_COLUMNS = ['Ret1', 'Ret5', 'Ret20', 'ATR14', 'ATRPct', 'VolZ20', 'SMA20Dist', 'SMA50Dist',
+                   'High52Dist', 'Low52Dist']
+
+
+class FeatureStore:
+    """Rolling per-symbol technical indicators, updated one session at a time.
+
+    State lives in Features/state.npz as dense (session ring x universe ID) arrays
+    of the last WINDOW closes, highs, lows and volumes plus each symbol's Wilder
+    ATR. Adding a session writes one ring row and reads fixed-length windows,
+    so the work per day depends only on the number of symbols, never on the
+    length of the history. Each session's features are saved to
+    Features/<date>.csv (percentages for returns and distances).
+
+    Symbols missing from a day's Stock Files (they fell out of the top 75) get a
+    NaN for that session; windows ignore NaNs and returns need both closes.
+    Rewriting a day already added (a re-fetch, a backfill before the history)
+    goes through sync(), which rebuilds the history from the earliest changed day.
+    """
+
+    def __init__(self, root: str = FEATURE_DIR):
+        self.root = root
+        self.state_file = os.path.join(root, 'state.npz')
+        self.meta_file = os.path.join(root, 'state.json')
+        self._reset()
+        if os.path.exists(self.state_file) and os.path.exists(self.meta_file):
+            self._load()
+
+    def _reset(self) -> None:
+        n = len(UNIVERSE)
+        self.close = np.full((WINDOW, n), np.nan)
+        self.high = np.full((WINDOW, n), np.nan)
+        self.low = np.full((WINDOW, n), np.nan)
+        self.volume = np.full((WINDOW, n), np.nan)
+        self.atr = np.full(n, np.nan)
+        self.last_close = np.full(n, np.nan)
+        self.sessions = 0
+        self.first_date = None
+        self.last_date = None
+
+    def exists(self) -> bool:
+        return self.last_date is not None
+
+    def _load(self) -> None:
+        with open(self.meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.sessions = meta['sessions']
+        self.first_date = meta.get('first_date')
+        self.last_date = meta['last_date']
+        state = np.load(self.state_file)
+        n = len(UNIVERSE)
+        for name in ['close', 'high', 'low', 'volume']:
+            saved = state[name]
+            grown = np.full((WINDOW, n), np.nan)
+            grown[:, :saved.shape[1]] = saved          # universe IDs only ever get appended
+            setattr(self, name, grown)
+        for name in ['atr', 'last_close']:
+            saved = state[name]
+            grown = np.full(n, np.nan)
+            grown[:saved.shape[0]] = saved
+            setattr(self, name, grown)
+
+    def save(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_state = os.path.join(self.root, 'state.tmp.npz')
+        np.savez(tmp_state, close=self.close, high=self.high, low=self.low, volume=self.volume,
+                 atr=self.atr, last_close=self.last_close)
+        os.replace(tmp_state, self.state_file)
+        tmp_meta = self.meta_file + '.tmp'
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({'sessions': self.sessions, 'first_date': self.first_date, 'last_date': self.last_date}, f)
+        os.replace(tmp_meta, self.meta_file)
+
+    def _window(self, ring: np.ndarray, length: int) -> np.ndarray:
+        """Rows of the last `length` sessions (oldest first)."""
+        rows = (self.sessions - length + np.arange(length)) % WINDOW
+        return ring[rows]
+
+    def _ago(self, ring: np.ndarray, sessions_ago: int) -> np.ndarray:
+        if sessions_ago >= min(self.sessions, WINDOW):
+            return np.full(ring.shape[1], np.nan)
+        return ring[(self.sessions - 1 - sessions_ago) % WINDOW]
+
+    def update(self, date_str: str, stock_df: pd.DataFrame) -> pd.DataFrame:
+        """Adds one session's OHLCV and returns (and saves) that day's features.
+
+        Raises:
+            ValueError: If date_str is not after the last session already added.
+        """
+        if self.last_date is not None and date_str <= self.last_date:
+            raise ValueError(f"Feature store is already at {self.last_date}; sessions must be added in order.")
+
+        day = stock_df.dropna(subset=['Symbol']).drop_duplicates(subset='Symbol')
+        ids = UNIVERSE.ids(day['Symbol'])
+        known = ids >= 0
+        ids = ids[known]
+
+        row = self.sessions % WINDOW
+        for ring, column in [(self.close, 'Close'), (self.high, 'High'), (self.low, 'Low'), (self.volume, 'Volume')]:
+            ring[row] = np.nan
+            ring[row, ids] = day[column].to_numpy(dtype=float)[known]
+        self.sessions += 1
+        self.first_date = self.first_date or date_str
+        self.last_date = date_str
+
+        close, high, low = self.close[row], self.high[row], self.low[row]
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - self.last_close), np.abs(low - self.last_close)))
+        seeded = ~np.isnan(self.atr)
+        self.atr = np.where(np.isnan(true_range), self.atr,
+                            np.where(seeded, (self.atr * (ATR_PERIOD - 1) + true_range) / ATR_PERIOD, true_range))
+        self.last_close = np.where(np.isnan(close), self.last_close, close)
+
+        # Symbols absent from every session of a window give all-NaN slices; their features are NaN
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            volumes = self._window(self.volume, min(20, self.sessions))
+            vol_mean = np.nanmean(volumes, axis=0)
+            vol_std = np.nanstd(volumes, axis=0)
+            features = {
+                'Ret1': (close / self._ago(self.close, 1) - 1) * 100,
+                'Ret5': (close / self._ago(self.close, 5) - 1) * 100,
+                'Ret20': (close / self._ago(self.close, 20) - 1) * 100,
+                'ATR14': self.atr,
+                'ATRPct': self.atr / close * 100,
+                'VolZ20': np.where(vol_std > 0, (self.volume[row] - vol_mean) / vol_std, np.nan),
+                'SMA20Dist': (close / np.nanmean(self._window(self.close, min(20, self.sessions)), axis=0) - 1) * 100,
+                'SMA50Dist': (close / np.nanmean(self._window(self.close, min(50, self.sessions)), axis=0) - 1) * 100,
+                'High52Dist': (close / np.nanmax(self._window(self.high, min(WINDOW, self.sessions)), axis=0) - 1) * 100,
+                'Low52Dist': (close / np.nanmin(self._window(self.low, min(WINDOW, self.sessions)), axis=0) - 1) * 100,
+            }
+
+        df = pd.DataFrame({'Symbol': UNIVERSE.symbols[ids]})
+        for column in FEATURE_COLUMNS:
+            df[column] = np.round(features[column][ids], 4)
+        os.makedirs(self.root, exist_ok=True)
+        df.to_csv(os.path.join(self.root, f"{date_str}.csv"), index=False)
+        self.save()
+        return df
+
+    def catch_up(self, end_date: str, start_date: str = None) -> list:
+        """Adds every stored trading session after the last one processed, up to end_date.
+
+        Holiday files (rows dated an earlier session) are skipped. Without a last
+        session, start_date (default: the first Stock Files date) begins the history.
+
+        Returns:
+            list: Dates added.
+        """
+        if self.last_date is not None:
+            start = pd.Timestamp(self.last_date) + pd.offsets.BDay(1)
+        elif start_date is not None:
+            start = pd.Timestamp(start_date)
+        else:
+            stock_dates = sorted(os.path.splitext(name)[0] for name in os.listdir("Stock Files") if name.endswith('.csv'))
+            start = pd.Timestamp(stock_dates[0]) if stock_dates else pd.Timestamp(end_date)
+        days = [day.strftime('%Y-%m-%d') for day in pd.bdate_range(start, end_date)]
+        days = [day for day in days if stock_day_exists(day)]
+
+        frames = load_stock_days(days)
+        added = []
+        for date_str in days:
+            df = frames[date_str]
+            if df.empty or not (df['Date'].astype(str) == date_str).any():
+                continue
+            self.update(date_str, df)
+            added.append(date_str)
+        return added
+
+    def sync(self, first_changed: str, last_changed: str = None) -> list:
+        """Brings the features up to date after the Stock Files of first_changed..last_changed were written.
+
+        Days after the last session are appended with catch_up(). A day at or before it
+        (a rewritten session, or a backfill before the history began) resets the state
+        and re-adds every session from the earliest of that day and the history's start,
+        since the ATR and the windows depend on every earlier session.
+
+        Returns:
+            list: Dates (re)added.
+        """
+        last_changed = last_changed or first_changed
+        if self.last_date is None:
+            return []
+        if first_changed > self.last_date:
+            return self.catch_up(last_changed)
+
+        saved = sorted(name[:-4] for name in os.listdir(self.root) if name.endswith('.csv'))
+        start = min([first_changed] + ([self.first_date] if self.first_date else saved[:1]))
+        end = max(last_changed, self.last_date)
+        for date_str in saved:
+            if date_str >= start:
+                os.remove(os.path.join(self.root, f"{date_str}.csv"))
+        self._reset()
+        self.save()
+        print(f"Rebuilding features from {start} to {end}...")
+        return self.catch_up(end, start_date=start)
+
+    def features(self, date_str: str) -> pd.DataFrame:
+        """Returns the saved features of one session.
+
+        Raises:
+            FileNotFoundError: If the session has not been added.
+        """
+        path = os.path.join(self.root, f"{date_str}.csv")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No features for {date_str}. Run FeatureStore().catch_up('{date_str}') first.")
+        return pd.read_csv(path)
+
+
+if __name__ == "__main__":
+    end_date = input("Enter the last date to add (YYYY-MM-DD): ").strip()
+    store = FeatureStore()
+    added = store.catch_up(end_date)
+    print(f"Added {len(added)} sessions to {FEATURE_DIR} (now at {store.last_date}).")
@@ -0,0 +1,79 @@
+import json
+import os
+import threading
+from trading_calendar import closed_reason
+
+CACHE_DIR = "Fetch Cache"
+
+
+class FetchCheckpoint:
+    """On-disk per-(symbol, date) fetch results for one source and date.
+
+    Every finished symbol is appended as one JSON line to
+    Fetch Cache/<source>/<date>.jsonl and flushed immediately, so an interrupted
+    run loses at most the symbol in flight. A symbol that returned no data is
+    recorded too, but stays outstanding unless the calendar says the market was
+    closed that day: an empty reply before NSE publishes the day's data, or from an
+    expired cookie, is retried by the next run. A symbol that raised is not recorded.
+    """
+
+    def __init__(self, date_str: str, source: str = 'nse', root: str = CACHE_DIR):
+        self.date_str = date_str
+        self.path = os.path.join(root, source, f"{date_str}.jsonl")
+        self._results = {}
+        self._lock = threading.Lock()
+        self._closed = closed_reason(date_str) is not None
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from an interrupted write
+                    self._results[entry['symbol']] = entry['row']
+
+    def done(self, symbol: str) -> bool:
+        """True if symbol has a row, or returned no data on a day the market was closed."""
+        if symbol not in self._results:
+            return False
+        return self._results[symbol] is not None or self._closed
+
+    def record(self, symbol: str, row) -> None:
+        """Checkpoints one symbol's result (a row dict, or None for no data)."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'symbol': symbol, 'row': row}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._results[symbol] = row
+
+    def rows(self, symbols) -> list:
+        """Returns the cached rows for `symbols` in the given order, skipping no-data and missing symbols."""
+        return [self._results[symbol] for symbol in symbols if self._results.get(symbol) is not None]
+
+    def outstanding(self, symbols) -> list:
+        """Returns the symbols that still need fetching (no final checkpointed result)."""
+        return [symbol for symbol in symbols if not self.done(symbol)]
+
+    def no_data(self, symbols) -> list:
+        """Returns the outstanding symbols whose last fetch returned no data."""
+        return [symbol for symbol in symbols if symbol in self._results and not self.done(symbol)]
+
+    def clear(self) -> None:
+        """Deletes the checkpoint file so the next run fetches every symbol again."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._results = {}
+
+
+def outstanding_report(checkpoint: FetchCheckpoint, symbols) -> str:
+    """Formats the list of symbols still missing from a checkpoint."""
+    missing = checkpoint.outstanding(symbols)
+    if not missing:
+        return f"All {len(symbols)} symbols fetched for {checkpoint.date_str}."
+    no_data = checkpoint.no_data(symbols)
+    note = f" ({len(no_data)} returned no data)" if no_data else ""
+    return (f"{len(missing)} of {len(symbols)} symbols still outstanding for {checkpoint.date_str}{note}: "
+            f"{', '.join(missing)}. Re-run to fetch only these.")
@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+from metrics import METRICS, timed_fetch
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all fetch workers.
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so short
+    bursts are allowed while the long-run request rate never exceeds `rate`.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Blocks until `tokens` are available, then consumes them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def fetch_concurrent(symbols, fetch_one, workers: int = 8, rate: float = 2.0, burst: float = None,
+                     retries: int = 3, backoff: float = 1.0, max_backoff: float = 30.0,
+                     limiter: TokenBucket = None, desc: str = "Fetching OHLCV", on_result=None,
+                     source: str = 'fetch'):
+    """Runs `fetch_one(symbol)` for every symbol on a thread pool behind a shared rate limiter.
+
+    Args:
+        symbols (list): Symbols to fetch.
+        fetch_one (callable): Fetches one symbol; returns a result (or None for no data) or raises.
+        workers (int): Number of worker threads.
+        rate (float): Requests per second allowed across all workers.
+        burst (float): Token bucket capacity (default: max(1, rate)).
+        retries (int): Extra attempts per symbol after the first failure.
+        backoff (float): Base delay in seconds for jittered exponential backoff.
+        max_backoff (float): Upper bound on a single backoff delay.
+        limiter (TokenBucket): Existing limiter to share with other calls (overrides rate/burst).
+        desc (str): tqdm progress bar label.
+        on_result (callable): Called as on_result(symbol, result) in the calling thread as each
+            symbol succeeds, e.g. to checkpoint progress.
+        source (str): Label for the per-symbol latency metrics (e.g. 'nse', 'yfinance').
+
+    Returns:
+        tuple: (results, failures) where results is a list aligned with `symbols`
+        (None for symbols with no data or that failed) and failures maps each
+        failed symbol to its last exception.
+    """
+    symbols = list(symbols)
+    limiter = limiter or TokenBucket(rate, burst)
+    results = [None] * len(symbols)
+    failures = {}
+
+    def run(symbol):
+        for attempt in range(retries + 1):
+            limiter.acquire()
+            try:
+                return timed_fetch(fetch_one, symbol, source)
+            except Exception:
+                if attempt == retries:
+                    raise
+                METRICS.count('fetch_retries_total', source=source)
+                time.sleep(backoff_delay(attempt, backoff, max_backoff))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(run, symbol): i for i, symbol in enumerate(symbols)}
+        for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                failures[symbols[i]] = e
+                METRICS.count('fetch_failures_total', source=source)
+                continue
+            if on_result is not None:
+                on_result(symbols[i], results[i])
+
+    return results, failures
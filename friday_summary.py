@@ -1,56 +1,56 @@
-import os
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
+from signal_index import SignalIndex
+from metrics import timed
+from trading_calendar import closed_reason, is_week_close, week_sessions
 
+@timed('friday_summary')
 def generate_weekly_string(friday_date: str) -> str:
-    """Generates a formatted string from the last 5 daily JSON responses (Monday to Friday).
+    """Generates a formatted string from the week's daily responses (Monday to Friday), read from the signal index.
+    
+    NSE holidays in the week are listed as market closed.
     
     Args:
-        friday_date (str): Friday's date in YYYY-MM-DD format.
+        friday_date (str): The week's last trading day (Friday, or Thursday when Friday is a holiday)
+            in YYYY-MM-DD format.
     
     Returns:
         str: Formatted weekly string.
     
     Raises:
-        ValueError: If date format is invalid or not Friday.
+        ValueError: If date format is invalid or not the week's last trading day.
         FileNotFoundError: If a JSON file is missing.
         json.JSONDecodeError: If JSON parsing fails.
     """
     try:
         target_date = datetime.strptime(friday_date, '%Y-%m-%d')
-        if target_date.weekday() != 4:
-            raise ValueError("Input date must be a Friday.")
+        if not is_week_close(target_date):
+            raise ValueError("Input date must be the week's last trading day (normally Friday).")
     except ValueError as e:
-        raise ValueError(f"Invalid date format or not Friday: {e}")
+        raise ValueError(f"Invalid date format or not the week's last trading day: {e}")
     
     weekly_str = ""
-    signals_dir = os.path.join("Grok Daily Reviews", "Weekdays")
-    for i in range(4, -1, -1):
-        past_date = (target_date - timedelta(days=i)).strftime('%Y-%m-%d')
+    index = SignalIndex()
+    for past_date in week_sessions(target_date, include_holidays=True):
         day_name = datetime.strptime(past_date, '%Y-%m-%d').strftime('%A')
-        found = False
-        for prompt_type in ['d', 'f']:
-            signal_file = os.path.join(signals_dir, f"{prompt_type}_{past_date}.json")
-            if os.path.exists(signal_file):
-                with open(signal_file, 'r', encoding='utf-8') as f:
-                    signal_data = json.load(f)
-                    text = signal_data['choices'][0]['message']['content']
-                    text = text.strip()
-                    if text.startswith('```json'):
-                        text = text[7:].rstrip('```').strip()
-                    signal_content = json.loads(text)
-                weekly_str += f"{day_name} Summary: {signal_content.get('daily_summary', 'No summary')}\n"
-                weekly_str += f"{day_name} Signals: {json.dumps(signal_content.get('top_signals', []))}\n\n"
-                found = True
-                break
-        if not found:
+        holiday = closed_reason(past_date)
+        if holiday is not None:
+            weekly_str += f"{day_name} Summary: Market closed ({holiday})\n"
+            weekly_str += f"{day_name} Signals: []\n\n"
+            continue
+        _, signal_content = index.first_content(past_date, ['d', 'f'])
+        if signal_content is not None:
+            weekly_str += f"{day_name} Summary: {signal_content.get('daily_summary', 'No summary')}\n"
+            weekly_str += f"{day_name} Signals: {json.dumps(signal_content.get('top_signals', []))}\n\n"
+        else:
             weekly_str += f"{day_name} Summary: No data\n"
             weekly_str += f"{day_name} Signals: []\n\n"
+    index.close()
     
     return weekly_str
 
 if __name__ == "__main__":
-    friday_date = input("Enter Friday's date (YYYY-MM-DD): ").strip()
+    friday_date = input("Enter Friday's date, or the week's last trading day (YYYY-MM-DD): ").strip()
     try:
         weekly_string = generate_weekly_string(friday_date)
         print(weekly_string)
@@ -0,0 +1,363 @@
+import time
+import threading
+import datetime
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+import extract_data
+import extract_data_yfinance
+from fetch_engine import TokenBucket, backoff_delay
+from fetch_cache import FetchCheckpoint, outstanding_report
+from metrics import METRICS, timed_fetch
+from universe import UNIVERSE
+from stock_files import combine_categories, skip_non_trading_day, write_stock_file
+
+HEDGE_AFTER = 2.0  # seconds before a slow request is hedged, until enough latencies are observed
+HEDGE_PERCENTILE = 95
+MIN_SAMPLES = 20
+TICK = 0.05  # seconds between checks for requests due a hedge
+
+
+class CircuitBreaker:
+    """Stops sending requests to a backend that keeps failing.
+
+    Closed until `threshold` consecutive requests raise, then open (no requests)
+    for `cooldown` seconds, then half-open: one trial request is let through,
+    and its outcome closes the breaker again or reopens it. A request that
+    returns, even with no data, counts as a success.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a request may be sent now (in half-open state, only the one trial request)."""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = 'half-open'
+            if self.state == 'closed':
+                return True
+            if self.state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial = False
+
+    def failure(self) -> bool:
+        """Records a failed request; returns True if this opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half-open' or (self.state == 'closed' and self.failures >= self.threshold):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._trial = False
+                return True
+            return False
+
+
+class Backend:
+    """One OHLCV source for the hedged fetcher.
+
+    Args:
+        name (str): Label written to the Source column (e.g. 'nse').
+        fetch_one (callable): symbol -> row dict, or None for no data; raises on failure.
+        rate (float): Requests per second allowed to this backend.
+        symbols (iterable): Tickers the backend serves (default: all).
+        breaker (CircuitBreaker): Breaker for this backend (default: a new one).
+    """
+
+    def __init__(self, name: str, fetch_one, rate: float, symbols=None, breaker: CircuitBreaker = None):
+        self.name = name
+        self.fetch_one = fetch_one
+        self.limiter = TokenBucket(rate)
+        self.symbols = set(symbols) if symbols is not None else None
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=500)
+
+    def serves(self, symbol: str) -> bool:
+        return self.symbols is None or symbol in self.symbols
+
+    def hedge_after(self, default: float = HEDGE_AFTER) -> float:
+        """The HEDGE_PERCENTILE of this backend's recent latencies (default until MIN_SAMPLES are in)."""
+        if len(self.latencies) < MIN_SAMPLES:
+            return default
+        return float(np.percentile(self.latencies, HEDGE_PERCENTILE))
+
+
+def default_backends(target_date) -> list:
+    """nsepython as the primary backend, with yfinance (for the symbols Yahoo serves) as the secondary."""
+    yahoo_symbols = [ticker for _, tickers in UNIVERSE.category_lists('yfinance') for ticker in tickers]
+    return [
+        Backend('nse', lambda symbol: extract_data._fetch_symbol(symbol, target_date), rate=2.0),
+        Backend('yfinance', lambda symbol: extract_data_yfinance._fetch_symbol(symbol, target_date), rate=5.0,
+                symbols=yahoo_symbols),
+    ]
+
+
+def valid_row(row, date_str: str) -> bool:
+    """True for a row of the requested date with positive, finite and consistent prices."""
+    if row is None or row.get('Date') != date_str:
+        return False
+    prices = [row.get(column) for column in ['Open', 'High', 'Low', 'Close']]
+    if any(price is None or not np.isfinite(price) or price <= 0 for price in prices):
+        return False
+    return row['Low'] <= row['High'] and row.get('Volume', 0) >= 0
+
+
+class _Attempt:
+    def __init__(self, symbol: str, backend: Backend, hedge: bool):
+        self.symbol = symbol
+        self.backend = backend
+        self.hedge = hedge
+        self.started = None  # set once the backend's rate limiter lets the request go
+        self.future = None
+
+    def run(self):
+        self.backend.limiter.acquire()
+        self.started = time.monotonic()
+        return timed_fetch(self.backend.fetch_one, self.symbol, self.backend.name)
+
+
+class _SymbolState:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.started = None  # when the symbol was first taken off the queue
+        self.round = 0
+        self.tried = set()
+        self.in_flight = []
+        self.errors = {}
+
+
+def fetch_hedged(symbols, date_str: str, backends: list, workers: int = 8, hedge_after: float = None,
+                 retries: int = 2, on_result=None, desc: str = "Fetching OHLCV (hedged)"):
+    """Fetches every symbol from the first backend, hedging slow requests on the next one.
+
+    Up to `workers` symbols are in progress at once. A symbol's request goes
+    to the first backend that serves it and whose breaker is closed; if it has
+    not returned after `hedge_after` seconds (default: the backend's recent
+    95th-percentile latency), the same symbol is also requested from the next
+    backend, and the first valid row wins. A backend that fails or has no data
+    fails over to the next one straight away. When every backend raised, the
+    symbol is retried up to `retries` times with jittered backoff.
+
+    Args:
+        symbols (list): Tickers (SYMBOL.NS).
+        date_str (str): Date the rows must be for (YYYY-MM-DD).
+        backends (list): Backends in priority order.
+        workers (int): Symbols in progress at once.
+        hedge_after (float): Fixed hedging threshold in seconds (default: adaptive).
+        retries (int): Extra rounds for symbols on which every backend raised.
+        on_result (callable): Called as on_result(symbol, row) as each symbol finishes
+            (row is None for no data), e.g. to checkpoint progress.
+        desc (str): tqdm progress bar label.
+
+    Returns:
+        tuple: (results, failures, stats) where results is aligned with `symbols`
+        (row dicts with a Source column, or None), failures maps symbols every
+        backend raised on to {backend: exception}, and stats counts rows per
+        source, hedges sent and hedges won.
+    """
+    symbols = list(symbols)
+    positions = {symbol: i for i, symbol in enumerate(symbols)}
+    results = [None] * len(symbols)
+    failures = {}
+    stats = {'rows': {backend.name: 0 for backend in backends}, 'hedged': 0, 'hedge_wins': 0, 'failovers': 0}
+
+    states = {symbol: _SymbolState(symbol) for symbol in symbols}
+    queue = deque((0.0, symbol) for symbol in symbols)  # (not before, symbol)
+    active = {}
+    futures = {}
+    progress = tqdm(total=len(symbols), desc=desc)
+
+    def launch(state, hedge=False) -> bool:
+        for backend in backends:
+            if backend.name in state.tried or not backend.serves(state.symbol) or not backend.breaker.allow():
+                continue
+            attempt = _Attempt(state.symbol, backend, hedge)
+            attempt.future = executor.submit(attempt.run)
+            futures[attempt.future] = attempt
+            state.tried.add(backend.name)
+            state.in_flight.append(attempt)
+            if hedge:
+                stats['hedged'] += 1
+                METRICS.count('fetch_hedges_total', source=backend.name)
+            return True
+        return False
+
+    def finish(state, row) -> None:
+        del active[state.symbol]
+        results[positions[state.symbol]] = row
+        failed = row is None and len(state.errors) == len(state.tried)
+        if failed:
+            failures[state.symbol] = dict(state.errors)
+        else:
+            if row is not None:
+                stats['rows'][row['Source']] += 1
+            if on_result is not None:
+                on_result(state.symbol, row)
+        METRICS.observe('fetch_symbol_seconds', time.monotonic() - state.started, source='hedged',
+                        outcome='error' if failed else ('empty' if row is None else 'ok'))
+        progress.update(1)
+
+    def exhausted(state) -> None:
+        """No attempt in flight and no backend left to try: retry if every backend raised, else give up."""
+        if not state.tried:
+            state.tried.add('all')
+            state.errors['all'] = RuntimeError("No backend available (circuit open or symbol not served).")
+        if len(state.errors) == len(state.tried) and state.round < retries:
+            del active[state.symbol]
+            queue.append((time.monotonic() + backoff_delay(state.round), state.symbol))
+            state.round += 1
+            state.tried.clear()
+            state.errors.clear()
+        else:
+            finish(state, None)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers) * len(backends))
+    try:
+        while queue or active:
+            now = time.monotonic()
+            for _ in range(len(queue)):
+                if len(active) >= workers:
+                    break
+                not_before, symbol = queue.popleft()
+                if not_before > now:
+                    queue.append((not_before, symbol))
+                    continue
+                state = active[symbol] = states[symbol]
+                if state.started is None:
+                    state.started = now
+                if not launch(state):
+                    exhausted(state)
+
+            if futures:
+                done, _ = wait(list(futures), timeout=TICK, return_when=FIRST_COMPLETED)
+            else:
+                done = set()
+                time.sleep(TICK)
+            for future in done:
+                attempt = futures.pop(future)
+                backend = attempt.backend
+                state = active.get(attempt.symbol)
+                try:
+                    row = future.result()
+                except Exception as e:
+                    if backend.breaker.failure():
+                        print(f"\nCircuit opened for {backend.name} after {backend.breaker.failures} failures.")
+                        METRICS.count('fetch_circuit_open_total', source=backend.name)
+                    if state is not None and attempt in state.in_flight:
+                        state.errors[backend.name] = e
+                    row = None
+                else:
+                    backend.breaker.success()
+                    backend.latencies.append(time.monotonic() - attempt.started)
+                if state is None or attempt not in state.in_flight:
+                    continue  # the symbol was already settled by another backend
+                state.in_flight.remove(attempt)
+
+                if valid_row(row, date_str):
+                    if attempt.hedge:
+                        stats['hedge_wins'] += 1
+                    finish(state, dict(row, Source=backend.name))
+                elif not state.in_flight:
+                    if launch(state):
+                        stats['failovers'] += 1
+                    else:
+                        exhausted(state)
+
+            now = time.monotonic()
+            for state in list(active.values()):
+                if len(state.in_flight) != 1:
+                    continue
+                attempt = state.in_flight[0]
+                threshold = hedge_after if hedge_after is not None else attempt.backend.hedge_after()
+                if attempt.started is not None and now - attempt.started >= threshold:
+                    launch(state, hedge=True)
+    finally:
+        progress.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, failures, stats
+
+
+def fetch_stock_data(date_input: str, workers: int = 8, hedge_after: float = None, resume: bool = True,
+                     backends: list = None) -> pd.DataFrame:
+    """
+    Fetches end-of-day OHLCV data for the mid-cap and small-cap universe from nsepython and
+    yfinance together, keeps the top 75 per category by volume, saves to CSV in "Stock Files"
+    with a Source column naming the backend each row came from, and returns the combined DataFrame.
+    Slow NSE requests are hedged on yfinance (see fetch_hedged), and a backend that keeps
+    failing is skipped by its circuit breaker until it recovers. Per-symbol results are
+    checkpointed under Fetch Cache/hedged, so with resume=True an interrupted run only
+    fetches the symbols still outstanding.
+    """
+    output_dir = "Stock Files"
+
+    try:
+        target_date = datetime.datetime.strptime(date_input, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-17).")
+    date_str = target_date.strftime('%Y-%m-%d')
+
+    if skip_non_trading_day(target_date, output_dir):
+        return pd.DataFrame()
+
+    print(f"\nFetching data for {date_str}...")
+
+    all_categories = UNIVERSE.category_lists()
+    symbols = list(dict.fromkeys(ticker for _, tickers in all_categories for ticker in tickers))
+    backends = backends or default_backends(target_date)
+
+    checkpoint = FetchCheckpoint(date_str, 'hedged') if resume else None
+    pending = symbols if checkpoint is None else checkpoint.outstanding(symbols)
+    results, failures, stats = fetch_hedged(pending, date_str, backends, workers=workers, hedge_after=hedge_after,
+                                            on_result=checkpoint.record if checkpoint is not None else None)
+    for symbol, errors in failures.items():
+        print(f"All backends failed for {symbol}: " + "; ".join(f"{name}: {e}" for name, e in errors.items()))
+
+    rows = checkpoint.rows(symbols) if checkpoint is not None else [row for row in results if row is not None]
+    print("Rows by source: " + ", ".join(f"{name} {count}" for name, count in stats['rows'].items())
+          + f"; {stats['hedged']} hedged ({stats['hedge_wins']} won), {stats['failovers']} failed over")
+    if checkpoint is not None:
+        print(outstanding_report(checkpoint, symbols))
+
+    fetched = pd.DataFrame(rows)
+    category_frames = []
+    for category, tickers in all_categories:
+        wanted = [ticker.replace('.NS', '') for ticker in tickers]
+        df = fetched[fetched['Symbol'].isin(wanted)] if not fetched.empty else fetched
+        if df.empty:
+            print(f"No data available for {category} on {date_str}.")
+            continue
+        category_frames.append((category, df))
+        print(f"Fetched {min(len(df), 75)} stocks for {category}")
+
+    combined_df = combine_categories(category_frames)
+    write_stock_file(combined_df, target_date, output_dir)
+
+    return combined_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch a day's OHLCV from NSE and Yahoo with hedged requests.")
+    parser.add_argument("date", help="Date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=8, help="Symbols in progress at once")
+    parser.add_argument("--hedge-after", type=float, help="Hedge after this many seconds (default: adaptive p95)")
+    parser.add_argument("--no-resume", action='store_true', help="Ignore checkpointed results")
+    args = parser.parse_args()
+
+    fetch_stock_data(args.date, workers=args.workers, hedge_after=args.hedge_after, resume=not args.no_resume)
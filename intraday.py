@@ -0,0 +1,360 @@
+import os
+import time
+import argparse
+import datetime
+import warnings
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from metrics import METRICS
+from universe import UNIVERSE
+from stock_files import combine_categories, write_stock_file
+from trading_calendar import closed_reason
+
+warnings.filterwarnings('ignore')
+
+INTRADAY_DIR = "Intraday Files"
+TIMEZONE = 'Asia/Kolkata'
+SESSION_OPEN = datetime.time(9, 15)
+SESSION_CLOSE = datetime.time(15, 30)
+SESSION_MINUTES = 375
+INTERVALS = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30}
+BAR_COLUMNS = ['Symbol', 'Datetime', 'Open', 'High', 'Low', 'Close', 'Volume']
+BATCH_SIZE = 50  # tickers per yf.download call
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+class IntradaySession:
+    """One session's bars for a fixed symbol list, with running daily OHLCV and VWAP.
+
+    Each symbol's bars go into a ring buffer of `capacity` slots (by default a
+    whole session at the given interval), so memory is fixed at symbols x
+    capacity bars however long a feed runs. The daily figures are kept as
+    running aggregates over every bar but the latest, which is combined in
+    when they are read: a revised version of the latest bar (yfinance re-serves
+    the still-forming bar on every poll) just replaces it, and a bar is folded
+    in once a newer one arrives. Bars older than a symbol's latest are stale and
+    ignored.
+
+    Args:
+        symbols (list): Symbols without the .NS suffix.
+        date_str (str): Session date (YYYY-MM-DD).
+        interval (str): Bar interval ('5m', '15m', ...), used for the default capacity.
+        capacity (int): Bars kept per symbol.
+    """
+
+    def __init__(self, symbols, date_str: str, interval: str = '5m', capacity: int = None):
+        if interval not in INTERVALS:
+            raise ValueError(f"Unsupported interval {interval}; use one of {', '.join(INTERVALS)}.")
+        self.symbols = list(dict.fromkeys(symbols))
+        self.date_str = date_str
+        self.interval = interval
+        self.capacity = capacity or SESSION_MINUTES // INTERVALS[interval]
+        self._rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        n = len(self.symbols)
+        self.times = np.zeros((n, self.capacity), dtype=np.int64)  # bar start, ns since epoch
+        self.bars = np.zeros((n, self.capacity, 5))
+        self.heads = np.zeros(n, dtype=np.int64)  # bars ever stored per symbol
+        # Aggregates over the folded bars (every bar but each symbol's latest)
+        self.open = np.full(n, np.nan)
+        self.high = np.full(n, np.nan)
+        self.low = np.full(n, np.nan)
+        self.volume = np.zeros(n)
+        self.turnover = np.zeros(n)  # sum of typical price x volume, for VWAP
+        self.counts = {'new': 0, 'revised': 0, 'stale': 0, 'unknown': 0}
+
+    def update(self, symbol: str, timestamp, open_, high, low, close, volume) -> str:
+        """Adds one bar and returns 'new', 'revised', 'stale' or 'unknown' (symbol not tracked)."""
+        row = self._rows.get(symbol)
+        if row is None:
+            outcome = 'unknown'
+        else:
+            stamp = pd.Timestamp(timestamp).value
+            count = self.heads[row]
+            last = (count - 1) % self.capacity
+            if count and stamp < self.times[row, last]:
+                outcome = 'stale'
+            elif count and stamp == self.times[row, last]:
+                self.bars[row, last] = (open_, high, low, close, volume)
+                outcome = 'revised'
+            else:
+                if count:
+                    self._fold(row, self.bars[row, last])
+                slot = count % self.capacity
+                self.times[row, slot] = stamp
+                self.bars[row, slot] = (open_, high, low, close, volume)
+                self.heads[row] = count + 1
+                outcome = 'new'
+        self.counts[outcome] += 1
+        return outcome
+
+    def _fold(self, row: int, bar) -> None:
+        if np.isnan(self.open[row]):
+            self.open[row] = bar[OPEN]
+        self.high[row] = np.fmax(self.high[row], bar[HIGH])
+        self.low[row] = np.fmin(self.low[row], bar[LOW])
+        self.volume[row] += bar[VOLUME]
+        self.turnover[row] += (bar[HIGH] + bar[LOW] + bar[CLOSE]) / 3 * bar[VOLUME]
+
+    def ingest(self, bars_df: pd.DataFrame) -> dict:
+        """Adds a frame of bars (BAR_COLUMNS) in time order; returns the outcome counts for this frame."""
+        counts = {'new': 0, 'revised': 0, 'stale': 0, 'unknown': 0}
+        if bars_df.empty:
+            return counts
+        bars_df = bars_df.sort_values('Datetime', kind='stable')
+        for bar in bars_df[BAR_COLUMNS].itertuples(index=False):
+            counts[self.update(*bar)] += 1
+        for outcome, value in counts.items():
+            if value:
+                METRICS.count('intraday_bars_total', value, outcome=outcome)
+        return counts
+
+    def snapshot(self) -> pd.DataFrame:
+        """Running daily OHLCV and VWAP of every symbol with at least one bar, plus its latest bar time.
+
+        The Symbol, Date, Open, High, Low, Close and Volume columns follow the
+        Stock Files layout, so the frame can stand in for a day's stock_df.
+        """
+        rows = np.flatnonzero(self.heads)
+        last = self.bars[rows, (self.heads[rows] - 1) % self.capacity]
+        volume = self.volume[rows] + last[:, VOLUME]
+        turnover = self.turnover[rows] + (last[:, HIGH] + last[:, LOW] + last[:, CLOSE]) / 3 * last[:, VOLUME]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vwap = np.where(volume > 0, turnover / volume, np.nan)
+        return pd.DataFrame({
+            'Symbol': [self.symbols[i] for i in rows],
+            'Date': self.date_str,
+            'Open': np.where(np.isnan(self.open[rows]), last[:, OPEN], self.open[rows]),
+            'High': np.fmax(self.high[rows], last[:, HIGH]),
+            'Low': np.fmin(self.low[rows], last[:, LOW]),
+            'Close': last[:, CLOSE],
+            'Volume': volume.astype('int64'),
+            'VWAP': np.round(vwap, 4),
+            'Bars': self.heads[rows],
+            'LastBar': _timestamps(self.times[rows, (self.heads[rows] - 1) % self.capacity]),
+        })
+
+    def daily_frame(self) -> pd.DataFrame:
+        """The session so far as Stock Files rows (Symbol, Date, Open, High, Low, Close, Volume)."""
+        return self.snapshot()[['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+
+    def buffered_bars(self) -> pd.DataFrame:
+        """Every bar still in the ring buffers (BAR_COLUMNS), oldest first per symbol."""
+        frames = []
+        for row, symbol in enumerate(self.symbols):
+            count = int(self.heads[row])
+            if not count:
+                continue
+            slots = np.arange(max(0, count - self.capacity), count) % self.capacity
+            bars = self.bars[row, slots]
+            frames.append(pd.DataFrame({'Symbol': symbol, 'Datetime': _timestamps(self.times[row, slots]),
+                                        'Open': bars[:, OPEN], 'High': bars[:, HIGH], 'Low': bars[:, LOW],
+                                        'Close': bars[:, CLOSE], 'Volume': bars[:, VOLUME].astype('int64')}))
+        if not frames:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+
+def _timestamps(stamps) -> pd.Series:
+    return pd.Series(pd.to_datetime(stamps, utc=True).tz_convert(TIMEZONE))
+
+
+def _download_bars(tickers, date_str: str, interval: str) -> pd.DataFrame:
+    """Downloads one chunk of tickers' intraday bars for a date and returns them as long BAR_COLUMNS rows."""
+    end = (pd.Timestamp(date_str) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    df = yf.download(list(tickers), start=date_str, end=end, interval=interval, progress=False,
+                     group_by='ticker', threads=True)
+    if df.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+
+    long_df = df.stack(level=0).reset_index()
+    long_df.columns = ['Datetime', 'Ticker'] + list(long_df.columns[2:])
+    long_df = long_df.dropna(subset=['Close'])
+    stamps = pd.to_datetime(long_df['Datetime'])
+    stamps = stamps.dt.tz_localize('UTC') if stamps.dt.tz is None else stamps
+    return pd.DataFrame({
+        'Symbol': long_df['Ticker'].str.replace('.NS', '', regex=False).values,
+        'Datetime': stamps.dt.tz_convert(TIMEZONE).array,
+        'Open': long_df['Open'].astype(float).values,
+        'High': long_df['High'].astype(float).values,
+        'Low': long_df['Low'].astype(float).values,
+        'Close': long_df['Close'].astype(float).values,
+        'Volume': long_df['Volume'].fillna(0).astype('int64').values,
+    })
+
+
+def yfinance_bars(tickers, date_str: str, interval: str = '5m') -> pd.DataFrame:
+    """Fetches the date's intraday bars for tickers (SYMBOL.NS) from yfinance, BATCH_SIZE tickers per call.
+
+    Yahoo serves 5m and 15m bars for roughly the last 60 days only.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    frames = []
+    for i in range(0, len(tickers), BATCH_SIZE):
+        chunk = tickers[i:i + BATCH_SIZE]
+        try:
+            frames.append(_download_bars(chunk, date_str, interval))
+        except Exception as e:
+            print(f"yfinance intraday failed for {', '.join(chunk)}: {e}")
+            METRICS.count('fetch_failures_total', source='yfinance_intraday')
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    bars_df = pd.concat(frames, ignore_index=True)
+    return bars_df[bars_df['Datetime'].dt.strftime('%Y-%m-%d') == date_str].reset_index(drop=True)
+
+
+def session_close(date_str: str) -> pd.Timestamp:
+    return pd.Timestamp(f"{date_str} {SESSION_CLOSE.strftime('%H:%M')}", tz=TIMEZONE)
+
+
+def session_complete(session: IntradaySession, fetched: bool = True) -> bool:
+    """True once the session's bars reach the close.
+
+    With fetched=True (bars from yfinance rather than a recording), a session whose
+    close has passed by more than one interval also counts, since Yahoo then serves
+    the whole day.
+    """
+    interval = pd.Timedelta(minutes=INTERVALS[session.interval])
+    close = session_close(session.date_str)
+    if session.heads.any() and session.snapshot()['LastBar'].max() + interval >= close:
+        return True
+    return fetched and pd.Timestamp.now(tz=TIMEZONE) >= close + interval
+
+
+def poll_yfinance(tickers, date_str: str, interval: str = '5m', poll_seconds: float = 60.0):
+    """Yields the date's bars from yfinance every poll_seconds until one interval past the session close.
+
+    Each poll returns the whole session so far; IntradaySession.ingest treats
+    already-seen bars as revisions, so nothing is counted twice. Past the close
+    (or for an earlier date) this yields once.
+    """
+    final = session_close(date_str) + pd.Timedelta(minutes=INTERVALS[interval])
+    while True:
+        done = pd.Timestamp.now(tz=TIMEZONE) >= final
+        yield yfinance_bars(tickers, date_str, interval)
+        if done:
+            return
+        time.sleep(poll_seconds)
+
+
+def replay_bars(path: str, speed: float = None):
+    """Yields the bars of a recorded file (BAR_COLUMNS CSV) one timestamp at a time.
+
+    With speed, waits between timestamps as the session did, sped up `speed`
+    times (e.g. 60 replays a 5m bar every 5 seconds); without it, as fast as
+    they are consumed.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Replay file not found: {path}")
+    bars_df = pd.read_csv(path, float_precision='round_trip')
+    bars_df['Datetime'] = pd.to_datetime(bars_df['Datetime'], utc=True).dt.tz_convert(TIMEZONE)
+    previous = None
+    for stamp, group in bars_df.groupby('Datetime', sort=True):
+        if speed and previous is not None:
+            time.sleep((stamp - previous).total_seconds() / speed)
+        previous = stamp
+        yield group.reset_index(drop=True)
+
+
+def write_session(session: IntradaySession, output_dir: str = "Stock Files", bars_dir: str = INTRADAY_DIR) -> str:
+    """Writes the session's daily rows to Stock Files exactly like an end-of-day fetch (top 75 per
+    category by volume), and its buffered bars to <bars_dir>/<date>.csv for replay.
+
+    Returns:
+        str: Path of the Stock Files CSV.
+    """
+    daily_df = session.daily_frame()
+    category_frames = []
+    for category, tickers in UNIVERSE.category_lists('yfinance'):
+        wanted = [ticker.replace('.NS', '') for ticker in tickers]
+        category_frames.append((category, daily_df[daily_df['Symbol'].isin(wanted)]))
+
+    if bars_dir:
+        os.makedirs(bars_dir, exist_ok=True)
+        bars_file = os.path.join(bars_dir, f"{session.date_str}.csv")
+        session.buffered_bars().to_csv(bars_file, index=False)
+        print(f"Saved intraday bars to {bars_file}")
+
+    target_date = datetime.datetime.strptime(session.date_str, '%Y-%m-%d')
+    return write_stock_file(combine_categories(category_frames), target_date, output_dir)
+
+
+def run_session(date_input: str, interval: str = '5m', replay: str = None, live: bool = False,
+                poll_seconds: float = 60.0, speed: float = None, output_dir: str = "Stock Files",
+                bars_dir: str = INTRADAY_DIR, on_update=None, write_partial: bool = False) -> IntradaySession:
+    """Streams one session's bars into an IntradaySession and writes the daily Stock Files row set at close.
+
+    A feed that ends before the close (a one-shot run mid-session) leaves Stock Files
+    and the market store unchanged, so the end-of-day fetch still writes the full day.
+
+    Args:
+        date_input (str): Session date (YYYY-MM-DD).
+        interval (str): Bar interval for yfinance ('5m' or '15m' are the usual choices).
+        replay (str): Recorded bar file to replay instead of fetching from yfinance.
+        live (bool): Keep polling yfinance every poll_seconds until the session closes.
+        poll_seconds (float): Seconds between live polls.
+        speed (float): Replay speed-up (see replay_bars); None replays without waiting.
+        output_dir (str): Stock Files directory written at close; None to skip writing.
+        bars_dir (str): Where the session's bars are saved for replay; None to skip.
+        on_update (callable): Called with the session after every batch of bars, e.g. to
+            re-check emergency trades against session.snapshot().
+        write_partial (bool): Write the day's files even if the session has not closed.
+
+    Returns:
+        IntradaySession: The finished session.
+    """
+    try:
+        datetime.datetime.strptime(date_input, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-17).")
+    reason = closed_reason(date_input)
+    if reason is not None and not replay:
+        print(f"{date_input} is not an NSE trading day ({reason}); no session to ingest.")
+        return IntradaySession([], date_input, interval)
+
+    tickers = [ticker for _, category_tickers in UNIVERSE.category_lists('yfinance') for ticker in category_tickers]
+    session = IntradaySession([ticker.replace('.NS', '') for ticker in tickers], date_input, interval)
+
+    if replay:
+        feed = replay_bars(replay, speed)
+    elif live:
+        feed = poll_yfinance(tickers, date_input, interval, poll_seconds)
+    else:
+        feed = iter([yfinance_bars(tickers, date_input, interval)])
+
+    for bars_df in feed:
+        counts = session.ingest(bars_df)
+        if counts['new'] or counts['revised']:
+            latest = bars_df['Datetime'].max()
+            print(f"{latest:%H:%M}: {counts['new']} new, {counts['revised']} revised bars "
+                  f"({int((session.heads > 0).sum())} symbols)")
+            if on_update is not None:
+                on_update(session)
+
+    if not session.heads.any():
+        print(f"No intraday bars for {date_input}; Stock Files left unchanged.")
+    elif not write_partial and not session_complete(session, fetched=not replay):
+        print(f"The {date_input} session has not closed (last bar {session.snapshot()['LastBar'].max():%H:%M}); "
+              f"Stock Files left unchanged.")
+    elif output_dir:
+        write_session(session, output_dir, bars_dir)
+    return session
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a day's Stock Files rows from intraday bars.")
+    parser.add_argument("date", help="Session date (YYYY-MM-DD)")
+    parser.add_argument("--interval", default='5m', choices=list(INTERVALS), help="yfinance bar interval")
+    parser.add_argument("--replay", help="Replay a recorded bar file instead of fetching")
+    parser.add_argument("--speed", type=float, help="Replay speed-up (e.g. 60); default replays instantly")
+    parser.add_argument("--live", action='store_true', help="Poll yfinance until the session closes")
+    parser.add_argument("--poll", type=float, default=60.0, help="Seconds between live polls")
+    parser.add_argument("--write-partial", action='store_true',
+                        help="Write Stock Files even if the session has not closed yet")
+    args = parser.parse_args()
+
+    run_session(args.date, args.interval, replay=args.replay, live=args.live, poll_seconds=args.poll, speed=args.speed,
+                write_partial=args.write_partial)
@@ -0,0 +1,167 @@
+import json
+import os
+import glob
+import pandas as pd
+from datetime import datetime
+from trade_engine import Holdings, apply_trades, load_trades, DEFAULT_CASH
+from market_store import load_stock_day
+
+LEDGER_DIR = "Ledger"
+
+
+class Ledger:
+    """Append-only ledger of portfolio events with a snapshot cache.
+
+    Ledger/events.jsonl holds one JSON event per line, each with a sequence
+    number and an effective date:
+        open   - starting holdings and cash (rows in the Portfolio Files layout)
+        trades - one day's Grok trades, identified by a label such as t_2025-11-21
+        mark   - the day's Close prices
+        void   - cancels an earlier event by sequence number
+    Events are never edited. Fixing a past trade means recording the corrected
+    trades under the same label, which voids the old event. Any event dated on
+    or before a snapshot deletes the snapshots from that date on.
+
+    Ledger/snapshots/<date>.csv holds materialized holdings after all events of
+    that date. A portfolio is rebuilt from the nearest earlier snapshot plus the
+    events after it.
+    """
+
+    def __init__(self, root: str = LEDGER_DIR):
+        self.root = root
+        self.events_file = os.path.join(root, 'events.jsonl')
+        self.snapshot_dir = os.path.join(root, 'snapshots')
+        self.events = []
+        if os.path.exists(self.events_file):
+            with open(self.events_file, 'r', encoding='utf-8') as f:
+                self.events = [json.loads(line) for line in f if line.strip()]
+
+    def exists(self) -> bool:
+        return bool(self.events)
+
+    def _append(self, event: dict) -> dict:
+        os.makedirs(self.root, exist_ok=True)
+        event = {'seq': len(self.events), **event}
+        with open(self.events_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event) + "\n")
+        self.events.append(event)
+        self._invalidate_snapshots(event['date'])
+        return event
+
+    def _invalidate_snapshots(self, date_str: str) -> None:
+        for path in glob.glob(os.path.join(self.snapshot_dir, '*.csv')):
+            if os.path.splitext(os.path.basename(path))[0] >= date_str:
+                os.remove(path)
+
+    def _active_events(self) -> list:
+        voided = {event['target'] for event in self.events if event['type'] == 'void'}
+        return [event for event in self.events if event['type'] != 'void' and event['seq'] not in voided]
+
+    def open(self, date_str: str, df: pd.DataFrame = None, default_cash: float = DEFAULT_CASH) -> dict:
+        """Records the starting portfolio (Portfolio Files rows, or all cash if df is None or empty)."""
+        holdings = Holdings.from_frame(df if df is not None else pd.DataFrame(), default_cash)
+        return self._append({'date': date_str, 'type': 'open', 'holdings': holdings.to_frame().to_dict('records')})
+
+    def record_trades(self, date_str: str, trades: list, label: str) -> dict:
+        """Records one day's trades, effective on date_str, replacing any earlier event with this label."""
+        for event in self._active_events():
+            if event['type'] == 'trades' and event['label'] == label:
+                self.void(event['seq'])
+        return self._append({'date': date_str, 'type': 'trades', 'label': label, 'trades': trades})
+
+    def record_mark(self, date_str: str, stock_df: pd.DataFrame) -> dict:
+        """Records the day's Close price of every symbol in stock_df."""
+        closes = stock_df.dropna(subset=['Symbol']).drop_duplicates(subset='Symbol')
+        return self._append({'date': date_str, 'type': 'mark',
+                             'prices': dict(zip(closes['Symbol'], closes['Close'].astype(float)))})
+
+    def void(self, seq: int) -> dict:
+        """Cancels an earlier event."""
+        target = next(event for event in self.events if event['seq'] == seq)
+        return self._append({'date': target['date'], 'type': 'void', 'target': seq})
+
+    def _nearest_snapshot(self, date_str: str):
+        dates = sorted(os.path.splitext(os.path.basename(path))[0]
+                       for path in glob.glob(os.path.join(self.snapshot_dir, '*.csv')))
+        dates = [snapshot_date for snapshot_date in dates if snapshot_date <= date_str]
+        return dates[-1] if dates else None
+
+    def portfolio_at(self, date_str: str) -> pd.DataFrame:
+        """Returns the portfolio (Portfolio Files layout) after all events up to and including date_str.
+
+        Raises:
+            ValueError: If the ledger has no open event on or before date_str.
+        """
+        snapshot_date = self._nearest_snapshot(date_str)
+        events = sorted(self._active_events(), key=lambda event: (event['date'], event['seq']))
+
+        holdings = None
+        if snapshot_date is not None:
+            holdings = Holdings.from_frame(pd.read_csv(os.path.join(self.snapshot_dir, f"{snapshot_date}.csv")))
+            events = [event for event in events if event['date'] > snapshot_date]
+
+        for event in events:
+            if event['date'] > date_str:
+                break
+            if event['type'] == 'open':
+                holdings = Holdings.from_frame(pd.DataFrame(event['holdings']))
+            elif holdings is None:
+                continue
+            elif event['type'] == 'trades':
+                apply_trades(holdings, event['trades'], event['label'])
+            elif event['type'] == 'mark':
+                holdings.mark(event['prices'])
+
+        if holdings is None:
+            raise ValueError(f"Ledger has no opening portfolio on or before {date_str}.")
+        return holdings.to_frame()
+
+    def snapshot(self, date_str: str) -> str:
+        """Materializes the portfolio at date_str into the snapshot cache.
+
+        Returns:
+            str: Path of the snapshot file.
+        """
+        df = self.portfolio_at(date_str)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"{date_str}.csv")
+        df.to_csv(path, index=False)
+        return path
+
+
+def import_history(start_date: str, end_date: str, root: str = LEDGER_DIR, snapshot_weekday: int = 4) -> Ledger:
+    """Builds a ledger from Portfolio Files/<start_date>.csv, the weekend trade files and Stock Files.
+
+    Trades from Grok Daily Reviews/Weekends/t_<date>.json take effect on the next
+    weekday that has a Stock Files CSV, and every such day is marked at its closes.
+    A snapshot is taken on each `snapshot_weekday` (default Friday).
+    """
+    ledger = Ledger(root)
+    if ledger.exists():
+        raise ValueError(f"{ledger.events_file} already has events; import into an empty ledger.")
+
+    ledger.open(start_date, pd.read_csv(os.path.join("Portfolio Files", f"{start_date}.csv")))
+    pending = []
+    for day in pd.bdate_range(start_date, end_date)[1:]:
+        date_str = day.strftime('%Y-%m-%d')
+        try:
+            stock_df = load_stock_day(date_str)
+        except FileNotFoundError:
+            continue
+        for label, trades in pending:
+            ledger.record_trades(date_str, trades, label)
+        pending = []
+        ledger.record_mark(date_str, stock_df)
+        trade_file = os.path.join("Grok Daily Reviews", "Weekends", f"t_{date_str}.json")
+        if os.path.exists(trade_file):
+            pending.append((f"t_{date_str}", load_trades(trade_file)))
+        if datetime.strptime(date_str, '%Y-%m-%d').weekday() == snapshot_weekday:
+            ledger.snapshot(date_str)
+    return ledger
+
+
+if __name__ == "__main__":
+    start_date = input("Enter the first portfolio date (YYYY-MM-DD): ").strip()
+    end_date = input("Enter the last date to import (YYYY-MM-DD): ").strip()
+    ledger = import_history(start_date, end_date)
+    print(f"Imported {len(ledger.events)} events into {ledger.events_file}")
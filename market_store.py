@@ -0,0 +1,319 @@
+import numpy as np
+import pandas as pd
+import os
+import glob
+import time
+from metrics import timed
+
+STORE_DIR = "Market Data"
+STOCK_DIR = "Stock Files"
+
+# Column name -> (file name, dtype). Files are raw little-endian arrays appended to in place.
+COLUMNS = {
+    'SymbolId': ('symbol_id.i4', np.dtype('<i4')),
+    'DateId': ('date.i4', np.dtype('<i4')),
+    'CategoryId': ('category_id.i1', np.dtype('<i1')),
+    'Open': ('open.f8', np.dtype('<f8')),
+    'High': ('high.f8', np.dtype('<f8')),
+    'Low': ('low.f8', np.dtype('<f8')),
+    'Close': ('close.f8', np.dtype('<f8')),
+    'Volume': ('volume.i8', np.dtype('<i8')),
+}
+CSV_COLUMNS = ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Category']
+
+
+class MarketStore:
+    """Columnar, date-partitioned store for the daily OHLCV rows kept in Stock Files.
+
+    Each column lives in one append-only binary file that is memory-mapped on read;
+    row dates are stored as days since 1970-01-01 so a partition keeps the rows' own
+    Date values. index.csv maps every date to a (Start, Rows) slice of those files, plus the time
+    it was Written, and is rewritten atomically after the column data. Appends start at the end
+    of the indexed rows and first truncate every column file there, so rows left by an
+    interrupted append are never read.
+    Re-appending a date points the index at the new rows; compact() drops the old ones.
+    A stored day is only current while its Stock Files CSV is not newer than the copy
+    (see is_current): a hand-fixed or replaced CSV wins until it is re-imported.
+    Symbols and categories are interned to integer IDs in symbols.txt / categories.txt.
+    """
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        self._load_metadata()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _load_metadata(self) -> None:
+        self.symbols = self._read_lines('symbols.txt')
+        self.categories = self._read_lines('categories.txt')
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._category_ids = {category: i for i, category in enumerate(self.categories)}
+        index_file = self._path('index.csv')
+        if os.path.exists(index_file):
+            self.index = pd.read_csv(index_file, dtype={'Date': str}).set_index('Date')
+            if 'Written' not in self.index.columns:
+                # Indexes from before Written was kept: every partition is at least as old as the index
+                self.index['Written'] = os.path.getmtime(index_file)
+        else:
+            self.index = pd.DataFrame({'Start': pd.Series(dtype='int64'), 'Rows': pd.Series(dtype='int64'),
+                                       'Written': pd.Series(dtype=float)}, index=pd.Index([], name='Date'))
+        self._mmaps = {}
+
+    def _read_lines(self, name: str) -> list:
+        path = self._path(name)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def _intern(self, values, table: list, ids: dict, name: str) -> np.ndarray:
+        new_values = [value for value in dict.fromkeys(values) if value not in ids]
+        if new_values:
+            with open(self._path(name), 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{value}\n" for value in new_values))
+            for value in new_values:
+                ids[value] = len(table)
+                table.append(value)
+        return pd.Series(values).map(ids).to_numpy()
+
+    def _column(self, column: str) -> np.ndarray:
+        file_name, dtype = COLUMNS[column]
+        path = self._path(file_name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        cached = self._mmaps.get(column)
+        if cached is None or cached.nbytes != size:
+            cached = np.memmap(path, dtype=dtype, mode='r') if size else np.empty(0, dtype=dtype)
+            self._mmaps[column] = cached
+        return cached
+
+    def _write_index(self) -> None:
+        tmp_file = self._path('index.csv.tmp')
+        self.index.sort_index().to_csv(tmp_file, index_label='Date')
+        os.replace(tmp_file, self._path('index.csv'))
+
+    def _end(self) -> int:
+        """Number of rows covered by the index; column data past it is left over from an interrupted append."""
+        if self.index.empty:
+            return 0
+        return int((self.index['Start'] + self.index['Rows']).max())
+
+    def dates(self) -> list:
+        """Returns every stored date (YYYY-MM-DD), including empty non-trading days."""
+        return sorted(self.index.index)
+
+    def has_date(self, date_str: str) -> bool:
+        return date_str in self.index.index
+
+    def is_current(self, date_str: str, stock_dir: str = STOCK_DIR) -> bool:
+        """True if the date is stored and Stock Files/<date>.csv, if any, was not modified after it was stored."""
+        if not self.has_date(date_str):
+            return False
+        csv_file = os.path.join(stock_dir, f"{date_str}.csv")
+        return not os.path.exists(csv_file) or os.path.getmtime(csv_file) <= self.index.at[date_str, 'Written']
+
+    def append(self, df: pd.DataFrame, date_str: str) -> None:
+        """Stores the OHLCV rows of one day, replacing any rows already stored for it.
+
+        Args:
+            df (pd.DataFrame): Rows in the Stock Files schema (may be empty for a holiday).
+            date_str (str): Date in YYYY-MM-DD format.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        df = df.dropna(subset=['Symbol']) if not df.empty else df
+        start = self._end()
+
+        arrays = {
+            'SymbolId': self._intern(df['Symbol'].astype(str).tolist(), self.symbols, self._symbol_ids, 'symbols.txt') if len(df) else [],
+            'DateId': pd.to_datetime(df['Date']).to_numpy().astype('datetime64[D]').astype('int64') if len(df) else [],
+            'CategoryId': self._intern(df['Category'].astype(str).tolist(), self.categories, self._category_ids, 'categories.txt') if len(df) else [],
+            'Open': df['Open'] if len(df) else [],
+            'High': df['High'] if len(df) else [],
+            'Low': df['Low'] if len(df) else [],
+            'Close': df['Close'] if len(df) else [],
+            'Volume': df['Volume'] if len(df) else [],
+        }
+        self._mmaps = {}
+        for column, (file_name, dtype) in COLUMNS.items():
+            path = self._path(file_name)
+            if (os.path.getsize(path) if os.path.exists(path) else 0) < start * dtype.itemsize:
+                raise ValueError(f"{path} is shorter than its index says; the store is corrupt.")
+            with open(path, 'ab') as f:
+                f.truncate(start * dtype.itemsize)
+                f.write(np.asarray(arrays[column], dtype=dtype).tobytes())
+
+        self.index.loc[date_str] = [start, len(df), time.time()]
+        self.index = self.index.astype({'Start': 'int64', 'Rows': 'int64'})
+        self._write_index()
+
+    def read_arrays(self, start_date: str, end_date: str = None) -> dict:
+        """Returns the raw column arrays and per-row dates for an inclusive date range.
+
+        When the stored partitions for the range are contiguous (the normal, in-order
+        append case) every array is a view into the memory-mapped files; otherwise
+        the partitions are gathered into new arrays.
+
+        Returns:
+            dict: Column name -> np.ndarray, plus 'Partition' (the stored date of each row).
+        """
+        end_date = end_date or start_date
+        parts = self.index.sort_index().loc[start_date:end_date]
+        parts = parts[parts['Rows'] > 0]
+
+        starts = parts['Start'].to_numpy()
+        rows = parts['Rows'].to_numpy()
+        contiguous = len(parts) == 0 or bool(np.all(starts[1:] == starts[:-1] + rows[:-1]))
+
+        arrays = {}
+        for column in COLUMNS:
+            data = self._column(column)
+            if len(parts) == 0:
+                arrays[column] = data[:0]
+            elif contiguous:
+                arrays[column] = data[starts[0]:starts[-1] + rows[-1]]
+            else:
+                arrays[column] = np.concatenate([data[s:s + n] for s, n in zip(starts, rows)])
+        arrays['Partition'] = np.repeat(parts.index.to_numpy(), rows)
+        return arrays
+
+    def read(self, start_date: str, end_date: str = None, symbols=None) -> pd.DataFrame:
+        """Reads stored rows for an inclusive date range as a typed DataFrame in the CSV column order.
+
+        Args:
+            start_date (str): First date (YYYY-MM-DD).
+            end_date (str): Last date (YYYY-MM-DD); defaults to start_date.
+            symbols (list): Optional subset of symbols to keep.
+
+        Returns:
+            pd.DataFrame: Symbol, Date, Open, High, Low, Close, Volume, Category.
+        """
+        arrays = self.read_arrays(start_date, end_date)
+        mask = slice(None)
+        if symbols is not None:
+            wanted = [self._symbol_ids[symbol] for symbol in symbols if symbol in self._symbol_ids]
+            mask = np.isin(arrays['SymbolId'], wanted)
+
+        symbol_table = np.array(self.symbols, dtype=object)
+        category_table = np.array(self.categories, dtype=object)
+        return pd.DataFrame({
+            'Symbol': symbol_table[arrays['SymbolId'][mask]] if self.symbols else np.array([], dtype=object),
+            'Date': arrays['DateId'][mask].astype('datetime64[D]').astype(str),
+            'Open': arrays['Open'][mask],
+            'High': arrays['High'][mask],
+            'Low': arrays['Low'][mask],
+            'Close': arrays['Close'][mask],
+            'Volume': arrays['Volume'][mask],
+            'Category': category_table[arrays['CategoryId'][mask]] if self.categories else np.array([], dtype=object),
+        }, columns=CSV_COLUMNS)
+
+    def read_partitions(self, start_date: str, end_date: str = None) -> dict:
+        """Reads an inclusive date range once and splits it into {stored date: DataFrame}."""
+        arrays = self.read_arrays(start_date, end_date)
+        df = self.read(start_date, end_date)
+        dates, starts = np.unique(arrays['Partition'], return_index=True)
+        bounds = list(starts) + [len(df)]
+        frames = {date_str: df.iloc[bounds[i]:bounds[i + 1]].reset_index(drop=True) for i, date_str in enumerate(dates)}
+        parts = self.index.sort_index().loc[start_date:end_date or start_date]
+        for date_str in parts.index[parts['Rows'] == 0]:
+            frames[date_str] = df.iloc[:0]
+        return frames
+
+    def export_csv(self, date_str: str, output_dir: str = STOCK_DIR) -> str:
+        """Writes one stored day back out as a Stock Files CSV.
+
+        Returns:
+            str: Path of the written file.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, f"{date_str}.csv")
+        df = self.read(date_str)
+        if df.empty:
+            df = pd.DataFrame(columns=['Symbol', 'Category', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        df.to_csv(output_file, index=False)
+        return output_file
+
+    def import_stock_files(self, input_dir: str = STOCK_DIR, overwrite: bool = False) -> list:
+        """Loads every Stock Files CSV not yet in the store, or modified since it was stored, in date order.
+
+        Returns:
+            list: Dates imported.
+        """
+        imported = []
+        for csv_file in sorted(glob.glob(os.path.join(input_dir, '*.csv'))):
+            date_str = os.path.splitext(os.path.basename(csv_file))[0]
+            if self.is_current(date_str, input_dir) and not overwrite:
+                continue
+            self.append(pd.read_csv(csv_file, float_precision='round_trip'), date_str)
+            imported.append(date_str)
+        return imported
+
+    def compact(self) -> None:
+        """Rewrites the column files keeping only live partitions, in date order."""
+        arrays = self.read_arrays(self.dates()[0], self.dates()[-1]) if self.dates() else None
+        if arrays is None:
+            return
+        index = self.index.sort_index()
+        rows = index['Rows']
+        for column, (file_name, dtype) in COLUMNS.items():
+            tmp_file = self._path(file_name + '.tmp')
+            np.asarray(arrays[column], dtype=dtype).tofile(tmp_file)
+        self._mmaps = {}
+        for column, (file_name, dtype) in COLUMNS.items():
+            os.replace(self._path(file_name + '.tmp'), self._path(file_name))
+        self.index = pd.DataFrame({'Start': np.concatenate([[0], np.cumsum(rows.to_numpy())[:-1]]), 'Rows': rows.to_numpy(),
+                                   'Written': index['Written'].to_numpy()}, index=rows.index)
+        self._write_index()
+
+
+@timed('load_stock_day')
+def load_stock_day(date_str: str, stock_dir: str = STOCK_DIR, store_dir: str = STORE_DIR) -> pd.DataFrame:
+    """Returns one day's OHLCV rows from the market store, or from Stock Files/<date>.csv if the
+    day is not stored or the CSV is newer than the stored copy.
+
+    Raises:
+        FileNotFoundError: If the date is in neither the store nor Stock Files.
+    """
+    if os.path.exists(os.path.join(store_dir, 'index.csv')):
+        store = MarketStore(store_dir)
+        if store.is_current(date_str, stock_dir):
+            return store.read(date_str)
+
+    csv_file = os.path.join(stock_dir, f"{date_str}.csv")
+    if not os.path.exists(csv_file):
+        raise FileNotFoundError(f"No stock file found for {date_str}. Please create it first.")
+    return pd.read_csv(csv_file).dropna(subset=['Symbol'])
+
+
+@timed('load_stock_days')
+def load_stock_days(date_strs, stock_dir: str = STOCK_DIR, store_dir: str = STORE_DIR) -> dict:
+    """Returns {date: OHLCV rows} for several days, reading stored days with one range read.
+
+    Raises:
+        FileNotFoundError: If a date is in neither the store nor Stock Files.
+    """
+    frames = {}
+    if os.path.exists(os.path.join(store_dir, 'index.csv')):
+        store = MarketStore(store_dir)
+        stored = [date_str for date_str in date_strs if store.is_current(date_str, stock_dir)]
+        if stored:
+            partitions = store.read_partitions(min(stored), max(stored))
+            for date_str in stored:
+                frames[date_str] = partitions[date_str]
+
+    for date_str in date_strs:
+        if date_str not in frames:
+            frames[date_str] = load_stock_day(date_str, stock_dir, store_dir)
+    return frames
+
+
+def stock_day_exists(date_str: str, stock_dir: str = STOCK_DIR, store_dir: str = STORE_DIR) -> bool:
+    """Checks whether a day's OHLCV rows are available in the market store or Stock Files."""
+    if os.path.exists(os.path.join(stock_dir, f"{date_str}.csv")):
+        return True
+    return os.path.exists(os.path.join(store_dir, 'index.csv')) and MarketStore(store_dir).has_date(date_str)
+
+
+if __name__ == "__main__":
+    store = MarketStore()
+    imported = store.import_stock_files()
+    print(f"Imported {len(imported)} days into {STORE_DIR} ({len(store.dates())} days stored).")
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import threading
+import functools
+import contextlib
+from datetime import datetime
+
+# Set METRICS_FILE (e.g. Metrics/run.jsonl, or Metrics/run.prom for Prometheus text) to turn metrics on.
+METRICS_FILE = os.getenv('METRICS_FILE')
+PREFIX = "smsp_"
+
+# Histogram bucket upper bounds in seconds (the Prometheus `le` labels).
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, float('inf')]
+
+_OFF = contextlib.nullcontext()
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max,
+                'mean': self.sum / self.count if self.count else None}
+
+
+class _Span:
+    def __init__(self, metrics, name: str, labels: dict, detail: dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.detail = detail
+
+    def __enter__(self):
+        self.started = datetime.now().isoformat(timespec='milliseconds')
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        labels = dict(self.labels, stage=self.name, outcome='error' if exc_type else 'ok')
+        self.metrics.observe('span_seconds', seconds, **labels)
+        self.metrics.event('span', name=self.name, labels=self.labels, **self.detail, start=self.started,
+                           seconds=seconds, error=exc_type.__name__ if exc_type else None)
+        return False
+
+
+class Metrics:
+    """Process-wide timings, latency histograms and counters, written out at exit.
+
+    Off by default: span() then returns a shared no-op context and the
+    instrumented call sites skip their timing, so the cost is one attribute
+    check. enable(path) (or the METRICS_FILE environment variable) turns it on;
+    flush() writes a .prom path as Prometheus text and anything else as JSON
+    lines (the span and LLM-call events since the last flush, then a cumulative
+    summary line).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.histograms = {}
+        self.counters = {}
+        self.events = []
+        self._lock = threading.Lock()
+        self._registered = False
+        self._dirty = False
+
+    def enable(self, path: str) -> None:
+        self.enabled = True
+        self.path = path
+        if not self._registered:
+            atexit.register(self._flush_at_exit)
+            self._registered = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.events.clear()
+            self._dirty = False
+
+    def span(self, name: str, detail: dict = None, **labels):
+        """Times a block: `with METRICS.span('load_prompt', prompt_type='d'): ...`.
+
+        Labels key the span's histogram; `detail` (e.g. the date) only goes into its event.
+        """
+        if not self.enabled:
+            return _OFF
+        return _Span(self, name, labels, detail or {})
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+            self._dirty = True
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            self._dirty = True
+
+    def event(self, kind: str, **fields) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.events.append({'type': kind, **fields})
+            self._dirty = True
+
+    def record_llm(self, response, seconds: float, **labels) -> None:
+        """Records one completion's latency and the token counts from its `usage`."""
+        if not self.enabled:
+            return
+        usage = getattr(response, 'usage', None)
+        tokens = {
+            'prompt': getattr(usage, 'prompt_tokens', None),
+            'completion': getattr(usage, 'completion_tokens', None),
+            'cached': getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', None),
+            'reasoning': getattr(getattr(usage, 'completion_tokens_details', None), 'reasoning_tokens', None),
+        }
+        self.observe('llm_seconds', seconds, **labels)
+        for kind, value in tokens.items():
+            if value is not None:
+                self.count('llm_tokens_total', value, kind=kind, **labels)
+        self.event('llm', labels=labels, seconds=seconds, tokens=tokens)
+
+    def snapshot(self) -> dict:
+        """Summary of every histogram and counter, keyed by name and then by label string."""
+        with self._lock:
+            summary = {'histograms': {}, 'counters': {}}
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                summary['histograms'].setdefault(name, {})[_label_string(labels)] = histogram.to_dict()
+            for (name, labels), value in sorted(self.counters.items()):
+                summary['counters'].setdefault(name, {})[_label_string(labels)] = value
+        return summary
+
+    def flush(self, path: str = None) -> str:
+        """Writes the collected metrics to path (default: the enabled path); returns the path or None."""
+        path = path or self.path
+        if path is None or not (self.histograms or self.counters or self.events):
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith('.prom'):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus())
+        else:
+            with self._lock:
+                events = list(self.events)
+                self.events.clear()
+            with open(path, 'a', encoding='utf-8') as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+                f.write(json.dumps({'type': 'summary', 'time': datetime.now().isoformat(timespec='seconds'),
+                                    **self.snapshot()}) + "\n")
+        self._dirty = False
+        return path
+
+    def _flush_at_exit(self) -> None:
+        if self.enabled and self._dirty:
+            self.flush()
+
+    def prometheus(self) -> str:
+        """The histograms and counters in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        typed = set()
+        for (name, labels), histogram in histograms:
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, histogram.buckets):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{metric}_bucket{_prometheus_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{metric}_sum{_prometheus_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{_prometheus_labels(labels)} {histogram.count}")
+        for (name, labels), value in counters:
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_prometheus_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _label_string(labels) -> str:
+    return ",".join(f"{key}={value}" for key, value in labels)
+
+
+def _prometheus_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+METRICS = Metrics()
+if METRICS_FILE:
+    METRICS.enable(METRICS_FILE)
+
+
+def timed(name: str):
+    """Decorator timing every call of a function as the span `name` (a plain call when metrics are off)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return fn(*args, **kwargs)
+            with METRICS.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_fetch(fetch_one, symbol, source: str):
+    """Calls fetch_one(symbol), recording its latency as ok / empty (None) / error when metrics are on."""
+    if not METRICS.enabled:
+        return fetch_one(symbol)
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        result = fetch_one(symbol)
+        outcome = 'empty' if result is None else 'ok'
+        return result
+    finally:
+        METRICS.observe('fetch_symbol_seconds', time.perf_counter() - start, source=source, outcome=outcome)
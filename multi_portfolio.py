@@ -0,0 +1,325 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from market_store import load_stock_day, stock_day_exists
+from update_portfolio import update_portfolio as mark_portfolio, PORTFOLIO_COLUMNS
+from make_portfolio import update_portfolio as apply_weekend_trades
+from send_prompt import load_prompt, save_response, get_temperature, make_client, MODEL, BASE_URL
+from response_cache import ResponseCache, MODES
+from trade_engine import DEFAULT_CASH
+from trading_calendar import is_trading_day, is_week_close, next_trading_day, week_sessions, week_start
+
+PORTFOLIOS_DIR = "Portfolios"
+CONFIG_FILE = os.path.join(PORTFOLIOS_DIR, "portfolios.json")
+STAGES = ['mark', 'prompt', 'trades']
+NUMERIC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class PortfolioConfig:
+    """One of several portfolios run side by side on the same market data.
+
+    Each has its own capital, model endpoint, sampling temperature (None keeps
+    the per-prompt-type default) and prompt template folder, and keeps all of
+    its files under Portfolios/<name>/: Portfolio Files, Grok Daily Reviews
+    and, if started, a Ledger.
+    """
+
+    def __init__(self, name: str, cash: float = DEFAULT_CASH, model: str = MODEL, temperature: float = None,
+                 prompt_dir: str = "./Prompts", base_url: str = BASE_URL, api_key_env: str = 'API_KEY',
+                 root: str = PORTFOLIOS_DIR):
+        if not name or os.path.basename(name) != name or name in ['.', '..']:
+            raise ValueError(f"Invalid portfolio name '{name}': use a plain folder name.")
+        self.name = name
+        self.cash = float(cash)
+        self.model = model
+        self.temperature = temperature
+        self.prompt_dir = prompt_dir
+        self.base_url = base_url
+        self.api_key_env = api_key_env
+        self.root = root
+        self.portfolio_dir = os.path.join(root, name, "Portfolio Files")
+        self.reviews_dir = os.path.join(root, name, "Grok Daily Reviews")
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> 'PortfolioConfig':
+        return cls(**entry)
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'cash': self.cash, 'model': self.model, 'temperature': self.temperature,
+                'prompt_dir': self.prompt_dir, 'base_url': self.base_url, 'api_key_env': self.api_key_env,
+                'root': self.root}
+
+    def temperature_for(self, prompt_type: str) -> float:
+        return self.temperature if self.temperature is not None else get_temperature(prompt_type)
+
+
+def load_configs(path: str = CONFIG_FILE) -> list:
+    """Reads the portfolio list, a JSON array of PortfolioConfig fields, e.g.
+
+        [{"name": "grok4-25k"},
+         {"name": "grok4-1L-cool", "cash": 100000, "temperature": 0.1},
+         {"name": "mini-variant", "model": "grok-3-mini", "prompt_dir": "./Prompts/variant-a"}]
+
+    Raises:
+        FileNotFoundError: If the config file does not exist.
+        ValueError: If an entry is invalid or two portfolios share a name.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No portfolio config found at {path}.")
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    try:
+        configs = [PortfolioConfig.from_dict(entry) for entry in entries]
+    except TypeError as e:
+        raise ValueError(f"Invalid portfolio config in {path}: {e}")
+    names = [config.name for config in configs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate portfolio names in {path}: {', '.join(duplicates)}")
+    return configs
+
+
+class SharedStockDay:
+    """One day's stock rows in a shared-memory block, so pool workers read them without re-parsing or pickling.
+
+    Layout: OHLCV as a float64 (5, rows) array, then Symbol and Date as
+    fixed-width strings and Category as int8 codes into spec['categories'].
+    The parent creates and finally close()s the block; workers attach through
+    attach_stock_day(spec).
+    """
+
+    def __init__(self, date_str: str, df: pd.DataFrame):
+        rows = len(df)
+        symbols = df['Symbol'].astype(str).to_numpy(dtype='U')
+        dates = df['Date'].astype(str).to_numpy(dtype='U10')
+        categories = sorted(df['Category'].astype(str).unique())
+        codes = pd.Categorical(df['Category'].astype(str), categories=categories).codes.astype(np.int8)
+        self.spec = {'date': date_str, 'rows': rows, 'width': max(1, symbols.dtype.itemsize // 4),
+                     'categories': categories}
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, _block_size(self.spec)))
+        self.spec['name'] = self.shm.name
+
+        numbers, symbol_view, date_view, code_view = _views(self.shm.buf, self.spec)
+        numbers[:] = df[NUMERIC_COLUMNS].to_numpy(dtype=float).T
+        symbol_view[:] = symbols
+        date_view[:] = dates
+        code_view[:] = codes
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _block_size(spec: dict) -> int:
+    rows = spec['rows']
+    return len(NUMERIC_COLUMNS) * rows * 8 + rows * spec['width'] * 4 + rows * 10 * 4 + rows
+
+
+def _views(buffer, spec: dict) -> tuple:
+    rows, width = spec['rows'], spec['width']
+    offset = 0
+    numbers = np.ndarray((len(NUMERIC_COLUMNS), rows), dtype=np.float64, buffer=buffer, offset=offset)
+    offset += numbers.nbytes
+    symbols = np.ndarray(rows, dtype=f'U{width}', buffer=buffer, offset=offset)
+    offset += symbols.nbytes
+    dates = np.ndarray(rows, dtype='U10', buffer=buffer, offset=offset)
+    offset += dates.nbytes
+    codes = np.ndarray(rows, dtype=np.int8, buffer=buffer, offset=offset)
+    return numbers, symbols, dates, codes
+
+
+_ATTACHED = {}
+
+
+def attach_stock_day(spec: dict) -> pd.DataFrame:
+    """Rebuilds the day's stock rows (load_stock_day layout) from a SharedStockDay block; cached per process."""
+    if spec['name'] in _ATTACHED:
+        return _ATTACHED[spec['name']]
+    # Pool workers share the parent's resource tracker, so attaching does not take ownership of the block
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    try:
+        numbers, symbols, dates, codes = _views(shm.buf, spec)
+        df = pd.DataFrame({'Symbol': symbols.astype(object), 'Date': dates.astype(object)})
+        for i, column in enumerate(NUMERIC_COLUMNS):
+            df[column] = numbers[i].copy()
+        df['Volume'] = df['Volume'].astype('int64')
+        df['Category'] = np.array(spec['categories'], dtype=object)[codes]
+        del numbers, symbols, dates, codes  # views into the block must go before it can be closed
+    finally:
+        shm.close()
+    _ATTACHED[spec['name']] = df
+    return df
+
+
+_CLIENTS = {}
+
+
+def _client(portfolio: PortfolioConfig):
+    key = (portfolio.base_url, portfolio.api_key_env)
+    if key not in _CLIENTS:
+        _CLIENTS[key] = make_client(portfolio.base_url, portfolio.api_key_env)
+    return _CLIENTS[key]
+
+
+def _previous_file(directory: str, date_str: str) -> str:
+    dates = sorted(os.path.splitext(name)[0] for name in os.listdir(directory) if name.endswith('.csv'))
+    earlier = [d for d in dates if d < date_str]
+    return os.path.join(directory, f"{earlier[-1]}.csv") if earlier else None
+
+
+def _prepare_portfolio_file(portfolio: PortfolioConfig, date_str: str) -> None:
+    """Carries the latest earlier portfolio forward to date_str, or starts an all-cash (empty) one."""
+    portfolio_file = os.path.join(portfolio.portfolio_dir, f"{date_str}.csv")
+    if os.path.exists(portfolio_file):
+        return
+    os.makedirs(portfolio.portfolio_dir, exist_ok=True)
+    previous = _previous_file(portfolio.portfolio_dir, date_str)
+    if previous is not None:
+        df = pd.read_csv(previous)
+    else:
+        df = pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+    df.to_csv(portfolio_file, index=False)
+
+
+def _prompt(portfolio: PortfolioConfig, prompt_type: str, date_str: str, frames: dict, cache: ResponseCache) -> bool:
+    """Renders, submits and saves one prompt unless its reply already exists; returns whether it ran."""
+    sub_dir = "Weekends" if prompt_type == 't' else "Weekdays"
+    if os.path.exists(os.path.join(portfolio.reviews_dir, sub_dir, f"{prompt_type}_{date_str}.json")):
+        return False
+    prompt = load_prompt(prompt_type, date_str, portfolio_dir=portfolio.portfolio_dir, reviews_dir=portfolio.reviews_dir,
+                         prompt_dir=portfolio.prompt_dir, default_cash=portfolio.cash, stock_frames=frames)
+    response = cache.complete(_client(portfolio).chat.completions.create, portfolio.model, prompt,
+                              portfolio.temperature_for(prompt_type))
+    save_response(response, prompt_type, date_str, sub_dir, base_dir=portfolio.reviews_dir)
+    return True
+
+
+def run_portfolio_day(config: dict, date_str: str, specs: dict, stages=STAGES, cache_mode: str = 'read_through') -> dict:
+    """Worker task: mark, prompt and (on the week's last trading day) apply trades for one portfolio on one day.
+
+    Args:
+        config (dict): PortfolioConfig.to_dict().
+        date_str (str): Date in YYYY-MM-DD format.
+        specs (dict): {date: SharedStockDay.spec} for date_str and any earlier days its prompts need.
+        stages (list): Subset of STAGES.
+        cache_mode (str): ResponseCache mode for the completions.
+
+    Returns:
+        dict: portfolio, date and the steps that ran.
+    """
+    portfolio = PortfolioConfig.from_dict(config)
+    current = {spec['name'] for spec in specs.values()}
+    for name in [name for name in _ATTACHED if name not in current]:
+        del _ATTACHED[name]
+    frames = {d: attach_stock_day(spec) for d, spec in specs.items()}
+    day = frames[date_str]
+    week_close = is_week_close(date_str)
+    done = []
+
+    if 'mark' in stages:
+        _prepare_portfolio_file(portfolio, date_str)
+        mark_portfolio(date_str, portfolio.portfolio_dir, day)
+        done.append('mark')
+    if 'prompt' in stages:
+        cache = ResponseCache(mode=cache_mode)
+        prompt_type = 'd' if is_trading_day(date_str) else 'n'
+        if _prompt(portfolio, prompt_type, date_str, frames, cache):
+            done.append(prompt_type)
+        if week_close and _prompt(portfolio, 't', date_str, frames, cache):
+            done.append('t')
+    if 'trades' in stages and week_close:
+        next_day = next_trading_day(date_str)
+        apply_weekend_trades(date_str, next_day, portfolio.portfolio_dir, portfolio.reviews_dir, portfolio.cash)
+        done.append('trades')
+    return {'portfolio': portfolio.name, 'date': date_str, 'done': done}
+
+
+def run(configs: list, start_date: str, end_date: str = None, stages=STAGES, workers: int = None,
+        cache_mode: str = 'read_through') -> tuple:
+    """Runs every portfolio through each weekday from start_date to end_date.
+
+    Days run in order (each portfolio depends on its previous day). Within a
+    day, the stock data is loaded once into shared memory and the portfolios
+    are fanned out across a process pool. The weekend prompt on the week's
+    last trading day also needs the week's earlier sessions, which stay shared
+    until the next week starts.
+
+    Returns:
+        tuple: (list of result dicts, {(portfolio, date): error message}).
+    """
+    results, failures = [], {}
+    shared = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for day in pd.bdate_range(start_date, end_date or start_date):
+                date_str = day.strftime('%Y-%m-%d')
+                if not stock_day_exists(date_str):
+                    print(f"No stock data for {date_str}; skipping.")
+                    continue
+                needed = week_sessions(date_str) if is_week_close(date_str) and 'prompt' in stages else [date_str]
+                for d in needed:
+                    if d not in shared and stock_day_exists(d):
+                        shared[d] = SharedStockDay(d, load_stock_day(d))
+                specs = {d: shared[d].spec for d in needed if d in shared}
+
+                futures = {pool.submit(run_portfolio_day, config.to_dict(), date_str, specs, stages, cache_mode): config.name
+                           for config in configs}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        failures[(name, date_str)] = str(e) or type(e).__name__
+                        print(f"{name} {date_str}: {failures[(name, date_str)]}")
+                        continue
+                    results.append(result)
+                    print(f"{name} {date_str}: {', '.join(result['done']) or 'up to date'}")
+
+                for d in [d for d in shared if d < week_start(date_str)]:
+                    shared.pop(d).close()
+    finally:
+        for block in shared.values():
+            block.close()
+    return results, failures
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run several portfolios side by side over a date or date range.")
+    parser.add_argument('start', help="First date (YYYY-MM-DD)")
+    parser.add_argument('end', nargs='?', help="Last date (YYYY-MM-DD); defaults to start")
+    parser.add_argument('--config', default=CONFIG_FILE, help="Portfolio list (JSON)")
+    parser.add_argument('--only', help="Comma-separated portfolio names to run")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--cache-mode', choices=MODES, default='read_through', help="Response cache mode")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}")
+    for date_str in [args.start, args.end]:
+        if date_str is not None:
+            try:
+                datetime.strptime(date_str, '%Y-%m-%d')
+            except ValueError:
+                parser.error(f"Invalid date '{date_str}'. Please use YYYY-MM-DD (e.g., 2025-09-19).")
+    try:
+        configs = load_configs(args.config)
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+    if args.only:
+        names = {name.strip() for name in args.only.split(',')}
+        configs = [config for config in configs if config.name in names]
+
+    results, failures = run(configs, args.start, args.end, stages, args.workers, args.cache_mode)
+    print(f"\n{len(results)} portfolio-days completed, {len(failures)} failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import os
+import shutil
+import hashlib
+import argparse
+import pandas as pd
+from datetime import datetime
+import extract_data
+import extract_data_yfinance
+import bhavcopy
+import hedged_fetch
+from update_portfolio import update_portfolio as mark_portfolio
+from make_portfolio import update_portfolio as apply_weekend_trades
+from send_prompt import client, load_prompt, save_response, get_temperature, MODEL
+from response_cache import ResponseCache
+from metrics import METRICS
+import trading_calendar
+
+STAGES = ['fetch', 'mark', 'prompt', 'trades']
+SOURCES = ['nse', 'yfinance', 'bhavcopy', 'hedged']
+STOCK_DIR = "Stock Files"
+PORTFOLIO_DIR = "Portfolio Files"
+REVIEWS_DIR = "Grok Daily Reviews"
+
+
+class Step:
+    """One pipeline action for one date, with the files it reads and writes.
+
+    A step is up to date when all of its outputs exist and none is older than
+    any of its inputs (make-style); up-to-date steps are skipped. Steps with
+    keep_existing (the Grok prompts) only run when their output is missing:
+    a saved reply is a record that cannot be reproduced, not a build product.
+    A step with a `complete` check also runs when that check says its existing
+    outputs are unusable (e.g. an empty Stock File on a trading day).
+    """
+
+    def __init__(self, stage: str, date_str: str, description: str, inputs: list, outputs: list, action,
+                 keep_existing: bool = False, complete=None):
+        self.stage = stage
+        self.date_str = date_str
+        self.description = description
+        self.inputs = inputs
+        self.outputs = outputs
+        self.action = action
+        self.keep_existing = keep_existing
+        self.complete = complete
+
+    def is_stale(self, changed: set) -> bool:
+        """True if an output is missing or older than an input, or another step of this run changed one of its files."""
+        if not all(os.path.exists(path) for path in self.outputs):
+            return True
+        if self.complete is not None and not self.complete():
+            return True
+        if self.keep_existing:
+            return False
+        if any(path in changed for path in self.inputs + self.outputs):
+            return True
+        inputs = [os.path.getmtime(path) for path in self.inputs if os.path.exists(path)]
+        return bool(inputs) and min(os.path.getmtime(path) for path in self.outputs) < max(inputs)
+
+
+def _stock_file(date_str: str) -> str:
+    return os.path.join(STOCK_DIR, f"{date_str}.csv")
+
+
+def _portfolio_file(date_str: str) -> str:
+    return os.path.join(PORTFOLIO_DIR, f"{date_str}.csv")
+
+
+def _review_file(prompt_type: str, date_str: str) -> str:
+    sub_dir = "Weekends" if prompt_type == 't' else "Weekdays"
+    return os.path.join(REVIEWS_DIR, sub_dir, f"{prompt_type}_{date_str}.json")
+
+
+def _previous_portfolio(date_str: str) -> str:
+    """Latest Portfolio Files CSV dated before date_str, or None."""
+    dates = sorted(os.path.splitext(name)[0] for name in os.listdir(PORTFOLIO_DIR) if name.endswith('.csv'))
+    earlier = [d for d in dates if d < date_str]
+    return _portfolio_file(earlier[-1]) if earlier else None
+
+
+def is_trading_day(date_str: str) -> bool:
+    """A weekday that is not an NSE holiday (see trading_calendar); no data or network needed."""
+    return trading_calendar.is_trading_day(date_str)
+
+
+def stock_file_complete(date_str: str) -> bool:
+    """False if date_str is a trading day but its Stock File has no rows (a failed or too-early fetch)."""
+    if not is_trading_day(date_str):
+        return True
+    return not pd.read_csv(_stock_file(date_str)).dropna(subset=['Symbol']).empty
+
+
+def fetch_day(date_str: str, source: str, workers: int) -> None:
+    if source == 'bhavcopy':
+        bhavcopy.fetch_stock_data_bhavcopy(date_str)
+    elif source == 'yfinance':
+        extract_data_yfinance.fetch_stock_data(date_str, workers=workers)
+    elif source == 'hedged':
+        hedged_fetch.fetch_stock_data(date_str, workers=workers)
+    else:
+        extract_data.fetch_stock_data(date_str, workers=workers)
+
+
+def mark_day(date_str: str) -> None:
+    """Marks Portfolio Files/<date>.csv to the day's closes, first carrying the previous portfolio forward if needed."""
+    portfolio_file = _portfolio_file(date_str)
+    if not os.path.exists(portfolio_file):
+        previous = _previous_portfolio(date_str)
+        if previous is None:
+            raise FileNotFoundError(f"No portfolio file on or before {date_str} to carry forward.")
+        shutil.copyfile(previous, portfolio_file)
+        print(f"Carried {previous} forward to {portfolio_file}")
+    mark_portfolio(date_str)
+
+
+def prompt_day(prompt_type: str, date_str: str, cache: ResponseCache) -> None:
+    prompt = load_prompt(prompt_type, date_str)
+    response = cache.complete(client.chat.completions.create, MODEL, prompt, get_temperature(prompt_type))
+    save_response(response, prompt_type, date_str, "Weekends" if prompt_type == 't' else "Weekdays")
+
+
+def plan(start_date: str, end_date: str = None, stages=STAGES, source: str = 'nse', workers: int = 8,
+         cache: ResponseCache = None) -> list:
+    """Builds the ordered steps for every weekday from start_date to end_date (inclusive).
+
+    Per day: fetch -> mark -> prompt (d, or n on an NSE holiday). On the week's last
+    trading day (normally Friday) the weekend prompt (t) follows, and its trades build
+    the next trading day's portfolio.
+
+    Returns:
+        list: Step objects in execution order.
+    """
+    cache = cache or ResponseCache()
+    steps = []
+    days = pd.bdate_range(start_date, end_date or start_date)
+    for day in days:
+        date_str = day.strftime('%Y-%m-%d')
+        stock_file = _stock_file(date_str)
+        portfolio_file = _portfolio_file(date_str)
+
+        if 'fetch' in stages:
+            steps.append(Step('fetch', date_str, f"fetch OHLCV ({source})", [], [stock_file],
+                              lambda d=date_str: fetch_day(d, source, workers),
+                              complete=lambda d=date_str: stock_file_complete(d)))
+        if 'mark' in stages:
+            steps.append(Step('mark', date_str, "mark portfolio to closes", [stock_file], [portfolio_file],
+                              lambda d=date_str: mark_day(d)))
+        daily_type = 'd' if is_trading_day(date_str) else 'n'
+        daily_file = _review_file(daily_type, date_str)
+        if 'prompt' in stages:
+            steps.append(Step('prompt', date_str, f"daily prompt ({daily_type})", [stock_file, portfolio_file],
+                              [daily_file], lambda t=daily_type, d=date_str: prompt_day(t, d, cache),
+                              keep_existing=True))
+
+        if trading_calendar.is_week_close(date_str):
+            weekend_file = _review_file('t', date_str)
+            if 'prompt' in stages:
+                week = trading_calendar.week_sessions(date_str)
+                inputs = [_stock_file(d) for d in week] + [portfolio_file, daily_file]
+                steps.append(Step('prompt', date_str, "weekend prompt (t)", inputs, [weekend_file],
+                                  lambda d=date_str: prompt_day('t', d, cache), keep_existing=True))
+            if 'trades' in stages:
+                next_day = trading_calendar.next_trading_day(date_str)
+                steps.append(Step('trades', date_str, f"apply weekend trades -> {next_day}",
+                                  [weekend_file, portfolio_file], [_portfolio_file(next_day)],
+                                  lambda d=date_str, n=next_day: apply_weekend_trades(d, n)))
+    return steps
+
+
+def _fingerprint(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def run(steps: list, dry_run: bool = False, force: bool = False, force_prompts: bool = False) -> list:
+    """Runs the stale steps in order, or only prints the plan if dry_run.
+
+    Steps downstream of a file this run actually changed are treated as stale; a
+    step that rewrites its output with identical content does not trigger them.
+    A dry run assumes every planned step changes its outputs. force reruns every
+    step except keep_existing ones (the paid Grok prompts) whose reply is saved;
+    force_prompts re-sends those too. Stops at the first failing step, reporting it.
+
+    Returns:
+        list: The steps that ran (or would run).
+    """
+    changed = set()
+    ran = []
+    for step in steps:
+        stale = step.is_stale(changed) or force and (force_prompts or not step.keep_existing)
+        label = f"{step.date_str} {step.stage:<6} {step.description}"
+        if not stale:
+            print(f"  skip  {label} (up to date)")
+            continue
+        print(f"  {'plan' if dry_run else 'run '}  {label} -> {', '.join(step.outputs)}")
+        ran.append(step)
+        if dry_run:
+            changed.update(step.outputs)
+            continue
+        before = {path: _fingerprint(path) for path in step.outputs}
+        try:
+            with METRICS.span(f"pipeline.{step.stage}", {'date': step.date_str}):
+                step.action()
+        except Exception as e:
+            # Missing data and API errors alike: report the failing step instead of a traceback
+            print(f"Error in {step.stage} ({step.description}) for {step.date_str}: {type(e).__name__}: {e}")
+            break
+        changed.update(path for path in step.outputs if _fingerprint(path) != before[path])
+    return ran
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run fetch -> mark -> prompt -> trades for a date or date range.")
+    parser.add_argument('start', help="First date (YYYY-MM-DD)")
+    parser.add_argument('end', nargs='?', help="Last date (YYYY-MM-DD); defaults to start")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument('--source', choices=SOURCES, default='nse', help="Where to fetch OHLCV from")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent fetch workers")
+    parser.add_argument('--dry-run', action='store_true', help="Show the plan without running anything")
+    parser.add_argument('--force', action='store_true',
+                        help="Run every step even if its outputs are up to date, except prompts already answered")
+    parser.add_argument('--force-prompts', action='store_true',
+                        help="With --force, also re-send prompts whose Grok reply is saved (paid calls)")
+    parser.add_argument('--metrics', help="Write stage timings, fetch latencies and LLM usage to this file "
+                                          "(.prom for Prometheus text, else JSON lines)")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}")
+    for date_str in [args.start, args.end]:
+        if date_str is not None:
+            try:
+                datetime.strptime(date_str, '%Y-%m-%d')
+            except ValueError:
+                parser.error(f"Invalid date '{date_str}'. Please use YYYY-MM-DD (e.g., 2025-09-19).")
+
+    if args.metrics:
+        METRICS.enable(args.metrics)
+    steps = plan(args.start, args.end, stages, args.source, args.workers)
+    ran = run(steps, dry_run=args.dry_run, force=args.force, force_prompts=args.force_prompts)
+    print(f"\n{len(ran)} of {len(steps)} steps {'would run' if args.dry_run else 'ran'}.")
+    if METRICS.enabled:
+        print(f"Metrics written to {METRICS.flush()}")
+
+
+if __name__ == "__main__":
+    main()
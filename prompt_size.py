@@ -0,0 +1,51 @@
+import re
+import math
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_ENCODING = None
+_PIECES = re.compile(r"\d+|[^\W\d_]+|\S")
+
+
+def count_tokens(text: str) -> int:
+    """Counts prompt tokens with tiktoken's o200k_base if installed, otherwise estimates them.
+
+    The estimate splits text into digit runs (about 3 digits per token), letter
+    runs (about 4 letters per token) and single punctuation/symbol tokens, which
+    tracks BPE counts closely on the number-heavy stock tables. The estimate is
+    also used if tiktoken cannot load its encoding (it downloads it on first use).
+    """
+    global _ENCODING, tiktoken
+    if tiktoken is not None and _ENCODING is None:
+        try:
+            _ENCODING = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            tiktoken = None
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece.isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+
+def measure(text: str) -> dict:
+    """Returns {'chars', 'tokens'} for a prompt."""
+    return {'chars': len(text), 'tokens': count_tokens(text)}
+
+
+def size_report(before: str, after: str) -> str:
+    """One-line comparison of two renderings of the same prompt."""
+    old, new = measure(before), measure(after)
+    chars_saved = (1 - new['chars'] / old['chars']) * 100 if old['chars'] else 0
+    tokens_saved = (1 - new['tokens'] / old['tokens']) * 100 if old['tokens'] else 0
+    return (f"Prompt size: {new['chars']:,} chars / {new['tokens']:,} tokens "
+            f"(verbose: {old['chars']:,} / {old['tokens']:,}; saved {chars_saved:.1f}% chars, {tokens_saved:.1f}% tokens)")
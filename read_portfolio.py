@@ -1,15 +1,23 @@
 import pandas as pd
 import os
 from datetime import datetime
+from ledger import Ledger, LEDGER_DIR
+from render_cache import PORTFOLIO_RENDERS, file_identity, format_fixed
+from metrics import timed
 
-def get_portfolio_string(date_input: str, default_cash: float = 25000.00) -> str:
+@timed('read_portfolio')
+def get_portfolio_string(date_input: str, default_cash: float = 25000.00, use_ledger: bool = False,
+                         portfolio_dir: str = "Portfolio Files") -> str:
     """
     Reads the portfolio CSV for the given date and returns a formatted portfolio string.
     If the CSV is empty (only headers), assumes portfolio is entirely in cash with default_cash value.
+    With use_ledger=True the portfolio is rebuilt from the event ledger instead of the CSV.
     
     Args:
         date_input (str): Date in YYYY-MM-DD format.
         default_cash (float): Default cash amount for empty portfolio (default: 100.00).
+        use_ledger (bool): Read holdings from Ledger (nearest snapshot + replayed events).
+        portfolio_dir (str): Directory of the portfolio's daily CSVs; its ledger is the Ledger folder beside it.
     
     Returns:
         str: Formatted portfolio string.
@@ -18,7 +26,8 @@ def get_portfolio_string(date_input: str, default_cash: float = 25000.00) -> str
         ValueError: If date format is invalid or CSV is missing required columns.
         FileNotFoundError: If CSV file does not exist.
     """
-    output_dir = "Portfolio Files"
+    output_dir = portfolio_dir
+    ledger_dir = os.path.join(os.path.dirname(portfolio_dir), LEDGER_DIR)
     
     try:
         target_date = datetime.strptime(date_input, '%Y-%m-%d')
@@ -27,11 +36,21 @@ def get_portfolio_string(date_input: str, default_cash: float = 25000.00) -> str
     
     csv_file = os.path.join(output_dir, f"{target_date.strftime('%Y-%m-%d')}.csv")
     
-    if not os.path.exists(csv_file):
+    if use_ledger:
+        key = ('ledger', target_date.strftime('%Y-%m-%d'), default_cash,
+               file_identity(os.path.join(ledger_dir, 'events.jsonl')))
+        return PORTFOLIO_RENDERS.get(key, lambda: _render_portfolio(
+            Ledger(ledger_dir).portfolio_at(target_date.strftime('%Y-%m-%d')), default_cash))
+    
+    source = file_identity(csv_file)
+    if source is None:
         raise FileNotFoundError(f"No portfolio file found for {target_date.strftime('%Y-%m-%d')}. Please create it first.")
     
     # Read CSV with error handling
-    df = pd.read_csv(csv_file)
+    return PORTFOLIO_RENDERS.get((source, default_cash), lambda: _render_portfolio(pd.read_csv(csv_file), default_cash))
+
+
+def _render_portfolio(df: pd.DataFrame, default_cash: float) -> str:
     required_cols = ['Holding Name', 'Buying Price', 'Current Price', 'Number of Units', 'Total Amount', 'Perct Change']
     
     # Check for required columns
@@ -52,8 +71,9 @@ def get_portfolio_string(date_input: str, default_cash: float = 25000.00) -> str
     
     portfolio_str = f"Total Portfolio Value: ₹{total_portfolio_value:.2f} (Invested: ₹{total_invested:.2f}, Change: {total_pct_change:+.2f}%)\n\n"
     portfolio_str += "Holdings:\n"
-    for _, row in df.iterrows():
-        pct_change = row['Perct Change']
-        portfolio_str += f"- {row['Holding Name']}: {int(row['Number of Units'])} units @ Buy ₹{row['Buying Price']:.2f}, Current ₹{row['Current Price']:.2f}, Value ₹{row['Total Amount']:.2f}, Change {pct_change:+.2f}%\n"
+    lines = ("- " + df['Holding Name'].astype(str) + ": " + df['Number of Units'].astype(int).astype(str)
+             + " units @ Buy ₹" + format_fixed(df['Buying Price']) + ", Current ₹" + format_fixed(df['Current Price'])
+             + ", Value ₹" + format_fixed(df['Total Amount']) + ", Change " + format_fixed(df['Perct Change'], '%+.2f') + "%\n")
+    portfolio_str += "".join(lines)
     
     return portfolio_str
@@ -1,49 +1,172 @@
 import pandas as pd
 import os
 from datetime import datetime
+from market_store import load_stock_day, load_stock_days, STOCK_DIR, STORE_DIR
+from render_cache import STOCK_RENDERS, file_identity, format_fixed
+from feature_store import FeatureStore, FEATURE_DIR
+from metrics import timed
 
-def get_stock_data_string(date_input: str) -> str:
+REQUIRED_COLUMNS = ['Symbol', 'Category', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _source_key(date_str: str) -> tuple:
+    """Identity of everything load_stock_day(date_str) reads: the store index and the CSV."""
+    return (date_str, file_identity(os.path.join(STORE_DIR, 'index.csv')),
+            file_identity(os.path.join(STOCK_DIR, f"{date_str}.csv")))
+
+
+def _render_key(date_str: str, style: str, features: bool) -> tuple:
+    """Render cache key: the day's sources, the style, and the features file when features are shown."""
+    key = _source_key(date_str) + (style,)
+    if features:
+        key += (file_identity(os.path.join(FEATURE_DIR, f"{date_str}.csv")),)
+    return key
+
+
+def _verbose_lines(df: pd.DataFrame) -> tuple:
+    lines = ("- " + df['Symbol'].astype(str) + ": O ₹" + format_fixed(df['Open']) + ", H ₹" + format_fixed(df['High'])
+             + ", L ₹" + format_fixed(df['Low']) + ", C ₹" + format_fixed(df['Close'])
+             + ", Vol " + df['Volume'].map('{:,.0f}'.format))
+    return "", None, lines
+
+
+def _table_lines(df: pd.DataFrame) -> tuple:
+    lines = (df['Symbol'].astype(str) + "," + format_fixed(df['Open']) + "," + format_fixed(df['High'])
+             + "," + format_fixed(df['Low']) + "," + format_fixed(df['Close'])
+             + "," + format_fixed(df['Volume'], '%.0f'))
+    return ", prices in ₹", "Symbol,Open,High,Low,Close,Volume", lines
+
+
+def _delta_lines(df: pd.DataFrame) -> tuple:
+    close = df['Close'].astype(float)
+    relative = lambda column: format_fixed((df[column].astype(float) / close - 1) * 100, '%+.2f')
+    lines = (df['Symbol'].astype(str) + "," + format_fixed(close) + "," + relative('Open') + "," + relative('High')
+             + "," + relative('Low') + "," + format_fixed(df['Volume'].astype(float) / 1000, '%.0f'))
+    return ", C = close in ₹, O/H/L = % from close, V = volume in thousands", "Symbol,C,O,H,L,V", lines
+
+
+# Stock data renderings, selectable per prompt type (see send_prompt.PROMPT_STOCK_STYLE):
+#   verbose - one readable line per stock (the original format)
+#   table   - CSV rows under a header, same precision as verbose
+#   delta   - close plus open/high/low as % of close and volume in thousands (lossy, smallest)
+# Each returns (title note, column header or None, one line per row of df, without newlines).
+STOCK_STYLES = {
+    'verbose': _verbose_lines,
+    'table': _table_lines,
+    'delta': _delta_lines,
+}
+
+
+# Feature columns added to the prompt (from feature_store): (column, label, verbose format).
+PROMPT_FEATURES = [('Ret5', 'R5%', '%+.1f'), ('Ret20', 'R20%', '%+.1f'), ('ATRPct', 'ATR%', '%.1f'),
+                   ('VolZ20', 'VolZ', '%+.1f'), ('SMA20Dist', 'vsSMA20%', '%+.1f'),
+                   ('SMA50Dist', 'vsSMA50%', '%+.1f'), ('High52Dist', 'vs52wH%', '%+.1f')]
+
+
+def _feature_lines(df: pd.DataFrame, features: pd.DataFrame, style: str) -> tuple:
+    """Per-row feature text to append to the style's lines, and the header columns it adds (None for verbose)."""
+    joined = df[['Symbol']].merge(features, on='Symbol', how='left')
+    joined.index = df.index
+    columns = [column for column, _, _ in PROMPT_FEATURES]
+    if style == 'verbose':
+        parts = [f" {label} " + format_fixed(joined[column], spec).where(joined[column].notna(), 'n/a')
+                 for column, label, spec in PROMPT_FEATURES]
+        text = " |" + parts[0]
+        for part in parts[1:]:
+            text = text + "," + part
+        return text.where(joined[columns].notna().any(axis=1), ''), None
+    text = pd.Series("", index=df.index)
+    for column in columns:
+        text = text + "," + format_fixed(joined[column], '%.1f').where(joined[column].notna(), '')
+    return text, ",".join(label for _, label, _ in PROMPT_FEATURES)
+
+
+def _render_stock_data(date_str: str, df: pd.DataFrame, style: str = 'verbose', features: pd.DataFrame = None) -> str:
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise ValueError("CSV missing required columns. Expected: Symbol, Category, Date, Open, High, Low, Close, Volume")
+    
+    if df.empty:
+        return f"No stock data available for {date_str}."
+    
+    note, header, lines = STOCK_STYLES[style](df)
+    if features is not None:
+        extra, extra_header = _feature_lines(df, features, style)
+        lines = lines + extra
+        header = f"{header},{extra_header}" if header and extra_header else header
+    lines = lines + "\n"
+    
+    parts = [f"Stock Data for {date_str} ({len(df)} stocks total{note}):\n\n"]
+    for category in sorted(df['Category'].unique()):
+        cat_df = df[df['Category'] == category].sort_values('Volume', ascending=False)
+        parts.append(f"{category} Stocks ({header}):\n" if header else f"{category} Stocks:\n")
+        parts.append("".join(lines[cat_df.index]))
+        parts.append("\n")
+    
+    return "".join(parts)
+
+
+def _check_style(style: str) -> None:
+    if style not in STOCK_STYLES:
+        raise ValueError(f"Unknown stock data style '{style}'. Expected one of: {', '.join(STOCK_STYLES)}")
+
+def _load_features(date_str: str) -> pd.DataFrame:
+    return FeatureStore().features(date_str)
+
+
+@timed('read_stocks')
+def get_stock_data_string(date_input: str, stock_df: pd.DataFrame = None, style: str = 'verbose',
+                          features: bool = False) -> str:
     """
-    Reads the stock CSV for the given date and returns a formatted OHLCV string.
+    Reads the stock data for the given date (market store, else Stock Files CSV)
+    and returns a formatted OHLCV string.
     
     Args:
         date_input (str): Date in YYYY-MM-DD format.
+        stock_df (pd.DataFrame): Rows for the date if already loaded (e.g. by a multi-day read).
+        style (str): Rendering from STOCK_STYLES ('verbose', 'table' or 'delta').
+        features (bool): Append each stock's technical indicators from the feature store.
     
     Returns:
         str: Formatted stock data string.
     
     Raises:
-        ValueError: If date format is invalid.
-        FileNotFoundError: If CSV file does not exist.
+        ValueError: If date format or style is invalid.
+        FileNotFoundError: If CSV file (or, with features, the day's features) does not exist.
         ValueError: If CSV is missing required columns.
     """
-    output_dir = "Stock Files"
-    
     try:
         target_date = datetime.strptime(date_input, '%Y-%m-%d')
     except ValueError:
         raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-17).")
     
-    csv_file = os.path.join(output_dir, f"{target_date.strftime('%Y-%m-%d')}.csv")
-    
-    if not os.path.exists(csv_file):
-        raise FileNotFoundError(f"No stock file found for {target_date.strftime('%Y-%m-%d')}. Please create it first.")
-    
-    df = pd.read_csv(csv_file)
-    required_cols = ['Symbol', 'Category', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
-    if not all(col in df.columns for col in required_cols):
-        raise ValueError("CSV missing required columns. Expected: Symbol, Category, Date, Open, High, Low, Close, Volume")
-    
-    if df.empty:
-        return f"No stock data available for {target_date.strftime('%Y-%m-%d')}."
-    
-    stock_str = f"Stock Data for {target_date.strftime('%Y-%m-%d')} ({len(df)} stocks total):\n\n"
-    
-    for category in sorted(df['Category'].unique()):
-        cat_df = df[df['Category'] == category].sort_values('Volume', ascending=False)
-        stock_str += f"{category} Stocks:\n"
-        for _, row in cat_df.iterrows():
-            stock_str += f"- {row['Symbol']}: O ₹{row['Open']:.2f}, H ₹{row['High']:.2f}, L ₹{row['Low']:.2f}, C ₹{row['Close']:.2f}, Vol {row['Volume']:,.0f}\n"
-        stock_str += "\n"
+    _check_style(style)
+    date_str = target_date.strftime('%Y-%m-%d')
+    if stock_df is not None:
+        return _render_stock_data(date_str, stock_df.reset_index(drop=True), style,
+                                  _load_features(date_str) if features else None)
+    # Features are read only on a render cache miss; their file is part of the key
+    return STOCK_RENDERS.get(_render_key(date_str, style, features),
+                             lambda: _render_stock_data(date_str, load_stock_day(date_str).reset_index(drop=True),
+                                                        style, _load_features(date_str) if features else None))
+
+
+@timed('read_stocks')
+def get_stock_data_strings(date_inputs, style: str = 'verbose', features: bool = False) -> dict:
+    """
+    Returns {date: formatted OHLCV string} for several dates. Dates already rendered
+    from unchanged files come from the render cache; the rest are loaded with one
+    multi-day read.
     
-    return stock_str
+    Raises:
+        FileNotFoundError: If a date is in neither the market store nor Stock Files.
+    """
+    _check_style(style)
+    keys = {date_str: _render_key(date_str, style, features) for date_str in date_inputs}
+    rendered = {date_str: STOCK_RENDERS.peek(key) for date_str, key in keys.items()}
+    missing = [date_str for date_str, text in rendered.items() if text is None]
+    if missing:
+        for date_str, df in load_stock_days(missing).items():
+            feature_df = _load_features(date_str) if features else None
+            rendered[date_str] = _render_stock_data(date_str, df.reset_index(drop=True), style, feature_df)
+            STOCK_RENDERS.put(keys[date_str], rendered[date_str])
+    return rendered
@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Small LRU cache of rendered prompt text.
+
+    Keys should include the identity of every file the text was rendered from
+    (see file_identity), so an edited or rewritten file is simply a new key and
+    stale entries age out instead of needing explicit invalidation.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render):
+        """Returns the cached text for `key`, calling render() to build it on a miss."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        self.misses += 1
+        value = render()
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """Returns the cached text for `key` (counting a hit), or None without rendering."""
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return self.entries[key]
+
+    def put(self, key, value) -> None:
+        self.misses += 1
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def file_identity(path: str):
+    """Returns (path, mtime_ns, size) for an existing file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def format_fixed(values: pd.Series, spec: str = '%.2f') -> pd.Series:
+    """Formats a numeric column with one printf-style spec in a single numpy call."""
+    return pd.Series(np.char.mod(spec, values.to_numpy(dtype=float)), index=values.index, dtype=object)
+
+
+STOCK_RENDERS = RenderCache()
+PORTFOLIO_RENDERS = RenderCache()
@@ -0,0 +1,136 @@
+import os
+import json
+import glob
+import hashlib
+import time
+from openai.types.chat import ChatCompletion
+from metrics import METRICS
+
+CACHE_DIR = "Response Cache"
+MAX_BYTES = 200 * 1024 * 1024
+MODES = ['read_through', 'refresh', 'replay', 'off']
+
+
+def cache_key(model: str, temperature: float, prompt: str) -> str:
+    """sha256 of the request that determines a completion: model, temperature and the rendered prompt."""
+    payload = json.dumps([model, float(temperature), prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of chat completions.
+
+    Response Cache/<key[:2]>/<key>.json holds the model_dump() of the completion
+    for cache_key(model, temperature, prompt). A hit refreshes the file's mtime,
+    and when the cache grows past max_bytes the least recently used files are
+    deleted.
+
+    Modes:
+        read_through - serve hits from disk, call the API and store on a miss
+        refresh      - always call the API and overwrite the stored response
+        replay       - serve hits only; a miss raises KeyError (offline re-runs)
+        off          - always call the API and store nothing
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = MAX_BYTES, mode: str = 'read_through'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode '{mode}'. Expected one of: {', '.join(MODES)}")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> ChatCompletion:
+        """Returns the stored completion for `key`, or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return ChatCompletion.model_validate(data)
+
+    def put(self, key: str, response) -> None:
+        """Stores a completion (atomically) and evicts old entries if over max_bytes."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(response.model_dump(), f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            int: Number of entries deleted.
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.root, '*', '*.json')):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def lookup(self, model: str, prompt: str, temperature: float) -> tuple:
+        """Returns (key, cached completion or None) for a single-message prompt, per `mode`.
+
+        Raises:
+            KeyError: In replay mode, if the response is not cached.
+        """
+        key = cache_key(model, temperature, prompt)
+        if self.mode in ['read_through', 'replay']:
+            cached = self.get(key)
+            if cached is not None:
+                METRICS.count('llm_cache_hits_total', model=model)
+                return key, cached
+            if self.mode == 'replay':
+                raise KeyError(f"No cached response for {key} (replay mode).")
+        return key, None
+
+    def store(self, key: str, response) -> None:
+        """Stores a completion fetched after a lookup() miss, unless the mode is 'off'."""
+        if self.mode != 'off':
+            self.put(key, response)
+
+    def complete(self, create, model: str, prompt: str, temperature: float, **kwargs):
+        """Returns the completion for a single-message prompt, going through the cache per `mode`.
+
+        Args:
+            create: client.chat.completions.create (any callable taking the same arguments).
+            model (str): Model name.
+            prompt (str): Fully rendered user prompt.
+            temperature (float): Sampling temperature.
+
+        Raises:
+            KeyError: In replay mode, if the response is not cached.
+        """
+        key, cached = self.lookup(model, prompt, temperature)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        response = create(model=model, messages=[{"role": "user", "content": prompt}], temperature=temperature, **kwargs)
+        METRICS.record_llm(response, time.perf_counter() - start, model=model)
+        self.store(key, response)
+        return response
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0}
@@ -1,17 +1,30 @@
 import os
 import json
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from dotenv import load_dotenv
 from openai import OpenAI
 from read_portfolio import get_portfolio_string
-from read_stocks import get_stock_data_string
+from read_stocks import get_stock_data_string, get_stock_data_strings
+from signal_index import SignalIndex, REVIEWS_DIR
+from response_cache import ResponseCache
+from prompt_size import size_report
+from streaming import streaming_create
+from metrics import timed
+from trading_calendar import closed_reason, previous_trading_day, sessions_before, week_sessions
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv('API_KEY'),
-    base_url="https://api.x.ai/v1"
-)
+MODEL = "grok-4"
+BASE_URL = os.getenv('API_BASE_URL', "https://api.x.ai/v1")
+
+def make_client(base_url: str = BASE_URL, api_key_env: str = 'API_KEY') -> OpenAI:
+    """OpenAI-compatible client for an endpoint, with its key read from the environment variable api_key_env."""
+    return OpenAI(
+        api_key=os.getenv(api_key_env),
+        base_url=base_url
+    )
+
+client = make_client()
 
 def get_prompt_type() -> str:
     """Prompts user for prompt type and validates input.
@@ -25,12 +38,77 @@ def get_prompt_type() -> str:
             return user_input
         print("Invalid input. Please enter 'f', 'd','n', or 't'.")
 
-def load_prompt(prompt_type: str, date_input: str) -> str:
+def prior_day_signals(past_dates, prompt_types, required: bool = False, reviews_dir: str = REVIEWS_DIR) -> list:
+    """Returns the indexed replies for past_dates, each tagged with its 'date'.
+    
+    Args:
+        past_dates (list): Dates in YYYY-MM-DD format, in prompt order.
+        prompt_types (list): Reply types to look for on each date, in order of preference.
+        required (bool): Raise instead of skipping a date with no reply.
+        reviews_dir (str): Replies folder whose signal index is read.
+    
+    Raises:
+        FileNotFoundError: If required and a date has no reply of any of prompt_types.
+    """
+    index = SignalIndex(reviews_dir)
+    prior_signals = []
+    for past_date in past_dates:
+        _, signal_content = index.first_content(past_date, prompt_types)
+        if signal_content is None:
+            if required:
+                raise FileNotFoundError(f"No {'/'.join(prompt_types)} response found for {past_date}.")
+            continue
+        signal_content['date'] = past_date
+        prior_signals.append(signal_content)
+    index.close()
+    return prior_signals
+
+# Stock data rendering per prompt type (see read_stocks.STOCK_STYLES). The weekend
+# prompt repeats five days of data, so it uses the lossless CSV-style table.
+PROMPT_STOCK_STYLE = {'f': 'verbose', 'd': 'verbose', 't': 'table'}
+# Prompt types that get each stock's technical indicators (see feature_store.py) appended.
+# Off by default: the prompts are unchanged until the feature store has been built.
+PROMPT_STOCK_FEATURES = {'f': False, 'd': False, 't': False}
+# Reply types whose signals each prompt type includes from earlier dates.
+PRIOR_SIGNAL_TYPES = {'d': ['d'], 'n': ['d'], 't': ['d', 'n']}
+
+def prior_signal_dates(prompt_type: str, target_date) -> list:
+    """Returns the dates (oldest first) whose PRIOR_SIGNAL_TYPES replies load_prompt includes.
+    
+    Args:
+        prompt_type (str): Type of prompt ('f', 'd', 't', 'n').
+        target_date: The prompt's date (YYYY-MM-DD string or datetime).
+    """
+    if prompt_type == 't':
+        # Every weekday of the week so far (d or n reply)
+        return week_sessions(target_date, include_holidays=True)
+    if prompt_type == 'n':
+        return sessions_before(target_date, 5)
+    if prompt_type == 'd':
+        # On the week's first session (Monday, or Tuesday after a Monday holiday), the previous week's signals
+        past_dates = week_sessions(target_date)
+        if len(past_dates) == 1 and closed_reason(target_date) is None:
+            past_dates = week_sessions(previous_trading_day(target_date))
+        return past_dates
+    return []
+
+@timed('load_prompt')
+def load_prompt(prompt_type: str, date_input: str, style: str = None, features: bool = None,
+                portfolio_dir: str = "Portfolio Files", reviews_dir: str = REVIEWS_DIR, prompt_dir: str = "./Prompts",
+                default_cash: float = 25000.00, stock_frames: dict = None) -> str:
     """Loads and processes prompt from file, substituting portfolio, stock data, and prior signals.
     
     Args:
         prompt_type (str): Type of prompt ('f', 'd', 't').
         date_input (str): Date in YYYY-MM-DD format.
+        style (str): Stock data rendering; defaults to PROMPT_STOCK_STYLE[prompt_type].
+        features (bool): Include technical indicators; defaults to PROMPT_STOCK_FEATURES[prompt_type].
+        portfolio_dir (str): Directory of the portfolio's daily CSVs.
+        reviews_dir (str): Folder of the portfolio's saved replies (for prior signals).
+        prompt_dir (str): Folder with the prompt templates (for prompt variants).
+        default_cash (float): Starting cash shown for an empty portfolio.
+        stock_frames (dict): {date: stock rows} already loaded (e.g. shared by multi_portfolio);
+            dates not in it are read from the market store / Stock Files.
     
     Returns:
         str: Processed prompt string.
@@ -40,104 +118,65 @@ def load_prompt(prompt_type: str, date_input: str) -> str:
         ValueError: If date format or stock data processing fails.
     """
     prompt_files = {
-        'f': './Prompts/first_timer_prompt.txt',
-        'd': './Prompts/daily_prompt.txt',
-        't': './Prompts/training_prompt.txt',
-        'n': './Prompts/no_trading_day_prompt.txt'
+        'f': 'first_timer_prompt.txt',
+        'd': 'daily_prompt.txt',
+        't': 'training_prompt.txt',
+        'n': 'no_trading_day_prompt.txt'
     }
-    file_path = prompt_files.get(prompt_type)
+    file_path = f"{prompt_dir}/{prompt_files.get(prompt_type)}"
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Prompt file '{file_path}' not found.")
     with open(file_path, 'r', encoding='utf-8') as f:
         prompt = f.read().strip()
     
     if prompt_type in ['d', 't', 'n']:
-        portfolio_str = get_portfolio_string(date_input)
+        portfolio_str = get_portfolio_string(date_input, default_cash, portfolio_dir=portfolio_dir)
         prompt = prompt.replace("[Portfolio String]", portfolio_str)
     
+    style = style or PROMPT_STOCK_STYLE.get(prompt_type, 'verbose')
+    features = PROMPT_STOCK_FEATURES.get(prompt_type, False) if features is None else features
+    stock_frames = stock_frames or {}
     try:
         target_date = datetime.strptime(date_input, '%Y-%m-%d')
         if prompt_type == 't':
+            # The week's sessions for the stock data
             stock_data = ""
-            for i in range(5):
-                past_date = (target_date - timedelta(days=i)).strftime('%Y-%m-%d')
-                stock_data += get_stock_data_string(past_date) + "\n"
+            past_dates = week_sessions(target_date)[::-1]
+            stock_strings = get_stock_data_strings([d for d in past_dates if d not in stock_frames], style, features)
+            stock_strings.update({d: get_stock_data_string(d, stock_frames[d], style, features)
+                                  for d in past_dates if d in stock_frames})
+            for past_date in past_dates:
+                stock_data += stock_strings[past_date] + "\n"
             prompt = prompt.replace("[Stock Data]", stock_data)
             
-            prior_signals = []
-            signals_dir = os.path.join("Grok Daily Reviews", "Weekdays")
-            for i in range(5):
-                past_date = (target_date - timedelta(days=i)).strftime('%Y-%m-%d')
-                signal_file = os.path.join(signals_dir, f"d_{past_date}.json")
-                if os.path.exists(signal_file):
-                    with open(signal_file, 'r', encoding='utf-8') as f:
-                        signal_data = json.load(f)
-                        signal_content = json.loads(signal_data['choices'][0]['message']['content'])
-                        signal_content['date'] = past_date
-                        prior_signals.append(signal_content)
-                else:
-                    signal_file = os.path.join(signals_dir, f"n_{past_date}.json")
-                    with open(signal_file, 'r', encoding='utf-8') as f:
-                        signal_data = json.load(f)
-                        signal_content = json.loads(signal_data['choices'][0]['message']['content'])
-                        signal_content['date'] = past_date
-                        prior_signals.append(signal_content)
+            weekdays = prior_signal_dates('t', target_date)[::-1]
+            prior_signals = prior_day_signals(weekdays, PRIOR_SIGNAL_TYPES['t'], required=True, reviews_dir=reviews_dir)
             prompt = prompt.replace("[Prior Signals JSON]", json.dumps(prior_signals))
             prompt = prompt.replace("[Date]", date_input)
         elif(prompt_type == 'n'):
-            prior_signals = []
-            signals_dir = os.path.join("Grok Daily Reviews", "Weekdays")
-            for i in range(5):
-                past_date = (target_date - timedelta(days=i)).strftime('%Y-%m-%d')
-                signal_file = os.path.join(signals_dir, f"d_{past_date}.json")
-                if os.path.exists(signal_file):
-                    with open(signal_file, 'r', encoding='utf-8') as f:
-                        signal_data = json.load(f)
-                        signal_content = json.loads(signal_data['choices'][0]['message']['content'])
-                        signal_content['date'] = past_date
-                        prior_signals.append(signal_content)
-            prompt = prompt.replace("[Prior Signals JSON]", json.dumps(prior_signals))
+            past_dates = prior_signal_dates('n', target_date)[::-1]
+            prior_signals = prior_day_signals(past_dates, PRIOR_SIGNAL_TYPES['n'], reviews_dir=reviews_dir)
+            prompt = prompt.replace("[Prior Week's Signals]", json.dumps(prior_signals))
             prompt = prompt.replace("[Date]", date_input)
         else:
-            stock_data = get_stock_data_string(date_input)
+            stock_data = get_stock_data_string(date_input, stock_frames.get(date_input), style, features)
             prompt = prompt.replace("[Stock Data]", stock_data)
             
             if prompt_type == 'd':
-                prior_signals = []
-                signals_dir = os.path.join("Grok Daily Reviews", "Weekdays")
-                if(target_date.weekday() == 0):
-                    new_date = target_date - timedelta(days=3)
-                    monday = new_date - timedelta(days=new_date.weekday())
-                    for i in range(new_date.weekday() + 1):
-                        past_date = (monday + timedelta(days=i)).strftime('%Y-%m-%d')
-                        signal_file = os.path.join(signals_dir, f"d_{past_date}.json")
-                        if os.path.exists(signal_file):
-                            with open(signal_file, 'r', encoding='utf-8') as f:
-                                signal_data = json.load(f)
-                                signal_content = json.loads(signal_data['choices'][0]['message']['content'])
-                                signal_content['date'] = past_date
-                                prior_signals.append(signal_content)
-                    prompt = prompt.replace("[Prior Week's Signals]", json.dumps(prior_signals))
-                    prompt = prompt.replace("[Date]", date_input)
-                else:
-                    monday = target_date - timedelta(days=target_date.weekday())
-                    for i in range(target_date.weekday() + 1):
-                        past_date = (monday + timedelta(days=i)).strftime('%Y-%m-%d')
-                        signal_file = os.path.join(signals_dir, f"d_{past_date}.json")
-                        if os.path.exists(signal_file):
-                            with open(signal_file, 'r', encoding='utf-8') as f:
-                                signal_data = json.load(f)
-                                signal_content = json.loads(signal_data['choices'][0]['message']['content'])
-                                signal_content['date'] = past_date
-                                prior_signals.append(signal_content)
-                    prompt = prompt.replace("[Prior Week's Signals]", json.dumps(prior_signals))
-                    prompt = prompt.replace("[Date]", date_input)
+                past_dates = prior_signal_dates('d', target_date)
+                prior_signals = prior_day_signals(past_dates, PRIOR_SIGNAL_TYPES['d'], reviews_dir=reviews_dir)
+                prompt = prompt.replace("[Prior Week's Signals]", json.dumps(prior_signals))
+                prompt = prompt.replace("[Date]", date_input)
     
     except ValueError as e:
         raise ValueError(f"Error processing stock data: {e}")
     
     return prompt
 
+def get_temperature(prompt_type: str) -> float:
+    """Sampling temperature for a prompt type (0.3 for first-timer and daily, 0.35 otherwise)."""
+    return 0.3 if prompt_type in ['f', 'd'] else 0.35
+
 def is_weekday() -> bool:
     """Checks if today is a weekday (Monday-Friday).
     
@@ -147,16 +186,18 @@ def is_weekday() -> bool:
     today = date.today()
     return today.weekday() < 5
 
-def save_response(response, prompt_type: str, date_input: str):
+def save_response(response, prompt_type: str, date_input: str, sub_dir: str = None, base_dir: str = REVIEWS_DIR):
     """Saves response as JSON to appropriate directory.
     
     Args:
         response: OpenAI response object.
         prompt_type (str): Type of prompt ('f', 'd', 't').
         date_input (str): Date in YYYY-MM-DD format.
+        sub_dir (str): 'Weekdays' or 'Weekends'; defaults to the one matching today.
+        base_dir (str): Replies folder (one per portfolio).
     """
-    base_dir = "Grok Daily Reviews"
-    sub_dir = "Weekdays" if is_weekday() else "Weekends"
+    if sub_dir is None:
+        sub_dir = "Weekdays" if is_weekday() else "Weekends"
     os.makedirs(os.path.join(base_dir, sub_dir), exist_ok=True)
     
     date_str = datetime.strptime(date_input, '%Y-%m-%d').strftime('%Y-%m-%d')
@@ -167,32 +208,51 @@ def save_response(response, prompt_type: str, date_input: str):
         json.dump(response.model_dump(), f, indent=2)
     
     print(f"Response saved to: {filepath}")
+    
+    index = SignalIndex(base_dir)
+    try:
+        index.add(date_str, prompt_type, filepath)
+    except (json.JSONDecodeError, KeyError, IndexError) as e:
+        print(f"Response not added to the signal index: {e}")
+    index.close()
 
 if __name__ == "__main__":
     prompt_type = get_prompt_type()
     
     date_input = input("Enter the date (YYYY-MM-DD): ").strip()
     try:
-        target_date = datetime.strptime(date_input, '%Y-%m-%d')
-        if target_date.weekday() >= 5:
-            print(f"Warning: {date_input} is a weekend. Consider using last trading day (e.g., 2025-09-19).")
+        datetime.strptime(date_input, '%Y-%m-%d')
     except ValueError:
         print("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-19).")
         exit(1)
     
+    reason = closed_reason(date_input)
+    if reason is not None and prompt_type == 'd':
+        print(f"{date_input} is not an NSE trading day ({reason}); using the no-trading-day prompt.")
+        prompt_type = 'n'
+    elif reason is not None and prompt_type in ['f', 't']:
+        print(f"Warning: {date_input} is not an NSE trading day ({reason}). Consider using {previous_trading_day(date_input)}.")
+    
     try:
         prompt = load_prompt(prompt_type, date_input)
     except (ValueError, FileNotFoundError) as e:
         print(f"Error: {e}")
         exit(1)
     
-    temperature = 0.3 if prompt_type in ['f', 'd'] else 0.35
+    if PROMPT_STOCK_STYLE.get(prompt_type, 'verbose') != 'verbose':
+        print(size_report(load_prompt(prompt_type, date_input, 'verbose'), prompt))
     
-    response = client.chat.completions.create(
-        model="grok-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature
-    )
+    temperature = get_temperature(prompt_type)
+    
+    # Streaming prints signals and trades as they arrive instead of after the whole reply
+    stream = input("Stream the response? (y/N): ").strip().lower() == 'y'
+    create = streaming_create(client) if stream else client.chat.completions.create
+    
+    # Identical re-runs (same model, temperature and prompt) are served from the local cache
+    cache = ResponseCache()
+    response = cache.complete(create, MODEL, prompt, temperature)
+    if cache.hits:
+        print("(Served from response cache)")
     
     print("Grok Response:")
     print(response.choices[0].message.content)
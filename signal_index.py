@@ -0,0 +1,206 @@
+import os
+import json
+import glob
+import sqlite3
+import pandas as pd
+
+REVIEWS_DIR = "Grok Daily Reviews"
+INDEX_FILE = "signals.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    date TEXT NOT NULL,
+    prompt_type TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (date, prompt_type)
+);
+CREATE TABLE IF NOT EXISTS signals (
+    date TEXT NOT NULL,
+    prompt_type TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    symbol TEXT,
+    signal TEXT,
+    reason TEXT,
+    price REAL,
+    PRIMARY KEY (date, prompt_type, position)
+);
+CREATE INDEX IF NOT EXISTS signals_symbol ON signals (symbol, date);
+CREATE INDEX IF NOT EXISTS signals_signal ON signals (signal, date);
+"""
+
+
+def parse_content(text: str) -> dict:
+    """Parses the JSON body of a Grok reply, dropping a surrounding ```json fence if present.
+
+    Raises:
+        json.JSONDecodeError: If the reply is not JSON.
+    """
+    text = text.strip()
+    if text.startswith('```'):
+        text = text[3:]
+        if text.startswith('json'):
+            text = text[4:]
+        text = text.rstrip('`').strip()
+    return json.loads(text)
+
+
+def load_response(path: str) -> dict:
+    """Reads a saved API response and returns the parsed choices[0].message.content."""
+    with open(path, 'r', encoding='utf-8') as f:
+        outer_data = json.load(f)
+    return parse_content(outer_data['choices'][0]['message']['content'])
+
+
+class SignalIndex:
+    """SQLite index of the parsed Grok replies in Grok Daily Reviews.
+
+    Each saved response (<prompt_type>_<date>.json) is parsed once and stored
+    under (date, prompt_type), with its top_signals split into a `signals` table
+    indexed by symbol and signal. Prompt building and summaries query the index
+    and never re-open the raw dumps. Opening the index runs refresh(), so replies
+    added or edited outside save_response (by hand, a git pull) are picked up.
+    """
+
+    def __init__(self, reviews_dir: str = REVIEWS_DIR, refresh: bool = True):
+        self.reviews_dir = reviews_dir
+        self.path = os.path.join(reviews_dir, INDEX_FILE)
+        os.makedirs(reviews_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        if refresh:
+            self.refresh()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def add(self, date_str: str, prompt_type: str, path: str) -> dict:
+        """Parses one saved response and (re)indexes it under (date_str, prompt_type).
+
+        Returns:
+            dict: The parsed reply.
+        """
+        content = load_response(path)
+        stat = os.stat(path)
+        signals = [(date_str, prompt_type, position, signal.get('symbol'), signal.get('signal'),
+                    signal.get('reason'), signal.get('price'))
+                   for position, signal in enumerate(content.get('top_signals', []))]
+        with self.conn:
+            self.conn.execute("DELETE FROM signals WHERE date = ? AND prompt_type = ?", (date_str, prompt_type))
+            self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                              (date_str, prompt_type, path, stat.st_mtime_ns, stat.st_size, json.dumps(content)))
+            self.conn.executemany("INSERT INTO signals VALUES (?, ?, ?, ?, ?, ?, ?)", signals)
+        return content
+
+    def refresh(self) -> int:
+        """Indexes new or changed response files and drops entries whose file is gone.
+
+        Only file sizes and mtimes are compared, so an up-to-date index costs one stat per file.
+
+        Returns:
+            int: Number of files (re)indexed.
+        """
+        known = {(date_str, prompt_type): (path, mtime_ns, size) for date_str, prompt_type, path, mtime_ns, size
+                 in self.conn.execute("SELECT date, prompt_type, path, mtime_ns, size FROM responses")}
+        seen = set()
+        updated = 0
+        for path in sorted(glob.glob(os.path.join(self.reviews_dir, '*', '*_*.json'))):
+            prompt_type, _, date_str = os.path.splitext(os.path.basename(path))[0].partition('_')
+            key = (date_str, prompt_type)
+            if key in seen:
+                print(f"Skipping {path}: {prompt_type}_{date_str} is already indexed from another folder")
+                continue
+            seen.add(key)
+            stat = os.stat(path)
+            if known.get(key) == (path, stat.st_mtime_ns, stat.st_size):
+                continue
+            try:
+                self.add(date_str, prompt_type, path)
+                updated += 1
+            except (json.JSONDecodeError, KeyError, IndexError) as e:
+                print(f"Skipping {path}: {e}")
+
+        with self.conn:
+            for date_str, prompt_type in set(known) - seen:
+                self.conn.execute("DELETE FROM responses WHERE date = ? AND prompt_type = ?", (date_str, prompt_type))
+                self.conn.execute("DELETE FROM signals WHERE date = ? AND prompt_type = ?", (date_str, prompt_type))
+        return updated
+
+    def content(self, date_str: str, prompt_type: str) -> dict:
+        """Returns the parsed reply for (date_str, prompt_type), or None if there is none."""
+        row = self.conn.execute("SELECT content FROM responses WHERE date = ? AND prompt_type = ?",
+                                (date_str, prompt_type)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def first_content(self, date_str: str, prompt_types) -> tuple:
+        """Returns (prompt_type, reply) for the first of `prompt_types` answered on date_str, or (None, None)."""
+        for prompt_type in prompt_types:
+            content = self.content(date_str, prompt_type)
+            if content is not None:
+                return prompt_type, content
+        return None, None
+
+    def signals(self, start_date: str = None, end_date: str = None, symbol: str = None,
+                signal: str = None, prompt_types=None) -> pd.DataFrame:
+        """Queries indexed top_signals.
+
+        Args:
+            start_date (str): First date (YYYY-MM-DD), inclusive.
+            end_date (str): Last date (YYYY-MM-DD), inclusive.
+            symbol (str): Only this symbol.
+            signal (str): SQL LIKE pattern on the signal text, case-insensitive (e.g. 'hold%').
+            prompt_types (list): Only replies to these prompt types (e.g. ['d', 'n']).
+
+        Returns:
+            pd.DataFrame: date, prompt_type, symbol, signal, reason, price, ordered by date.
+        """
+        clauses, params = [], []
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if signal is not None:
+            clauses.append("signal LIKE ?")
+            params.append(signal)
+        if prompt_types:
+            clauses.append(f"prompt_type IN ({', '.join('?' for _ in prompt_types)})")
+            params.extend(prompt_types)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT date, prompt_type, symbol, signal, reason, price FROM signals{where} ORDER BY date, prompt_type, position"
+        return pd.read_sql_query(query, self.conn, params=params)
+
+    def items(self, key: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """Returns every element of the `key` array (e.g. 'emergency_trades', 'trades') across indexed replies.
+
+        Returns:
+            pd.DataFrame: date, prompt_type, then the element's own fields, ordered by date.
+        """
+        clauses, params = [], []
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(end_date)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = []
+        for date_str, prompt_type, content in self.conn.execute(
+                f"SELECT date, prompt_type, content FROM responses{where} ORDER BY date, prompt_type", params):
+            for item in json.loads(content).get(key) or []:
+                if isinstance(item, dict):
+                    rows.append({'date': date_str, 'prompt_type': prompt_type, **item})
+        return pd.DataFrame(rows, columns=None if rows else ['date', 'prompt_type'])
+
+
+if __name__ == "__main__":
+    index = SignalIndex(refresh=False)
+    updated = index.refresh()
+    total = index.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    print(f"Indexed {updated} new or changed responses ({total} total) in {index.path}")
@@ -0,0 +1,119 @@
+import pandas as pd
+import os
+from market_store import MarketStore
+from feature_store import FeatureStore
+from trading_calendar import closed_reason
+
+STOCK_COLUMNS = ['Symbol', 'Category', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def combine_categories(category_frames, top_n: int = 75) -> pd.DataFrame:
+    """Keeps the top `top_n` rows by volume of each category per date and combines them.
+
+    Works on any number of dates in one pass, so a multi-day backfill is ranked
+    exactly like a single-day fetch.
+
+    Args:
+        category_frames (list): (category, DataFrame) pairs in priority order. A symbol
+            listed under several categories keeps the first one.
+        top_n (int): Rows kept per category and date.
+
+    Returns:
+        pd.DataFrame: Combined OHLCV rows with a Category column, ordered by date,
+        category priority and descending volume.
+    """
+    frames = [df.assign(Category=category, _priority=i)
+              for i, (category, df) in enumerate(category_frames) if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    combined_df = pd.concat(frames, ignore_index=True)
+    combined_df = combined_df.sort_values(['Date', '_priority', 'Volume'], ascending=[True, True, False], kind='stable')
+    combined_df = combined_df.groupby(['Date', '_priority'], sort=False).head(top_n)
+    combined_df = combined_df.drop_duplicates(subset=['Symbol', 'Date'])
+    return combined_df.drop(columns='_priority').reset_index(drop=True)
+
+
+def missing_stock_days(start_date, end_date, output_dir: str = "Stock Files") -> list:
+    """Returns the weekdays between start_date and end_date (inclusive) with no Stock Files CSV yet."""
+    days = pd.bdate_range(start_date, end_date)
+    return [day for day in days
+            if not os.path.exists(os.path.join(output_dir, f"{day.strftime('%Y-%m-%d')}.csv"))]
+
+
+def skip_non_trading_day(target_date, output_dir: str = "Stock Files") -> bool:
+    """Writes the empty Stock Files CSV for a weekend or NSE holiday without fetching anything.
+
+    Returns:
+        bool: True if target_date is not a trading day (the caller should not fetch).
+    """
+    reason = closed_reason(target_date)
+    if reason is None:
+        return False
+    print(f"{target_date.strftime('%Y-%m-%d')} is not an NSE trading day ({reason}); skipping the fetch.")
+    write_stock_file(pd.DataFrame(), target_date, output_dir)
+    return True
+
+
+def write_stock_days(combined_df: pd.DataFrame, days, output_dir: str = "Stock Files", failed=()) -> list:
+    """Splits multi-day OHLCV rows by Date and writes one Stock Files CSV for each of `days`.
+
+    Days the trading calendar marks closed get an empty file with headers, as a single-day
+    fetch would. Trading days with no rows, and every trading day when some symbols failed
+    to fetch (`failed`), are left without a file and reported, so the next backfill retries them.
+
+    Returns:
+        list: Dates (YYYY-MM-DD) whose files were written.
+    """
+    by_date = dict(tuple(combined_df.groupby('Date', sort=False))) if not combined_df.empty else {}
+    written, missing = [], []
+    for day in days:
+        day_df = by_date.get(day.strftime('%Y-%m-%d'), pd.DataFrame())
+        if day_df.empty and closed_reason(day) is None or not day_df.empty and failed:
+            missing.append(day.strftime('%Y-%m-%d'))
+            continue
+        write_stock_file(day_df.reset_index(drop=True), day, output_dir, update_features=False)
+        written.append(day.strftime('%Y-%m-%d'))
+    if written:
+        FeatureStore().sync(min(written), max(written))
+
+    if missing:
+        reason = f"{len(failed)} symbols failed to fetch" if failed else "no rows fetched"
+        print(f"Left {len(missing)} trading days without a Stock File ({reason}): {', '.join(missing)}. "
+              f"Re-run the backfill to fill them.")
+    return written
+
+
+def write_stock_file(combined_df: pd.DataFrame, target_date, output_dir: str = "Stock Files",
+                     update_features: bool = True) -> str:
+    """Saves combined OHLCV rows to <output_dir>/<date>.csv, or an empty file with headers,
+    and appends the same rows to the columnar market store. The CSV is written to a
+    temporary file and renamed into place, so readers never see a partial file.
+    With update_features, a kept feature store is brought up to date (see FeatureStore.sync).
+
+    Returns:
+        str: Path of the written file.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    output_file = os.path.join(output_dir, f"{target_date.strftime('%Y-%m-%d')}.csv")
+    tmp_file = output_file + ".tmp"
+    if not combined_df.empty:
+        combined_df.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, output_file)
+        print(f"\nSaved {len(combined_df)} rows to {output_file}")
+        print("\nSample data:")
+        print(combined_df.head())
+    else:
+        empty_df = pd.DataFrame(columns=STOCK_COLUMNS)
+        empty_df.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, output_file)
+        print(f"No data for {target_date.strftime('%Y-%m-%d')} (non-trading day?). Created empty {output_file}.")
+
+    MarketStore().append(combined_df, target_date.strftime('%Y-%m-%d'))
+
+    if update_features:
+        FeatureStore().sync(target_date.strftime('%Y-%m-%d'))
+
+    return output_file
@@ -0,0 +1,123 @@
+import json
+from openai.types.chat import ChatCompletion
+
+STREAM_KEYS = ['top_signals', 'trades', 'emergency_trades']
+
+
+class ArrayItemParser:
+    """Incrementally scans a streamed JSON reply and yields array elements as soon as they close.
+
+    Only the elements of the top-level arrays named in `keys` are emitted, e.g.
+    each {"symbol": ..., "signal": ...} of "top_signals" as its closing brace
+    arrives. Text before the first '{' (such as a ```json fence) is skipped.
+    """
+
+    def __init__(self, keys=STREAM_KEYS):
+        self.keys = set(keys)
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None
+        self.current_key = None
+        self.array_key = None
+        self.array_depth = None
+        self.item_start = None
+
+    def feed(self, text: str) -> list:
+        """Adds streamed text and returns the [(key, item)] elements it completed."""
+        self.buffer += text
+        items = []
+        while self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.stack and self.stack[-1] == '{':
+                        self.last_string = json.loads(self.buffer[self.string_start:self.pos + 1])
+            elif not self.stack and char != '{':
+                pass
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif char == ':' and self.stack[-1] == '{':
+                self.current_key = self.last_string
+            elif char in '{[':
+                if self.array_key is not None and len(self.stack) == self.array_depth:
+                    self.item_start = self.pos
+                self.stack.append(char)
+                if char == '[' and len(self.stack) == 2 and self.current_key in self.keys:
+                    self.array_key = self.current_key
+                    self.array_depth = len(self.stack)
+            elif char in '}]':
+                self.stack.pop()
+                if self.array_key is not None:
+                    if len(self.stack) == self.array_depth and self.item_start is not None:
+                        items.append((self.array_key, json.loads(self.buffer[self.item_start:self.pos + 1])))
+                        self.item_start = None
+                    elif len(self.stack) < self.array_depth:
+                        self.array_key = None
+                        self.array_depth = None
+            self.pos += 1
+        return items
+
+
+def print_item(key: str, item: dict) -> None:
+    """Default item handler: one line per streamed signal or trade."""
+    if key == 'top_signals':
+        print(f"  [signal] {item.get('symbol')}: {item.get('signal')} @ {item.get('price')} - {item.get('reason')}")
+    else:
+        print(f"  [{key[:-1]}] {item.get('action')} {item.get('shares')} {item.get('symbol')} for ₹{item.get('amount')}")
+
+
+def stream_completion(client, model: str, messages: list, temperature: float, on_item=print_item,
+                      keys=STREAM_KEYS, **kwargs) -> ChatCompletion:
+    """Streams a chat completion, calling on_item(key, item) for each array element as it completes.
+
+    Returns:
+        ChatCompletion: The reassembled response, in the same shape a non-streaming call returns,
+        so save_response persists it exactly as before.
+    """
+    stream = client.chat.completions.create(model=model, messages=messages, temperature=temperature,
+                                            stream=True, stream_options={"include_usage": True}, **kwargs)
+    parser = ArrayItemParser(keys)
+    content = []
+    response = {'id': None, 'created': 0, 'model': model, 'object': 'chat.completion',
+                'system_fingerprint': None, 'usage': None}
+    finish_reason = None
+    role = 'assistant'
+
+    for chunk in stream:
+        response['id'] = response['id'] or chunk.id
+        response['created'] = response['created'] or chunk.created
+        response['model'] = chunk.model or response['model']
+        response['system_fingerprint'] = getattr(chunk, 'system_fingerprint', None) or response['system_fingerprint']
+        if getattr(chunk, 'usage', None) is not None:
+            response['usage'] = chunk.usage.model_dump()
+        for choice in chunk.choices:
+            if choice.delta.role:
+                role = choice.delta.role
+            if choice.delta.content:
+                content.append(choice.delta.content)
+                for key, item in parser.feed(choice.delta.content):
+                    if on_item is not None:
+                        on_item(key, item)
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+
+    response['choices'] = [{'index': 0, 'finish_reason': finish_reason or 'stop', 'logprobs': None,
+                            'message': {'role': role, 'content': "".join(content)}}]
+    return ChatCompletion.model_validate(response)
+
+
+def streaming_create(client, on_item=print_item, keys=STREAM_KEYS):
+    """Wraps stream_completion as a drop-in for client.chat.completions.create (e.g. for ResponseCache.complete)."""
+    def create(model, messages, temperature, **kwargs):
+        return stream_completion(client, model, messages, temperature, on_item, keys, **kwargs)
+    return create
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live flat in the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# send_prompt builds its API client at import time; no request is ever made from the tests.
+os.environ.setdefault('API_KEY', 'test')
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+import async_submit
+from response_cache import ResponseCache
+
+
+class FakeClient:
+    def __init__(self, fail_dates=()):
+        self.fail_dates = fail_dates
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, temperature):
+        await asyncio.sleep(0.01)
+        prompt = messages[0]['content']
+        if any(date_str in prompt for date_str in self.fail_dates):
+            raise ValueError("bad request")
+        return SimpleNamespace(usage=None, prompt=prompt)
+
+
+def run_batch(monkeypatch, jobs, client):
+    events = []
+    monkeypatch.setattr(async_submit, 'load_prompt', lambda prompt_type, date_input: events.append(('render', prompt_type, date_input)) or f"{prompt_type} {date_input}")
+    monkeypatch.setattr(async_submit.METRICS, 'record_llm', lambda *args, **kwargs: None)
+    sink = lambda job, response: events.append(('saved',) + job)
+    results, failures = asyncio.run(async_submit.submit_prompts(jobs, client=client, concurrency=8, sink=sink))
+    return events, results, failures
+
+
+def test_prompts_render_after_the_replies_they_include(monkeypatch):
+    jobs = async_submit.date_jobs(['d', 't'], '2025-12-01', '2025-12-05')
+    events, results, failures = run_batch(monkeypatch, jobs, FakeClient())
+
+    assert failures == {}
+    assert set(results) == set(jobs)
+    for job in jobs:
+        rendered = events.index(('render',) + job)
+        earlier = [other for other in jobs if other[0] == 'd' and other[1] < job[1] or job[0] == 't' and other[0] == 'd']
+        assert all(events.index(('saved',) + other) < rendered for other in earlier)
+
+
+def test_jobs_needing_a_failed_reply_fail_without_a_request(monkeypatch):
+    jobs = async_submit.date_jobs(['d', 't'], '2025-12-01', '2025-12-05')
+    events, results, failures = run_batch(monkeypatch, jobs, FakeClient(fail_dates=['2025-12-03']))
+
+    assert sorted(results) == [('d', '2025-12-01'), ('d', '2025-12-02')]
+    assert failures[('d', '2025-12-03')] == "bad request"
+    assert failures[('t', '2025-12-05')].startswith("Needs the d_2025-12-03")
+    assert ('render', 'd', '2025-12-04') not in events
+
+
+class CompletionClient(FakeClient):
+    """Returns real ChatCompletion objects, so responses can go through a ResponseCache."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    async def create(self, model, messages, temperature):
+        self.prompts.append(messages[0]['content'])
+        return ChatCompletion.model_validate({
+            'id': 'test', 'created': 0, 'model': model, 'object': 'chat.completion',
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': messages[0]['content']}}]})
+
+
+def test_batches_go_through_the_response_cache(tmp_path, monkeypatch):
+    jobs = [('d', '2025-12-01'), ('d', '2025-12-02')]
+    monkeypatch.setattr(async_submit, 'load_prompt', lambda prompt_type, date_input: f"{prompt_type} {date_input}")
+    first = CompletionClient()
+    results, failures = asyncio.run(async_submit.submit_prompts(
+        jobs, client=first, sink=None, cache=ResponseCache(str(tmp_path), mode='read_through')))
+    assert failures == {} and len(first.prompts) == 2
+
+    replay = CompletionClient()
+    cache = ResponseCache(str(tmp_path), mode='replay')
+    results, failures = asyncio.run(async_submit.submit_prompts(
+        jobs + [('d', '2025-12-03')], client=replay, sink=None, cache=cache))
+    assert replay.prompts == []
+    assert sorted(results) == jobs
+    assert results[('d', '2025-12-02')].choices[0].message.content == "d 2025-12-02"
+    assert failures[('d', '2025-12-03')].startswith("No cached response for")
+    assert cache.hits == 2
@@ -0,0 +1,44 @@
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import bhavcopy
+from bhavcopy import fetch_stock_data_bhavcopy, read_bhavcopy
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "BhavCopy_NSE_CM_0_0_0_20251205_F_0000.csv.zip")
+
+
+def test_read_bhavcopy_maps_the_udiff_columns():
+    bhav = read_bhavcopy(SAMPLE)
+
+    assert list(bhav.columns) == ['Symbol', 'Series', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+    assert len(bhav) == 9
+    assert bhav['Date'].unique().tolist() == ['2025-12-05']
+    row = bhav[(bhav['Symbol'] == 'GMRAIRPORT') & (bhav['Series'] == 'EQ')].iloc[0]
+    assert (row['Open'], row['High'], row['Low'], row['Close'], row['Volume']) == (102.56, 103.97, 101.0, 103.51, 30961152)
+
+
+def test_stock_file_keeps_universe_eq_rows_ranked_by_volume(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    combined = fetch_stock_data_bhavcopy('2025-12-05', SAMPLE)
+
+    # Mid Cap first, then Small Cap, each by descending volume; RELIANCE (not in the
+    # universe), FACT (BE series) and the GMRAIRPORT bond (N1 series) are dropped.
+    assert combined['Symbol'].tolist() == ['GMRAIRPORT', 'UNIONBANK', 'ASHOKLEY', 'INDUSTOWER', 'IOB', 'IDBI']
+    assert combined['Category'].tolist() == ['Mid Cap'] * 4 + ['Small Cap'] * 2
+    assert combined['Volume'].tolist() == [30961152, 11066679, 10982958, 9654037, 12456780, 8123456]
+
+    written = pd.read_csv(os.path.join("Stock Files", "2025-12-05.csv"))
+    assert list(written.columns) == ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Category']
+    pd.testing.assert_frame_equal(written, combined.reset_index(drop=True), check_dtype=False)
+
+
+def test_unpublished_bhavcopy_on_a_trading_day_writes_no_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(bhavcopy.requests, 'get', lambda *args, **kwargs: SimpleNamespace(status_code=404))
+
+    with pytest.raises(FileNotFoundError, match='not published'):
+        fetch_stock_data_bhavcopy('2025-12-05')
+    assert not os.path.exists(os.path.join("Stock Files", "2025-12-05.csv"))
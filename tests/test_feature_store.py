@@ -0,0 +1,52 @@
+import os
+import shutil
+
+import pandas as pd
+
+from feature_store import FeatureStore
+from stock_files import write_stock_file
+
+REPO_STOCK_FILES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Stock Files")
+DAYS = ['2025-09-15', '2025-09-16', '2025-09-17', '2025-09-18', '2025-09-19', '2025-09-22']
+
+
+def copy_stock_files(tmp_path, days):
+    os.makedirs(tmp_path / "Stock Files")
+    for day in days:
+        shutil.copy(os.path.join(REPO_STOCK_FILES, f"{day}.csv"), tmp_path / "Stock Files")
+
+
+def fresh_features(tmp_path, name):
+    store = FeatureStore(str(tmp_path / name))
+    store.catch_up(DAYS[-1], start_date=DAYS[0])
+    return {day: store.features(day) for day in DAYS}
+
+
+def test_rewriting_an_added_day_rebuilds_the_later_features(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    copy_stock_files(tmp_path, DAYS)
+    FeatureStore().catch_up(DAYS[-1], start_date=DAYS[0])
+
+    changed = pd.read_csv(f"Stock Files/{DAYS[2]}.csv")
+    changed['Close'] = changed['Close'] * 1.1
+    write_stock_file(changed, pd.Timestamp(DAYS[2]))
+
+    expected = fresh_features(tmp_path, "Expected")
+    store = FeatureStore()
+    assert store.last_date == DAYS[-1]
+    for day in DAYS:
+        pd.testing.assert_frame_equal(store.features(day), expected[day])
+
+
+def test_backfilling_before_the_history_rebuilds_from_that_day(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    copy_stock_files(tmp_path, DAYS[1:])
+    FeatureStore().catch_up(DAYS[-1], start_date=DAYS[1])
+
+    write_stock_file(pd.read_csv(os.path.join(REPO_STOCK_FILES, f"{DAYS[0]}.csv")), pd.Timestamp(DAYS[0]))
+
+    expected = fresh_features(tmp_path, "Expected")
+    store = FeatureStore()
+    assert (store.first_date, store.last_date) == (DAYS[0], DAYS[-1])
+    for day in DAYS:
+        pd.testing.assert_frame_equal(store.features(day), expected[day])
@@ -0,0 +1,24 @@
+from fetch_cache import FetchCheckpoint, outstanding_report
+
+ROW = {'Symbol': 'INFY', 'Date': '2025-12-05', 'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1}
+
+
+def test_no_data_results_stay_outstanding_on_a_trading_day(tmp_path):
+    checkpoint = FetchCheckpoint('2025-12-05', 'nse', root=str(tmp_path))
+    checkpoint.record('INFY.NS', ROW)
+    checkpoint.record('TCS.NS', None)
+
+    reopened = FetchCheckpoint('2025-12-05', 'nse', root=str(tmp_path))
+    symbols = ['INFY.NS', 'TCS.NS', 'WIPRO.NS']
+    assert reopened.outstanding(symbols) == ['TCS.NS', 'WIPRO.NS']
+    assert reopened.rows(symbols) == [ROW]
+    assert "(1 returned no data)" in outstanding_report(reopened, symbols)
+
+    reopened.record('TCS.NS', dict(ROW, Symbol='TCS'))
+    assert FetchCheckpoint('2025-12-05', 'nse', root=str(tmp_path)).outstanding(symbols) == ['WIPRO.NS']
+
+
+def test_no_data_results_are_final_when_the_market_was_closed(tmp_path):
+    checkpoint = FetchCheckpoint('2025-10-02', 'nse', root=str(tmp_path))
+    checkpoint.record('INFY.NS', None)
+    assert FetchCheckpoint('2025-10-02', 'nse', root=str(tmp_path)).outstanding(['INFY.NS']) == []
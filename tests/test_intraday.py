@@ -0,0 +1,24 @@
+import pandas as pd
+
+from intraday import TIMEZONE, IntradaySession, session_complete
+
+
+def bars_until(end_time):
+    times = pd.date_range(f"2025-12-05 09:15", f"2025-12-05 {end_time}", freq='5min', tz=TIMEZONE)
+    return pd.DataFrame({'Symbol': 'INFY', 'Datetime': times, 'Open': 100.0, 'High': 101.0,
+                         'Low': 99.0, 'Close': 100.5, 'Volume': 10})
+
+
+def test_a_session_is_complete_once_its_bars_reach_the_close():
+    session = IntradaySession(['INFY'], '2025-12-05')
+    session.ingest(bars_until('12:00'))
+    assert not session_complete(session, fetched=False)
+
+    session.ingest(bars_until('15:25'))
+    assert session_complete(session, fetched=False)
+
+
+def test_a_fetched_past_session_counts_as_complete():
+    session = IntradaySession(['INFY'], '2025-12-05')
+    session.ingest(bars_until('12:00'))
+    assert session_complete(session, fetched=True)
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_store
+from market_store import COLUMNS, MarketStore
+
+
+def day_frame(date_str, symbols, close):
+    return pd.DataFrame({
+        'Symbol': symbols,
+        'Date': date_str,
+        'Open': close,
+        'High': close,
+        'Low': close,
+        'Close': close,
+        'Volume': [1000] * len(symbols),
+        'Category': 'Large Cap',
+    })
+
+
+def test_append_and_read_round_trip(tmp_path):
+    store = MarketStore(str(tmp_path))
+    store.append(day_frame('2025-12-04', ['INFY', 'TCS'], [1500.5, 3200.25]), '2025-12-04')
+    store.append(day_frame('2025-12-05', ['INFY', 'TCS', 'WIPRO'], [1510.0, 3190.0, 250.75]), '2025-12-05')
+
+    df = MarketStore(str(tmp_path)).read('2025-12-05')
+    assert df['Symbol'].tolist() == ['INFY', 'TCS', 'WIPRO']
+    assert df['Date'].unique().tolist() == ['2025-12-05']
+    assert df['Close'].tolist() == [1510.0, 3190.0, 250.75]
+
+
+def test_interrupted_append_is_not_visible(tmp_path, monkeypatch):
+    store = MarketStore(str(tmp_path))
+    store.append(day_frame('2025-12-04', ['INFY', 'TCS'], [1500.5, 3200.25]), '2025-12-04')
+
+    column_files = {file_name for file_name, _ in COLUMNS.values()}
+    written = []
+
+    def crashing_open(path, mode='r', *args, **kwargs):
+        if mode == 'ab' and path.rsplit('/', 1)[-1] in column_files:
+            written.append(path)
+            if len(written) == 4:
+                raise OSError("simulated crash")
+        return open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(market_store, 'open', crashing_open, raising=False)
+    with pytest.raises(OSError):
+        store.append(day_frame('2025-12-05', ['INFY', 'TCS'], [1510.0, 3190.0]), '2025-12-05')
+    monkeypatch.undo()
+
+    sizes = [np.fromfile(tmp_path / file_name, dtype=dtype).size for file_name, dtype in COLUMNS.values()]
+    assert len(set(sizes)) > 1
+
+    store = MarketStore(str(tmp_path))
+    assert store.dates() == ['2025-12-04']
+    store.append(day_frame('2025-12-05', ['WIPRO', 'INFY'], [250.75, 1510.0]), '2025-12-05')
+
+    df = MarketStore(str(tmp_path)).read('2025-12-05')
+    assert df['Symbol'].tolist() == ['WIPRO', 'INFY']
+    assert df['Date'].unique().tolist() == ['2025-12-05']
+    assert df['Close'].tolist() == [250.75, 1510.0]
+    assert MarketStore(str(tmp_path)).read('2025-12-04')['Close'].tolist() == [1500.5, 3200.25]
+    sizes = [np.fromfile(tmp_path / file_name, dtype=dtype).size for file_name, dtype in COLUMNS.values()]
+    assert sizes == [4] * len(COLUMNS)
+
+
+def test_a_newer_stock_file_wins_until_reimported(tmp_path, monkeypatch):
+    stock_dir, store_dir = tmp_path / "Stock Files", str(tmp_path / "Market Data")
+    stock_dir.mkdir()
+    csv_file = stock_dir / "2025-12-05.csv"
+    day_frame('2025-12-05', ['INFY', 'TCS'], [1510.0, 3190.0]).to_csv(csv_file, index=False)
+    store = MarketStore(store_dir)
+    with monkeypatch.context() as m:
+        m.setattr(market_store.time, 'time', lambda: os.path.getmtime(csv_file) - 60)
+        store.import_stock_files(str(stock_dir))
+    assert market_store.load_stock_day('2025-12-05', str(stock_dir), store_dir)['Close'].tolist() == [1510.0, 3190.0]
+
+    # A hand fix to the CSV after it was stored
+    day_frame('2025-12-05', ['INFY', 'TCS'], [1512.0, 3190.0]).to_csv(csv_file, index=False)
+
+    assert not MarketStore(store_dir).is_current('2025-12-05', str(stock_dir))
+    assert market_store.load_stock_day('2025-12-05', str(stock_dir), store_dir)['Close'].tolist() == [1512.0, 3190.0]
+    frames = market_store.load_stock_days(['2025-12-05'], str(stock_dir), store_dir)
+    assert frames['2025-12-05']['Close'].tolist() == [1512.0, 3190.0]
+
+    assert MarketStore(store_dir).import_stock_files(str(stock_dir)) == ['2025-12-05']
+    store = MarketStore(store_dir)
+    assert store.is_current('2025-12-05', str(stock_dir))
+    assert store.read('2025-12-05')['Close'].tolist() == [1512.0, 3190.0]
+    assert store.import_stock_files(str(stock_dir)) == []
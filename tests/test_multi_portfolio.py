@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+
+import multi_portfolio
+from make_portfolio import update_portfolio as apply_weekend_trades
+from multi_portfolio import PortfolioConfig
+from send_prompt import BASE_URL, load_prompt, save_response
+from update_portfolio import update_portfolio as mark_portfolio
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WEEK = ['2025-12-01', '2025-12-02', '2025-12-03', '2025-12-04', '2025-12-05']
+CLOSES = {'HINDCOPPER': 371.85, 'GMRAIRPORT': 103.51, 'IOB': 38.72}
+
+
+class FakeResponse:
+    def __init__(self, content: str, prompt: str = None):
+        self.usage = None
+        self.payload = {'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}}],
+                        'model': 'grok-4', 'prompt': prompt}
+
+    def model_dump(self):
+        return self.payload
+
+
+class FakeClient:
+    """Answers daily prompts with one signal and weekend prompts with one GMRAIRPORT buy, echoing the prompt."""
+
+    def __init__(self):
+        self.chat = type('Chat', (), {'completions': self})()
+
+    def create(self, model, messages, temperature):
+        prompt = messages[0]['content']
+        if temperature == 0.35:
+            content = {'weekly_summary': "Test week.", 'trades': [
+                {'action': 'buy', 'symbol': 'GMRAIRPORT', 'shares': 10, 'amount': 1035.1, 'reason': "Test entry"}]}
+        else:
+            content = {'daily_summary': "Test day.", 'watchlist': [],
+                       'top_signals': [{'symbol': 'IOB', 'signal': 'Buy', 'reason': "Test", 'price': 38.72}]}
+        return FakeResponse(json.dumps(content), prompt)
+
+
+def write_week(tmp_path):
+    os.makedirs("Stock Files")
+    for i, date_str in enumerate(WEEK):
+        rows = [{'Symbol': symbol, 'Date': date_str, 'Open': close, 'High': close + 1, 'Low': close - 1,
+                 'Close': round(close + i, 2), 'Volume': 1000 * (n + 1),
+                 'Category': 'Small Cap' if symbol == 'IOB' else 'Mid Cap'}
+                for n, (symbol, close) in enumerate(CLOSES.items())]
+        pd.DataFrame(rows).to_csv(os.path.join("Stock Files", f"{date_str}.csv"), index=False)
+    shutil.copytree(os.path.join(REPO_DIR, "Prompts"), "Prompts")
+
+
+def seed_portfolio(portfolio_dir, reviews_dir, holdings):
+    os.makedirs(portfolio_dir, exist_ok=True)
+    if holdings is not None:
+        holdings.to_csv(os.path.join(portfolio_dir, "2025-12-04.csv"), index=False)
+    for date_str in WEEK[:-1]:
+        save_response(FakeClient().create('grok-4', [{'content': ''}], 0.3), 'd', date_str, "Weekdays", base_dir=reviews_dir)
+
+
+def saved_reply(reviews_dir, name):
+    sub_dir = "Weekends" if name.startswith('t_') else "Weekdays"
+    with open(os.path.join(reviews_dir, sub_dir, f"{name}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_fan_out_matches_a_direct_single_portfolio_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(multi_portfolio._CLIENTS, (BASE_URL, 'API_KEY'), FakeClient())
+    write_week(tmp_path)
+    holdings = pd.DataFrame({'Holding Name': ['HINDCOPPER', 'Cash'], 'Buying Price': [311.97, 5000.0],
+                             'Current Price': [371.85, 5000.0], 'Number of Units': [15.0, 1.0],
+                             'Total Amount': [5577.75, 5000.0], 'Perct Change': [19.19, 0.0]})
+    configs = [PortfolioConfig('small', cash=25000), PortfolioConfig('large', cash=100000)]
+    seeds = {'small': holdings, 'large': None}
+    for config in configs:
+        seed_portfolio(config.portfolio_dir, config.reviews_dir, seeds[config.name])
+
+    results, failures = multi_portfolio.run(configs, '2025-12-05', workers=2, cache_mode='off')
+
+    assert failures == {}
+    assert sorted(result['portfolio'] for result in results) == ['large', 'small']
+    for config in configs:
+        # The same day run directly, reading Stock Files instead of the shared-memory frames
+        direct_dir = os.path.join("Direct", config.name, "Portfolio Files")
+        direct_reviews = os.path.join("Direct", config.name, "Grok Daily Reviews")
+        seed_portfolio(direct_dir, direct_reviews, seeds[config.name])
+        start = seeds[config.name] if seeds[config.name] is not None else pd.DataFrame(columns=holdings.columns)
+        start.to_csv(os.path.join(direct_dir, "2025-12-05.csv"), index=False)
+
+        mark_portfolio('2025-12-05', direct_dir)
+        pd.testing.assert_frame_equal(pd.read_csv(os.path.join(config.portfolio_dir, "2025-12-05.csv")),
+                                      pd.read_csv(os.path.join(direct_dir, "2025-12-05.csv")))
+
+        for prompt_type in ['d', 't']:
+            reply = saved_reply(config.reviews_dir, f"{prompt_type}_2025-12-05")
+            direct = load_prompt(prompt_type, '2025-12-05', portfolio_dir=direct_dir, reviews_dir=direct_reviews,
+                                 default_cash=config.cash)
+            assert reply['prompt'] == direct
+            save_response(FakeResponse(reply['choices'][0]['message']['content']), prompt_type, '2025-12-05',
+                          "Weekends" if prompt_type == 't' else "Weekdays", base_dir=direct_reviews)
+
+        apply_weekend_trades('2025-12-05', '2025-12-08', direct_dir, direct_reviews, config.cash)
+        pd.testing.assert_frame_equal(pd.read_csv(os.path.join(config.portfolio_dir, "2025-12-08.csv")),
+                                      pd.read_csv(os.path.join(direct_dir, "2025-12-08.csv")))
+
+    # Each portfolio kept to its own folder and its own cash
+    small = pd.read_csv(os.path.join(configs[0].portfolio_dir, "2025-12-08.csv")).set_index('Holding Name')
+    large = pd.read_csv(os.path.join(configs[1].portfolio_dir, "2025-12-08.csv")).set_index('Holding Name')
+    assert small.loc['Cash', 'Total Amount'] == 3964.9
+    assert large.loc['Cash', 'Total Amount'] == 98964.9
+    assert sorted(os.listdir(multi_portfolio.PORTFOLIOS_DIR)) == ['large', 'small']
+    assert not os.path.exists("Portfolio Files") and not os.path.exists("Grok Daily Reviews")
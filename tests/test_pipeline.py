@@ -0,0 +1,27 @@
+import os
+
+import pandas as pd
+
+import pipeline
+
+STOCK_COLUMNS = ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Category']
+
+
+def write_stock_file(date_str, rows=()):
+    pd.DataFrame(list(rows), columns=STOCK_COLUMNS).to_csv(os.path.join("Stock Files", f"{date_str}.csv"), index=False)
+
+
+def fetch_step(date_str):
+    return pipeline.plan(date_str, stages=['fetch'])[0]
+
+
+def test_an_empty_stock_file_is_only_final_on_a_closed_day(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("Stock Files")
+    write_stock_file('2025-12-05')
+    write_stock_file('2025-10-02')  # Gandhi Jayanti
+    write_stock_file('2025-12-04', [['IOB', '2025-12-04', 38.5, 39.0, 38.1, 38.72, 1000, 'Small Cap']])
+
+    assert fetch_step('2025-12-05').is_stale(set())
+    assert not fetch_step('2025-10-02').is_stale(set())
+    assert not fetch_step('2025-12-04').is_stale(set())
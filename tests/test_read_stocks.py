@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+import pytest
+
+import read_stocks
+from feature_store import FEATURE_COLUMNS
+from render_cache import STOCK_RENDERS
+
+
+def test_cached_render_does_not_read_the_features_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    STOCK_RENDERS.clear()
+    os.makedirs("Stock Files")
+    for date_str in ['2025-12-04', '2025-12-05']:
+        pd.DataFrame({'Symbol': ['IOB'], 'Date': [date_str], 'Open': [38.5], 'High': [39.0], 'Low': [38.1],
+                      'Close': [38.72], 'Volume': [1000], 'Category': ['Small Cap']}).to_csv(
+            os.path.join("Stock Files", f"{date_str}.csv"), index=False)
+    features = pd.DataFrame({'Symbol': ['IOB'], **{column: [1.0] for column in FEATURE_COLUMNS}})
+    loads = []
+    monkeypatch.setattr(read_stocks, '_load_features', lambda date_str: loads.append(date_str) or features)
+
+    text = read_stocks.get_stock_data_string('2025-12-05', style='table', features=True)
+    assert read_stocks.get_stock_data_string('2025-12-05', style='table', features=True) == text
+    assert loads == ['2025-12-05']
+
+    def missing(date_str):
+        raise FileNotFoundError(f"No features for {date_str}.")
+
+    monkeypatch.setattr(read_stocks, '_load_features', missing)
+    assert read_stocks.get_stock_data_string('2025-12-05', style='table', features=True) == text
+    with pytest.raises(FileNotFoundError, match='No features'):
+        read_stocks.get_stock_data_string('2025-12-04', style='table', features=True)
+    STOCK_RENDERS.clear()
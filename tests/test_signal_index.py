@@ -0,0 +1,26 @@
+import json
+
+from signal_index import SignalIndex
+
+
+def write_reply(path, summary):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    content = json.dumps({'daily_summary': summary, 'top_signals': [{'symbol': 'INFY', 'signal': 'Buy'}]})
+    path.write_text(json.dumps({'choices': [{'message': {'content': content}}]}), encoding='utf-8')
+
+
+def test_opening_the_index_picks_up_added_and_edited_replies(tmp_path):
+    reply = tmp_path / 'Weekdays' / 'd_2025-12-05.json'
+    write_reply(reply, 'Original summary')
+    index = SignalIndex(str(tmp_path))
+    assert index.content('2025-12-05', 'd')['daily_summary'] == 'Original summary'
+    index.close()
+
+    write_reply(reply, 'Edited by hand')
+    write_reply(tmp_path / 'Weekdays' / 'd_2025-12-04.json', 'Pulled from git')
+
+    index = SignalIndex(str(tmp_path))
+    assert index.content('2025-12-05', 'd')['daily_summary'] == 'Edited by hand'
+    assert index.content('2025-12-04', 'd')['daily_summary'] == 'Pulled from git'
+    assert index.signals(symbol='INFY')['date'].tolist() == ['2025-12-04', '2025-12-05']
+    index.close()
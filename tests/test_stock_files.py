@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+
+from stock_files import write_stock_days
+
+DAYS = list(pd.bdate_range('2025-10-01', '2025-10-03'))  # 2025-10-02 is an NSE holiday
+ROWS = pd.DataFrame({
+    'Symbol': ['INFY', 'TCS'],
+    'Date': ['2025-10-01', '2025-10-01'],
+    'Open': [1.0, 2.0], 'High': [1.0, 2.0], 'Low': [1.0, 2.0], 'Close': [1.0, 2.0],
+    'Volume': [10, 20],
+    'Category': ['Mid Cap', 'Mid Cap'],
+})
+
+
+def test_trading_days_without_rows_are_left_missing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    written = write_stock_days(ROWS, DAYS, 'Stock Files')
+
+    assert written == ['2025-10-01', '2025-10-02']
+    assert len(pd.read_csv('Stock Files/2025-10-01.csv')) == 2
+    assert pd.read_csv('Stock Files/2025-10-02.csv').empty
+    assert not os.path.exists('Stock Files/2025-10-03.csv')
+
+
+def test_failed_symbols_leave_every_trading_day_missing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    written = write_stock_days(ROWS, DAYS, 'Stock Files', failed=['WIPRO.NS'])
+
+    assert written == ['2025-10-02']
+    assert sorted(os.listdir('Stock Files')) == ['2025-10-02.csv']
@@ -0,0 +1,42 @@
+import pytest
+
+from trade_engine import Holdings, apply_trades
+
+
+def _holdings():
+    position = {'Buying Price': 100.0, 'Current Price': 110.0, 'Number of Units': 10,
+                'Total Amount': 1100.0, 'Perct Change': 10.0}
+    return Holdings({'HINDCOPPER': position}, 1000.0)
+
+
+def test_buy_then_sell_of_one_symbol_closes_the_position():
+    trades = [{'action': 'buy', 'symbol': 'INFY', 'shares': 2, 'amount': 300.0},
+              {'action': 'sell', 'symbol': 'INFY', 'shares': 2, 'amount': 320.0}]
+    holdings = apply_trades(_holdings(), trades)
+
+    assert list(holdings.positions) == ['HINDCOPPER']
+    assert holdings.cash == 1020.0
+
+
+def test_fills_apply_in_order_and_keep_the_last_price():
+    trades = [{'action': 'buy', 'symbol': 'HINDCOPPER', 'shares': 5, 'amount': 600.0},
+              {'action': 'remove', 'symbol': 'IOB', 'shares': 0, 'amount': 0},
+              {'action': 'sell', 'symbol': 'HINDCOPPER', 'shares': 5, 'amount': 650.0}]
+    holdings = apply_trades(_holdings(), trades)
+
+    position = holdings.positions['HINDCOPPER']
+    assert position['Number of Units'] == 10
+    assert position['Buying Price'] == 106.67
+    assert position['Current Price'] == 130.0
+    assert holdings.cash == 1050.0
+
+
+def test_a_buy_that_overdraws_cash_rejects_the_day():
+    holdings = _holdings()
+    trades = [{'action': 'buy', 'symbol': 'INFY', 'shares': 10, 'amount': 1500.0},
+              {'action': 'sell', 'symbol': 'HINDCOPPER', 'shares': 10, 'amount': 1100.0}]
+    with pytest.raises(ValueError, match='more cash'):
+        apply_trades(holdings, trades, '2025-11-21')
+
+    assert list(holdings.positions) == ['HINDCOPPER']
+    assert holdings.cash == 1000.0
@@ -0,0 +1,32 @@
+import io
+
+import pandas as pd
+
+from update_portfolio import mark_to_market
+
+PORTFOLIO = pd.DataFrame({
+    'Holding Name': ['HINDCOPPER', 'WAAREEENER', 'Cash'],
+    'Buying Price': [311.97, 3207.6, 5000.0],
+    'Current Price': [371.85, 2871.4, 5000.0],
+    'Number of Units': [15.0, 1.0, 1.0],
+    'Total Amount': [5577.75, 2871.4, 5000.0],
+    'Perct Change': [19.19, -10.48, 0.0],
+})
+
+
+def test_mark_to_market_uses_the_days_close():
+    stock_df = pd.DataFrame({'Symbol': ['HINDCOPPER', 'INFY'], 'Close': [380.0, 1500.0]})
+    marked, missing = mark_to_market(PORTFOLIO, stock_df)
+
+    assert marked['Current Price'].tolist() == [380.0, 2871.4, 5000.0]
+    assert marked['Total Amount'].tolist() == [5700.0, 2871.4, 5000.0]
+    assert marked.loc[0, 'Perct Change'] == 21.81
+    assert missing == ['WAAREEENER']
+
+
+def test_mark_to_market_skips_every_holding_on_an_empty_day():
+    stock_df = pd.read_csv(io.StringIO("Symbol,Category,Date,Open,High,Low,Close,Volume\n"))
+    marked, missing = mark_to_market(PORTFOLIO, stock_df)
+
+    pd.testing.assert_frame_equal(marked, PORTFOLIO)
+    assert missing == ['HINDCOPPER', 'WAAREEENER']
@@ -0,0 +1,127 @@
+import json
+import pandas as pd
+
+PORTFOLIO_COLUMNS = ['Holding Name', 'Buying Price', 'Current Price', 'Number of Units', 'Total Amount', 'Perct Change']
+DEFAULT_CASH = 25000.00
+
+
+class Holdings:
+    """Portfolio held as a symbol-keyed dict plus a cash balance.
+
+    Every trade is an O(1) dict update, and a whole sequence of trading days can
+    be applied in memory before converting back to the Portfolio Files layout.
+    """
+
+    def __init__(self, positions: dict = None, cash: float = 0.0):
+        self.positions = positions if positions is not None else {}
+        self.cash = cash
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, default_cash: float = DEFAULT_CASH) -> 'Holdings':
+        """Builds holdings from Portfolio Files rows; an empty portfolio starts with default_cash."""
+        if df.empty:
+            return cls({}, default_cash)
+
+        is_cash = df['Holding Name'] == 'Cash'
+        cash = float(df.loc[is_cash, 'Total Amount'].iloc[0]) if is_cash.any() else 0.0
+        positions = {}
+        for name, buy, current, units, total, pct in df.loc[~is_cash, PORTFOLIO_COLUMNS].itertuples(index=False):
+            positions[name] = {'Buying Price': buy, 'Current Price': current, 'Number of Units': units,
+                               'Total Amount': total, 'Perct Change': pct}
+        return cls(positions, cash)
+
+    def mark(self, prices: dict) -> 'Holdings':
+        """Revalues every position with a price in `prices` (symbol -> Close); others are unchanged."""
+        prices = {str(symbol).upper(): price for symbol, price in prices.items()}
+        for name, position in self.positions.items():
+            close = prices.get(str(name).upper())
+            if close is None:
+                continue
+            current = round(float(close), 2)
+            buying_price = position['Buying Price']
+            position.update({'Current Price': current,
+                             'Total Amount': round(current * position['Number of Units'], 2),
+                             'Perct Change': round(((current - buying_price) / buying_price) * 100, 2)})
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns Portfolio Files rows (holdings in order, Cash last), rounded to 2 decimals."""
+        rows = [{'Holding Name': name, **position} for name, position in self.positions.items()]
+        cash = round(self.cash, 2)
+        rows.append({'Holding Name': 'Cash', 'Buying Price': cash, 'Current Price': cash,
+                     'Number of Units': 1, 'Total Amount': cash, 'Perct Change': 0.00})
+        df = pd.DataFrame(rows, columns=PORTFOLIO_COLUMNS)
+        df['Number of Units'] = df['Number of Units'].astype(float)
+        for column in ['Buying Price', 'Current Price', 'Total Amount', 'Perct Change']:
+            df[column] = df[column].astype(float).round(2)
+        return df
+
+
+def load_trades(json_path: str) -> list:
+    """Reads the `trades` list from a saved Grok weekend response."""
+    with open(json_path, 'r') as f:
+        outer_data = json.load(f)
+    content = outer_data['choices'][0]['message']['content']
+    return json.loads(content)['trades']
+
+
+def apply_trades(holdings: Holdings, trades, label: str = '') -> Holdings:
+    """Applies one day's trades to `holdings` in the order listed, as O(1) dict updates.
+
+    'remove' entries (screening-list changes) are skipped. If any trade takes
+    cash below zero the day is rejected and `holdings` is unchanged.
+
+    Raises:
+        ValueError: If the trades would take cash below zero.
+    """
+    positions = {name: dict(position) for name, position in holdings.positions.items()}
+    cash = holdings.cash
+
+    for trade in trades:
+        action = trade['action']
+        if action not in ['buy', 'sell']:
+            continue
+        symbol, shares, amount = trade['symbol'], trade['shares'], round(trade['amount'], 2)
+        price = round(amount / shares, 2)
+        position = positions.get(symbol)
+
+        if action == 'sell':
+            cash += amount
+            if position is None:
+                continue
+            new_units = position['Number of Units'] - shares
+            if new_units > 0:
+                buying_price = position['Buying Price']
+                position.update({'Number of Units': new_units, 'Current Price': price,
+                                 'Total Amount': round(price * new_units, 2),
+                                 'Perct Change': round(((price - buying_price) / buying_price) * 100, 2)})
+            else:
+                del positions[symbol]
+            continue
+
+        cash -= amount
+        if round(cash, 2) < 0:
+            raise ValueError(f"Trades{' for ' + label if label else ''} need ₹{-round(cash, 2):.2f} more cash "
+                             f"than available at the {symbol} buy.")
+        if position is not None:
+            old_units = position['Number of Units']
+            old_cost = round(position['Buying Price'] * old_units, 2)
+            new_units = old_units + shares
+            new_buy = round((old_cost + amount) / new_units, 2)
+            position.update({'Buying Price': new_buy, 'Current Price': price, 'Number of Units': new_units,
+                             'Total Amount': round(price * new_units, 2),
+                             'Perct Change': round(((price - new_buy) / new_buy) * 100, 2)})
+        else:
+            positions[symbol] = {'Buying Price': price, 'Current Price': price, 'Number of Units': shares,
+                                 'Total Amount': amount, 'Perct Change': 0.00}
+
+    holdings.positions = positions
+    holdings.cash = cash
+    return holdings
+
+
+def apply_trade_days(holdings: Holdings, trade_days) -> Holdings:
+    """Applies a sequence of (label, trades) days in order without any CSV round trips."""
+    for label, trades in trade_days:
+        apply_trades(holdings, trades, label)
+    return holdings
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# NSE equity-segment trading holidays that fall on weekdays, from the exchange's yearly
+# holiday circulars. Add the next year's list when NSE publishes it.
+HOLIDAYS = {
+    '2025-02-26': "Mahashivratri",
+    '2025-03-14': "Holi",
+    '2025-03-31': "Id-Ul-Fitr (Ramadan Eid)",
+    '2025-04-10': "Shri Mahavir Jayanti",
+    '2025-04-14': "Dr. Baba Saheb Ambedkar Jayanti",
+    '2025-04-18': "Good Friday",
+    '2025-05-01': "Maharashtra Day",
+    '2025-08-15': "Independence Day",
+    '2025-08-27': "Ganesh Chaturthi",
+    '2025-10-02': "Mahatma Gandhi Jayanti / Dussehra",
+    '2025-10-22': "Diwali Balipratipada",
+    '2025-11-05': "Prakash Gurpurb Sri Guru Nanak Dev",
+    '2025-12-25': "Christmas",
+    '2026-01-26': "Republic Day",
+    '2026-03-03': "Holi",
+    '2026-03-26': "Shri Ram Navami",
+    '2026-03-31': "Shri Mahavir Jayanti",
+    '2026-04-03': "Good Friday",
+    '2026-04-14': "Dr. Baba Saheb Ambedkar Jayanti",
+    '2026-05-01': "Maharashtra Day",
+    '2026-05-28': "Bakri Id",
+    '2026-06-26': "Muharram",
+    '2026-09-14': "Ganesh Chaturthi",
+    '2026-10-02': "Mahatma Gandhi Jayanti",
+    '2026-10-20': "Dussehra",
+    '2026-11-10': "Diwali Balipratipada",
+    '2026-11-24': "Prakash Gurpurb Sri Guru Nanak Dev",
+    '2026-12-25': "Christmas",
+}
+# Festival days on which NSE holds a short Muhurat session; they count as trading days.
+SPECIAL_SESSIONS = {
+    '2025-10-21': "Diwali Laxmi Pujan (Muhurat trading)",
+}
+CALENDAR_YEARS = sorted({int(day[:4]) for day in HOLIDAYS})
+
+_CALENDAR = np.busdaycalendar(weekmask='1111100', holidays=sorted(HOLIDAYS))
+
+
+def _day(date) -> np.datetime64:
+    """A YYYY-MM-DD string, datetime or Timestamp as a numpy day."""
+    return np.datetime64(pd.Timestamp(date).strftime('%Y-%m-%d'), 'D')
+
+
+def is_trading_day(date) -> bool:
+    """True for a weekday that is not an NSE holiday.
+
+    Years missing from HOLIDAYS (see CALENDAR_YEARS) are treated as having no
+    holidays, so every weekday of them counts.
+    """
+    return bool(np.is_busday(_day(date), busdaycal=_CALENDAR))
+
+
+def closed_reason(date) -> str:
+    """Why the market is closed on a date ('weekend' or the holiday's name); None on a trading day."""
+    date_str = str(_day(date))
+    if date_str in HOLIDAYS:
+        return HOLIDAYS[date_str]
+    if not is_trading_day(date_str):
+        return 'weekend'
+    return None
+
+
+def next_trading_day(date, n: int = 1) -> str:
+    """The n-th trading day after date (date itself need not be a trading day)."""
+    return str(np.busday_offset(_day(date), n, roll='backward', busdaycal=_CALENDAR))
+
+
+def previous_trading_day(date, n: int = 1) -> str:
+    """The n-th trading day before date (date itself need not be a trading day)."""
+    return str(np.busday_offset(_day(date), -n, roll='forward', busdaycal=_CALENDAR))
+
+
+def trading_days(start_date, end_date) -> list:
+    """Trading days from start_date to end_date (inclusive), as YYYY-MM-DD strings."""
+    days = np.arange(_day(start_date), _day(end_date) + 1)
+    return [str(day) for day in days[np.is_busday(days, busdaycal=_CALENDAR)]]
+
+
+def sessions_before(date, count: int) -> list:
+    """The `count` trading days before date, oldest first."""
+    offsets = np.arange(-count, 0)
+    return [str(day) for day in np.busday_offset(_day(date), offsets, roll='forward', busdaycal=_CALENDAR)]
+
+
+def week_start(date) -> str:
+    """Monday of date's week."""
+    day = pd.Timestamp(date)
+    return (day - pd.Timedelta(days=day.weekday())).strftime('%Y-%m-%d')
+
+
+def week_sessions(date, include_holidays: bool = False) -> list:
+    """The trading days of date's Monday-Friday week up to and including date, oldest first.
+
+    With include_holidays, every weekday up to date (holidays too).
+    """
+    if include_holidays:
+        return [day.strftime('%Y-%m-%d') for day in pd.bdate_range(week_start(date), date)]
+    return trading_days(week_start(date), date)
+
+
+def is_week_close(date) -> bool:
+    """True if date is the last trading day of its week (a Friday, or earlier when Friday is a holiday)."""
+    return is_trading_day(date) and week_start(next_trading_day(date)) != week_start(date)
+
+
+if __name__ == "__main__":
+    date_input = input("Enter the date (YYYY-MM-DD): ").strip()
+    reason = closed_reason(date_input)
+    print(f"{date_input}: {'trading day' if reason is None else f'market closed ({reason})'}")
+    print(f"Previous trading day: {previous_trading_day(date_input)}")
+    print(f"Next trading day: {next_trading_day(date_input)}")
+    print(f"Sessions this week so far: {', '.join(week_sessions(date_input)) or 'none'}")
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import os
+import glob
+import re
+
+UNIVERSE_DIR = "Universe"
+CATEGORIES = ['Mid Cap', 'Small Cap']
+
+
+class Universe:
+    """Versioned symbol table with stable integer IDs and dense ID-indexed arrays.
+
+    Universe/universe_v<N>.csv lists every symbol the project has ever screened
+    (Id, Symbol, Category, Active, YFinance). IDs never change or get reused, so
+    arrays indexed by ID stay valid across versions; dropped symbols are kept
+    with Active = 0 so historical Stock Files and portfolios still resolve.
+    """
+
+    def __init__(self, table: pd.DataFrame, version: int):
+        self.version = version
+        self.table = table.sort_values('Id').reset_index(drop=True)
+        if not self.table['Id'].is_unique or not self.table['Symbol'].is_unique:
+            raise ValueError(f"Universe v{version} has duplicate IDs or symbols.")
+
+        size = int(self.table['Id'].max()) + 1 if len(self.table) else 0
+        self.symbols = np.full(size, '', dtype=object)
+        self.categories = np.full(size, '', dtype=object)
+        self.active = np.zeros(size, dtype=bool)
+        self.symbols[self.table['Id']] = self.table['Symbol'].to_numpy()
+        self.categories[self.table['Id']] = self.table['Category'].to_numpy()
+        self.active[self.table['Id']] = self.table['Active'].astype(bool).to_numpy()
+        self._index = pd.Index(self.table['Symbol'])
+        self._ids = self.table['Id'].to_numpy()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def ids(self, symbols) -> np.ndarray:
+        """Maps symbols (with or without the .NS suffix, any case) to IDs; unknown symbols map to -1."""
+        cleaned = pd.Series(list(symbols), dtype=object).astype(str).str.upper().str.replace('.NS', '', regex=False)
+        positions = self._index.get_indexer(cleaned)
+        return np.where(positions >= 0, self._ids[positions], -1)
+
+    def id(self, symbol: str) -> int:
+        return int(self.ids([symbol])[0])
+
+    def dense(self, df: pd.DataFrame, column: str, symbol_column: str = 'Symbol', fill=np.nan) -> np.ndarray:
+        """Scatters one column of `df` into an ID-indexed array (unknown symbols are dropped).
+
+        Example:
+            closes = UNIVERSE.dense(stock_df, 'Close')
+            closes[UNIVERSE.ids(holdings['Holding Name'])]
+        """
+        values = df[column].to_numpy()
+        out = np.full(len(self), fill, dtype=np.result_type(values.dtype, np.asarray(fill).dtype))
+        ids = self.ids(df[symbol_column])
+        known = ids >= 0
+        out[ids[known]] = values[known]
+        return out
+
+    def tickers(self, category: str, source: str = 'nse') -> list:
+        """Returns the active symbols of a category as NSE tickers (SYMBOL.NS) in ID order.
+
+        Args:
+            category (str): 'Mid Cap' or 'Small Cap'.
+            source (str): 'nse', or 'yfinance' to keep only symbols Yahoo serves.
+        """
+        rows = self.table[(self.table['Category'] == category) & (self.table['Active'] == 1)]
+        if source == 'yfinance':
+            rows = rows[rows['YFinance'] == 1]
+        return [f"{symbol}.NS" for symbol in rows['Symbol']]
+
+    def category_lists(self, source: str = 'nse') -> list:
+        """Returns [(category, tickers)] for every category, in priority order."""
+        return [(category, self.tickers(category, source)) for category in CATEGORIES]
+
+
+def load_universe(version: int = None, universe_dir: str = UNIVERSE_DIR) -> Universe:
+    """Loads a universe version (default: the latest universe_v<N>.csv).
+
+    Raises:
+        FileNotFoundError: If no matching universe file exists.
+    """
+    files = {}
+    for path in glob.glob(os.path.join(universe_dir, 'universe_v*.csv')):
+        match = re.search(r'universe_v(\d+)\.csv$', path)
+        if match:
+            files[int(match.group(1))] = path
+    if not files or (version is not None and version not in files):
+        raise FileNotFoundError(f"No universe file found in {universe_dir} for version {version or 'latest'}.")
+
+    version = version if version is not None else max(files)
+    return Universe(pd.read_csv(files[version]), version)
+
+
+UNIVERSE = load_universe(universe_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), UNIVERSE_DIR))
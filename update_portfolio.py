@@ -1,25 +1,138 @@
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
+from market_store import load_stock_days, load_stock_day, stock_day_exists
+from universe import UNIVERSE
+from ledger import Ledger, LEDGER_DIR
+from metrics import timed
 
-def update_portfolio(date_input: str) -> None:
+PORTFOLIO_COLUMNS = ['Holding Name', 'Buying Price', 'Current Price', 'Number of Units', 'Total Amount', 'Perct Change']
+
+
+def mark_to_market(df: pd.DataFrame, stock_df: pd.DataFrame):
+    """Revalues holdings at the day's Close prices in one keyed join.
+
+    Holdings are joined to closes through their universe IDs; Current Price,
+    Total Amount and Perct Change are then computed column-wise. Cash rows and
+    holdings without a close are left unchanged.
+
+    Args:
+        df (pd.DataFrame): Portfolio rows (PORTFOLIO_COLUMNS).
+        stock_df (pd.DataFrame): OHLCV rows with Symbol and Close.
+
+    Returns:
+        tuple: (marked DataFrame, list of holding names that had no close).
+    """
+    stock_df = stock_df.drop_duplicates(subset='Symbol')
+    # A header-only day file (holiday, failed fetch) reads back with object columns
+    stock_df = stock_df.assign(Close=pd.to_numeric(stock_df['Close'], errors='coerce').astype(float))
+    closes = UNIVERSE.dense(stock_df, 'Close')
+    closes = np.append(closes, np.nan)  # unknown symbols (ID -1) index this NaN
+    holding_close = closes[UNIVERSE.ids(df['Holding Name'])]
+
+    is_cash = df['Holding Name'].astype(str).str.lower().eq('cash').to_numpy()
+    priced = ~is_cash & ~np.isnan(holding_close)
+
+    df = df.copy()
+    current = df['Current Price'].to_numpy(dtype=float).copy()
+    current[priced] = np.round(holding_close[priced], 2)
+    units = df['Number of Units'].to_numpy(dtype=float)
+    buying = df['Buying Price'].to_numpy(dtype=float)
+
+    df['Current Price'] = current
+    df['Total Amount'] = np.where(priced, np.round(current * units, 2), df['Total Amount'])
+    df['Perct Change'] = np.where(priced, np.round((current - buying) / buying * 100, 2), df['Perct Change'])
+
+    missing = df.loc[~is_cash & ~priced, 'Holding Name'].tolist()
+    return df, missing
+
+
+def load_close_matrix(start_input: str, end_input: str, trading_only: bool = False):
+    """Loads Close prices for every stored trading day in a range as a (date x universe ID) matrix.
+
+    Args:
+        trading_only (bool): Drop days whose rows are not dated that day (holiday files
+            repeat the previous session), e.g. so forward returns count sessions.
+
+    Returns:
+        tuple: (list of dates, np.ndarray of shape (len(dates), len(UNIVERSE)) with NaN for no close).
+    """
+    days = [day.strftime('%Y-%m-%d') for day in pd.bdate_range(start_input, end_input)]
+    days = [day for day in days if stock_day_exists(day)]
+    frames = load_stock_days(days)
+    if trading_only:
+        days = [day for day in days if (frames[day]['Date'].astype(str) == day).any()]
+
+    matrix = np.full((len(days), len(UNIVERSE)), np.nan)
+    for row, day in enumerate(days):
+        day_df = frames[day].drop_duplicates(subset='Symbol')
+        ids = UNIVERSE.ids(day_df['Symbol'])
+        known = ids >= 0
+        matrix[row, ids[known]] = day_df['Close'].to_numpy(dtype=float)[known]
+    return days, matrix
+
+
+def mark_to_market_range(df: pd.DataFrame, start_input: str, end_input: str, closes=None) -> pd.DataFrame:
+    """Marks a fixed set of holdings on every trading day in a range in one vectorized pass.
+
+    A holding with no close on some day keeps its last known price (initially its
+    Current Price in `df`). Pass `closes` from load_close_matrix to reuse one load
+    across many portfolios.
+
+    Returns:
+        pd.DataFrame: One row per (Date, holding) with the PORTFOLIO_COLUMNS plus Date.
+    """
+    days, matrix = closes if closes is not None else load_close_matrix(start_input, end_input)
+
+    ids = UNIVERSE.ids(df['Holding Name'])
+    is_cash = df['Holding Name'].astype(str).str.lower().eq('cash').to_numpy()
+    matrix = np.append(matrix, np.full((len(days), 1), np.nan), axis=1)
+    prices = matrix[:, ids]                                        # (days x holdings)
+    prices[:, is_cash] = np.nan
+    prices = pd.DataFrame(prices).ffill().to_numpy()
+    prices = np.where(np.isnan(prices), df['Current Price'].to_numpy(dtype=float), np.round(prices, 2))
+
+    units = df['Number of Units'].to_numpy(dtype=float)
+    buying = df['Buying Price'].to_numpy(dtype=float)
+    amounts = np.where(is_cash, df['Total Amount'].to_numpy(dtype=float), np.round(prices * units, 2))
+    changes = np.where(is_cash, df['Perct Change'].to_numpy(dtype=float), np.round((prices - buying) / buying * 100, 2))
+
+    n_days, n_holdings = prices.shape
+    return pd.DataFrame({
+        'Date': np.repeat(days, n_holdings),
+        'Holding Name': np.tile(df['Holding Name'].to_numpy(), n_days),
+        'Buying Price': np.tile(buying, n_days),
+        'Current Price': prices.ravel(),
+        'Number of Units': np.tile(units, n_days),
+        'Total Amount': amounts.ravel(),
+        'Perct Change': changes.ravel(),
+    })
+
+
+@timed('mark_portfolio')
+def update_portfolio(date_input: str, portfolio_dir: str = "Portfolio Files", stock_df: pd.DataFrame = None) -> None:
     """Updates portfolio CSV for the given date using stored OHLCV data 
-    from Stock Files/<date>.csv instead of fetching from NSE.
+    (market store, else Stock Files/<date>.csv) instead of fetching from NSE.
     
     - Current Price, Total Amount, and Perct Change are updated
       strictly with the Close price of the input date.
     - If a holding is not present in Stock Files data, row is skipped.
+    
+    Args:
+        date_input (str): Date in YYYY-MM-DD format.
+        portfolio_dir (str): Directory of the portfolio's daily CSVs (its ledger is the Ledger folder beside it).
+        stock_df (pd.DataFrame): The day's stock rows if already loaded (e.g. shared by multi_portfolio).
     """
     try:
         target_date = datetime.strptime(date_input, '%Y-%m-%d')
     except ValueError:
         raise ValueError("Invalid date format. Please use YYYY-MM-DD (e.g., 2025-09-29).")
     
-    stock_file = os.path.join("Stock Files", f"{target_date.strftime('%Y-%m-%d')}.csv")
-    portfolio_file = os.path.join("Portfolio Files", f"{target_date.strftime('%Y-%m-%d')}.csv")
+    portfolio_file = os.path.join(portfolio_dir, f"{target_date.strftime('%Y-%m-%d')}.csv")
     
-    # Check Stock Files exists
-    if not os.path.exists(stock_file):
+    # Check stock data exists (market store or Stock Files)
+    if stock_df is None and not stock_day_exists(target_date.strftime('%Y-%m-%d')):
         raise FileNotFoundError(f"No stock data found for {target_date.strftime('%Y-%m-%d')}. Run your stock fetch script first.")
     
     # Check Portfolio exists
@@ -27,36 +140,29 @@ def update_portfolio(date_input: str) -> None:
         raise FileNotFoundError(f"No portfolio file found for {target_date.strftime('%Y-%m-%d')}. Please create it first.")
     
     # Load stock market data
-    stock_df = pd.read_csv(stock_file)
+    if stock_df is None:
+        stock_df = load_stock_day(target_date.strftime('%Y-%m-%d'))
     if 'Symbol' not in stock_df.columns or 'Close' not in stock_df.columns:
         raise ValueError("Stock file is missing required columns: Symbol, Close")
     
     # Load portfolio
     df = pd.read_csv(portfolio_file)
-    required_cols = ['Holding Name', 'Buying Price', 'Current Price', 'Number of Units', 'Total Amount', 'Perct Change']
-    if not all(col in df.columns for col in required_cols):
+    if not all(col in df.columns for col in PORTFOLIO_COLUMNS):
         raise ValueError("Portfolio file missing required columns. Expected: Holding Name, Buying Price, Current Price, Number of Units, Total Amount, Perct Change")
     
-    # Update portfolio
-    for index, row in df.iterrows():
-        symbol = row['Holding Name']
-        if symbol.lower() == 'cash':   # Skip cash
-            continue
-        
-        match = stock_df[stock_df['Symbol'].str.upper() == symbol.upper()]
-        if not match.empty:
-            close_price = float(match['Close'].iloc[0])
-            df.at[index, 'Current Price'] = round(close_price, 2)
-            df.at[index, 'Total Amount'] = round(df.at[index, 'Current Price'] * df.at[index, 'Number of Units'], 2)
-            df.at[index, 'Perct Change'] = round(
-                ((df.at[index, 'Current Price'] - df.at[index, 'Buying Price']) / df.at[index, 'Buying Price']) * 100, 2
-            )
-        else:
-            print(f"No stock data found for {symbol} in Stock Files on {date_input} — skipping update.")
+    # Revalue every holding in one join against the day's closes
+    df, missing = mark_to_market(df, stock_df)
+    for symbol in missing:
+        print(f"No stock data found for {symbol} in Stock Files on {date_input} — skipping update.")
     
     # Save updated portfolio
     df.to_csv(portfolio_file, index=False)
     print(f"Updated portfolio file using Stock Files data for {target_date.strftime('%Y-%m-%d')}: {portfolio_file}")
+    
+    # Record the day's closes in the portfolio ledger, if one is being kept
+    ledger = Ledger(os.path.join(os.path.dirname(portfolio_dir), LEDGER_DIR))
+    if ledger.exists():
+        ledger.record_mark(target_date.strftime('%Y-%m-%d'), stock_df)
 
 if __name__ == "__main__":
     date_input = input("Enter the date (YYYY-MM-DD): ").strip()